@@ -0,0 +1,186 @@
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+import torch
+
+
+# ===========================
+# Assisted Decoding Module
+# ===========================
+# Imported only once a real model is generating, like GenerationControls.
+
+def _cache_length(past) -> int:
+    if past is None:
+        return 0
+    if isinstance(past, tuple):
+        return past[0][0].shape[-2]
+    return past.get_seq_length()
+
+
+def _crop_cache(past, length: int):
+    """Drop cached positions from length on (rejected draft tokens)"""
+    current = _cache_length(past)
+    if past is None or current <= length:
+        return past
+    if isinstance(past, tuple):
+        # Legacy tuple-of-tuples format: (key, value) per layer, sequence on dim -2
+        return tuple(tuple(t[..., :length, :] for t in layer) for layer in past)
+    # A negative argument removes that many trailing positions in every transformers version
+    past.crop(length - current)
+    return past
+
+
+class NgramDraft:
+    """Proposes the tokens that followed the most recent occurrence of the trailing n-gram,
+    looked up in the current prompt/completion first and then in previously generated SQL.
+    Shared across calls; observe() adds each finished completion to the history."""
+
+    def __init__(self, ngram_size: int = 3, max_history: int = 256):
+        self.ngram_size = ngram_size
+        self._lock = threading.Lock()
+        self._history = deque(maxlen=max_history)
+        self._index = {}  # n-gram -> (sequence, position after it), most recent wins
+
+    def observe(self, token_ids: List[int]):
+        with self._lock:
+            if len(self._history) == self._history.maxlen:
+                # Rebuild rather than track which index entries point into the evicted sequence
+                self._history.popleft()
+                self._index = {}
+                for sequence in self._history:
+                    self._add(sequence)
+            self._history.append(token_ids)
+            self._add(token_ids)
+
+    def _add(self, sequence: List[int]):
+        for n in range(1, self.ngram_size + 1):
+            for end in range(n, len(sequence)):
+                self._index[(n, tuple(sequence[end - n:end]))] = (sequence, end)
+
+    def propose(self, sequence: List[int], k: int) -> List[int]:
+        if k <= 0:
+            return []
+        for n in range(min(self.ngram_size, len(sequence) - 1), 0, -1):
+            tail = sequence[-n:]
+            # Latest earlier occurrence in the sequence itself (column names repeat the schema)
+            for end in range(len(sequence) - 1, n - 1, -1):
+                if sequence[end - n:end] == tail:
+                    return sequence[end:end + k]
+            with self._lock:
+                found = self._index.get((n, tuple(tail)))
+            if found:
+                history, end = found
+                return history[end:end + k]
+        return []
+
+
+class ModelDraft:
+    """Greedy proposals from a small model sharing the main model's tokenizer.
+    Holds its own key/value cache, so use one instance per generation."""
+
+    def __init__(self, model):
+        self.model = model
+        self._past = None
+        self._tokens: List[int] = []  # Tokens covered by self._past
+
+    def propose(self, sequence: List[int], k: int) -> List[int]:
+        if k <= 0:
+            return []
+        common = 0
+        for cached, token in zip(self._tokens, sequence):
+            if cached != token:
+                break
+            common += 1
+        # At least one token has to be fed to get logits for the next position
+        common = min(common, len(sequence) - 1)
+        self._past = _crop_cache(self._past, common)
+        self._tokens = sequence[:common]
+
+        draft = []
+        feed = sequence[common:]
+        with torch.no_grad():
+            for _ in range(k):
+                ids = torch.tensor([feed], dtype=torch.long, device=self.model.device)
+                outputs = self.model(input_ids=ids, past_key_values=self._past, use_cache=True)
+                self._past = outputs.past_key_values
+                self._tokens += feed
+                token = int(outputs.logits[0, -1].argmax())
+                draft.append(token)
+                feed = [token]
+        return draft
+
+    def observe(self, token_ids: List[int]):
+        pass
+
+
+class AssistedDecoder:
+    """Greedy decoding where a draft proposes tokens and the main model verifies them all in
+    one forward pass. The main model's own choice is kept at the first disagreement, so the
+    output matches plain greedy generate() while needing fewer main-model passes."""
+
+    def __init__(self, model, draft, num_draft_tokens: int = 5, eos_token_id: Optional[int] = None):
+        self.model = model
+        self.draft = draft
+        self.num_draft_tokens = num_draft_tokens
+        self.eos_token_id = eos_token_id
+        self.stats = {"forward_passes": 0, "drafted_tokens": 0, "accepted_tokens": 0}
+
+    def generate(self, input_ids: torch.LongTensor, max_new_tokens: int, past_key_values=None,
+                 logits_processor=None, stopping_criteria=None, **kwargs) -> torch.LongTensor:
+        """Single-sequence counterpart of model.generate(); past_key_values may hold a prefilled
+        prefix of input_ids. Sampling arguments are ignored: decoding is always greedy."""
+        if input_ids.shape[0] != 1:
+            raise ValueError("Assisted decoding handles one sequence at a time")
+        device = input_ids.device
+        sequence = input_ids[0].tolist()
+        prompt_length = len(sequence)
+        past = past_key_values
+        cached = _cache_length(past)
+        finished = False
+
+        with torch.no_grad():
+            while not finished and len(sequence) - prompt_length < max_new_tokens:
+                remaining = max_new_tokens - (len(sequence) - prompt_length)
+                # Leave room for the token the main model adds after the accepted drafts
+                draft = self.draft.propose(sequence, min(self.num_draft_tokens, remaining - 1))
+                feed = sequence[cached:] + draft
+                outputs = self.model(input_ids=torch.tensor([feed], dtype=torch.long, device=device),
+                                     past_key_values=past, use_cache=True)
+                past = outputs.past_key_values
+                logits = outputs.logits[0]
+                self.stats["forward_passes"] += 1
+                self.stats["drafted_tokens"] += len(draft)
+
+                base = len(sequence) - 1 - cached  # Row of logits predicting the next token
+                start_length = len(sequence)
+                accepted = 0
+                for i in range(len(draft) + 1):
+                    scores = logits[base + i].unsqueeze(0).float()
+                    ids = torch.tensor([sequence], dtype=torch.long, device=device)
+                    if logits_processor is not None:
+                        scores = logits_processor(ids, scores)
+                    token = int(scores[0].argmax())
+                    sequence.append(token)
+                    ids = torch.tensor([sequence], dtype=torch.long, device=device)
+                    if token == self.eos_token_id or (
+                            stopping_criteria is not None and bool(stopping_criteria(ids, scores).all())):
+                        finished = True
+                        break
+                    if i < len(draft) and token == draft[i]:
+                        accepted += 1
+                        continue
+                    break
+                self.stats["accepted_tokens"] += accepted
+                # The cache holds the verified prefix plus the accepted drafts; the last token is fed next
+                cached = start_length + accepted
+                past = _crop_cache(past, cached)
+
+        self.draft.observe(sequence[prompt_length:])
+        return torch.tensor([sequence], dtype=torch.long, device=device)
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats["acceptance_rate"] = (stats["accepted_tokens"] / stats["drafted_tokens"]
+                                    if stats["drafted_tokens"] else 0.0)
+        return stats
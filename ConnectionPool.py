@@ -0,0 +1,169 @@
+import mysql.connector
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+
+# ===========================
+# Connection Pool Module
+# ===========================
+class ConnectionPool:
+    """Bounded pool of MySQL connections with health checks and recycling"""
+
+    def __init__(self, db_config: Dict, pool_size: int = 5, recycle_seconds: float = 1800,
+                 health_check_interval: float = 30, checkout_timeout: float = 30):
+        self.db_config = db_config
+        self.pool_size = pool_size
+        self.recycle_seconds = recycle_seconds
+        self.health_check_interval = health_check_interval
+        self.checkout_timeout = checkout_timeout
+
+        self._idle = deque()  # (connection, created_at, last_used)
+        self._created_at = {}  # id(connection) -> creation timestamp
+        self._open = 0
+        self._cond = threading.Condition()
+        self.stats = {
+            "checkouts": 0,
+            "checkins": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "connections_created": 0,
+            "connections_recycled": 0,
+            "health_check_failures": 0,
+            "connections_discarded": 0
+        }
+
+    def _create_connection(self):
+        try:
+            connection = mysql.connector.connect(**self.db_config)
+        except mysql.connector.Error as err:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise ConnectionError(f"Database connection failed: {err}")
+
+        with self._cond:
+            self._created_at[id(connection)] = time.monotonic()
+            self.stats["connections_created"] += 1
+        return connection
+
+    def _is_healthy(self, connection) -> bool:
+        try:
+            connection.ping(reconnect=False, attempts=1, delay=0)
+            return True
+        except mysql.connector.Error:
+            return False
+
+    def _discard(self, connection):
+        """Close a connection and free its slot in the pool"""
+        try:
+            connection.close()
+        except mysql.connector.Error:
+            pass
+        with self._cond:
+            self._created_at.pop(id(connection), None)
+            self._open -= 1
+            self._cond.notify()
+
+    def checkout(self):
+        """Borrow a connection, waiting up to checkout_timeout if the pool is exhausted"""
+        deadline = time.monotonic() + self.checkout_timeout
+        waited_since = None
+
+        with self._cond:
+            self.stats["checkouts"] += 1
+            while True:
+                if self._idle:
+                    connection, created_at, last_used = self._idle.pop()
+                    break
+                if self._open < self.pool_size:
+                    self._open += 1
+                    connection = None
+                    break
+
+                if waited_since is None:
+                    waited_since = time.monotonic()
+                    self.stats["waits"] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats["wait_time_total"] += time.monotonic() - waited_since
+                    raise ConnectionError(
+                        f"Connection pool exhausted: no connection available after {self.checkout_timeout}s"
+                    )
+                self._cond.wait(remaining)
+
+            if waited_since is not None:
+                self.stats["wait_time_total"] += time.monotonic() - waited_since
+
+        if connection is None:
+            return self._create_connection()
+
+        now = time.monotonic()
+        # Recycle connections older than recycle_seconds
+        if now - created_at > self.recycle_seconds:
+            with self._cond:
+                self.stats["connections_recycled"] += 1
+            self._replace(connection)
+            return self._create_connection()
+
+        # Only ping connections that have been idle for a while
+        if now - last_used > self.health_check_interval and not self._is_healthy(connection):
+            with self._cond:
+                self.stats["health_check_failures"] += 1
+            self._replace(connection)
+            return self._create_connection()
+
+        return connection
+
+    def _replace(self, connection):
+        """Close a connection but keep its slot reserved for a replacement"""
+        try:
+            connection.close()
+        except mysql.connector.Error:
+            pass
+        with self._cond:
+            self._created_at.pop(id(connection), None)
+
+    def checkin(self, connection, discard: bool = False):
+        """Return a connection to the pool"""
+        with self._cond:
+            self.stats["checkins"] += 1
+
+        if not discard:
+            try:
+                # End the implicit transaction so the next borrower gets a fresh snapshot
+                connection.rollback()
+            except mysql.connector.Error:
+                discard = True
+
+        if discard or not connection.is_connected():
+            with self._cond:
+                self.stats["connections_discarded"] += 1
+            self._discard(connection)
+            return
+
+        with self._cond:
+            created_at = self._created_at.get(id(connection), time.monotonic())
+            self._idle.append((connection, created_at, time.monotonic()))
+            self._cond.notify()
+
+    def close_all(self):
+        """Close all idle connections"""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+        for connection, _, _ in idle:
+            self._discard(connection)
+
+    def get_stats(self) -> Dict:
+        """Return pool usage statistics"""
+        with self._cond:
+            stats = dict(self.stats)
+            stats.update({
+                "pool_size": self.pool_size,
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self._open - len(self._idle)
+            })
+        return stats
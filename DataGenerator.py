@@ -0,0 +1,113 @@
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+# ===========================
+# Synthetic Data Module
+# ===========================
+class SyntheticDataGenerator:
+    """Seeded generator of employee-week rows for employee_activities"""
+
+    # Column order of every generated row
+    COLUMNS = (
+        "employee_id", "full_name", "week_number", "number_of_meetings", "total_sales_rmb",
+        "hours_worked", "activities", "department", "hire_date", "email_address",
+        "job_title", "week_start_date"
+    )
+
+    FIRST_NAMES = ["Wei", "Na", "Tao", "Xia", "Li", "Jun", "Mei", "Hui", "John", "Emily",
+                   "James", "Sarah", "Robert", "Linda", "Michael", "Anna", "David", "Grace"]
+    LAST_NAMES = ["Zhang", "Li", "Huang", "Chen", "Wang", "Liu", "Zhao", "Smith", "Johnson",
+                  "Wilson", "Davis", "Taylor", "Brown", "Miller", "Garcia", "Lee"]
+
+    JOB_TITLES = {
+        "Sales": ["Sales Manager", "Sales Executive", "Sales Associate"],
+        "Marketing": ["Marketing Specialist", "Marketing Manager"],
+        "Product Development": ["Product Manager", "Software Engineer"],
+        "Finance": ["Financial Analyst", "Accountant"],
+        "IT": ["Software Engineer", "Systems Administrator", "Data Analyst"],
+        "Business Development": ["Business Development Manager", "Business Development Associate"]
+    }
+
+    ACTIVITIES = {
+        "Sales": ["Prepared sales reports and client meetings",
+                  "Faced challenges with customer retention; proposed new engagement program"],
+        "Marketing": ["Developed new marketing strategy", "Conducted customer feedback sessions"],
+        "Product Development": ["Planned product roadmap with engineering", "Implemented software updates"],
+        "Finance": ["Analyzed financial reports", "Prepared quarterly budget review"],
+        "IT": ["Implemented software updates", "Resolved infrastructure incidents"],
+        "Business Development": ["Conducted market analysis and identified new business opportunities",
+                                 "Faced challenges with customer retention; proposed new partnership program"]
+    }
+
+    def __init__(self, num_employees: int = 10, num_weeks: int = 10,
+                 department_mix: Optional[Dict[str, float]] = None, seed: Optional[int] = 42,
+                 base_date: datetime = datetime(2024, 8, 1), id_offset: int = 100):
+        self.num_employees = num_employees
+        self.num_weeks = num_weeks
+        self.department_mix = department_mix or {dept: 1.0 for dept in self.JOB_TITLES}
+        self.seed = seed
+        self.base_date = base_date
+        self.id_offset = id_offset
+
+    @property
+    def total_rows(self) -> int:
+        return self.num_employees * self.num_weeks
+
+    @classmethod
+    def insert_statement(cls, table: str = "employee_activities") -> str:
+        """Parameterized INSERT matching the generated row layout"""
+        placeholders = ", ".join(["%s"] * len(cls.COLUMNS))
+        return f"INSERT INTO {table} ({', '.join(cls.COLUMNS)}) VALUES ({placeholders})"
+
+    def employees(self, rng: random.Random) -> Iterator[Dict]:
+        """Yield the static attributes of each generated employee"""
+        departments = list(self.department_mix)
+        weights = [self.department_mix[dept] for dept in departments]
+        hire_start = datetime(2018, 1, 1)
+        hire_span_days = (self.base_date - hire_start).days
+
+        for i in range(self.num_employees):
+            department = rng.choices(departments, weights)[0]
+            first, last = rng.choice(self.FIRST_NAMES), rng.choice(self.LAST_NAMES)
+            emp_no = self.id_offset + i
+            yield {
+                "id": f"E{emp_no:03d}",
+                "name": f"{first} {last}",
+                "department": department,
+                "job_title": rng.choice(self.JOB_TITLES.get(department, ["Associate"])),
+                "email": f"{first.lower()}.{last.lower()}{emp_no}@example.com",
+                "hire_date": (hire_start + timedelta(days=rng.randrange(hire_span_days))).date(),
+                "activities": self.ACTIVITIES.get(department, ["General duties"])
+            }
+
+    def rows(self) -> Iterator[Tuple]:
+        """Yield one row per employee and week, in COLUMNS order"""
+        rng = random.Random(self.seed)
+        week_starts = [(self.base_date + timedelta(weeks=week - 1)).date()
+                       for week in range(1, self.num_weeks + 1)]
+
+        for emp in self.employees(rng):
+            activities = emp["activities"]
+            for week, week_start in enumerate(week_starts, start=1):
+                # rng.random() arithmetic is noticeably cheaper than randint/uniform at this volume
+                yield (
+                    emp["id"], emp["name"], week,
+                    5 + int(rng.random() * 16),
+                    round(1000.0 + rng.random() * 49000.0, 2),
+                    round(30.0 + rng.random() * 20.0, 2),
+                    activities[int(rng.random() * len(activities))],
+                    emp["department"], emp["hire_date"], emp["email"], emp["job_title"], week_start
+                )
+
+    def batches(self, batch_size: int) -> Iterator[List[Tuple]]:
+        """Yield rows grouped into lists of at most batch_size"""
+        batch = []
+        for row in self.rows():
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
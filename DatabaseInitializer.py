@@ -1,48 +1,92 @@
 import mysql.connector
 from datetime import datetime, timedelta
+import argparse
+import itertools
+import os
 import random
+import tempfile
+import time
+from typing import Dict, Iterable, Optional, Tuple
+from DataGenerator import SyntheticDataGenerator
+from SchemaMigrator import SchemaMigrator
 
 
 class DatabaseInitializer:
     def __init__(self, config):
         self.config = config.DB_CONFIG
+        self.synthetic_config = getattr(config, "SYNTHETIC_DATA", {})
         self.connection = None
 
-    def connect(self):
-        self.connection = mysql.connector.connect(**self.config)
+    def connect(self, allow_local_infile: bool = False, use_database: bool = True):
+        params = dict(self.config)
+        if allow_local_infile:
+            params["allow_local_infile"] = True
+        if not use_database:
+            params.pop("database", None)
+        self.connection = mysql.connector.connect(**params)
         return self.connection.cursor()
 
     def close(self):
         if self.connection and self.connection.is_connected():
             self.connection.close()
 
+    def _open_database(self, allow_local_infile: bool = False):
+        """Connect to the server, creating and selecting the database if it does not exist yet"""
+        database = self.config.get("database", "employee_activity_tracking")
+        cursor = self.connect(allow_local_infile=allow_local_infile, use_database=False)
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {database}")
+        cursor.execute(f"USE {database}")
+        return cursor
+
+    def ensure_schema(self) -> Dict:
+        """Apply pending migrations and seed the table only if it is empty; never drops data"""
+        load_method = self.synthetic_config.get("load_method", "executemany")
+        cursor = self._open_database(allow_local_infile=load_method == "infile")
+        try:
+            migrator = SchemaMigrator(self.connection)
+            applied = migrator.migrate(sync_indexes=False)
+
+            cursor.execute("SELECT EXISTS(SELECT 1 FROM employee_activities)")
+            seeded = not cursor.fetchone()[0]
+            if seeded:
+                self.seed_data(cursor, load_method)
+                self.bump_data_version(cursor)
+                self.connection.commit()
+
+            # Indexes are built after any load; building them once is cheaper than maintaining them per row
+            migrator.sync_indexes()
+        finally:
+            cursor.close()
+            self.close()
+
+        if applied:
+            print(f"Applied schema migrations: {applied}")
+        if seeded:
+            print("Empty employee_activities table seeded with synthetic data")
+        return {"applied_migrations": applied, "seeded": seeded}
+
     def initialize_database(self):
-        cursor = self.connect()
+        """Destructive reseed: drop employee_activities, replay all migrations and reload data"""
+        load_method = self.synthetic_config.get("load_method", "executemany")
+        cursor = self._open_database(allow_local_infile=load_method == "infile")
 
-        cursor.execute("CREATE DATABASE IF NOT EXISTS employee_activity_tracking")
-        cursor.execute("USE employee_activity_tracking")
+        # data_versions is kept so its counter keeps increasing across reseeds
         cursor.execute("DROP TABLE IF EXISTS employee_activities")
+        cursor.execute("DROP TABLE IF EXISTS schema_migrations")
+        migrator = SchemaMigrator(self.connection)
+        migrator.migrate(sync_indexes=False)
 
-        create_table_query = """
-                             CREATE TABLE employee_activities \
-                             ( \
-                                 record_id          INT AUTO_INCREMENT PRIMARY KEY, \
-                                 employee_id        VARCHAR(20)  NOT NULL, \
-                                 full_name          VARCHAR(100) NOT NULL, \
-                                 week_number        INT          NOT NULL, \
-                                 number_of_meetings INT            DEFAULT 0, \
-                                 total_sales_rmb    DECIMAL(10, 2) DEFAULT 0.0, \
-                                 hours_worked       DECIMAL(5, 2)  DEFAULT 0.0, \
-                                 activities         TEXT, \
-                                 department         VARCHAR(50), \
-                                 hire_date          DATE, \
-                                 email_address      VARCHAR(100), \
-                                 job_title          VARCHAR(100), \
-                                 week_start_date    DATE
-                             ) \
-                             """
-        cursor.execute(create_table_query)
+        self.seed_data(cursor, load_method)
+        migrator.sync_indexes()
+        self.bump_data_version(cursor)
 
+        self.connection.commit()
+        cursor.close()
+        self.close()
+        print("Database initialized with synthetic data including Business Development department")
+
+    def seed_data(self, cursor, load_method: str = "executemany"):
+        """Load the curated employees plus any configured generated employees"""
         # Create Business Development department data
         departments = ["Sales", "Marketing", "Product Development", "Finance", "IT", "Business Development"]
         job_titles = ["Sales Manager", "Data Analyst", "Marketing Specialist", "Product Manager",
@@ -59,7 +103,8 @@ class DatabaseInitializer:
              "hire_date": "2021-03-22"}
         ]
 
-        # Insert data for each employee and week
+        # Build rows for each employee and week, then load them in batches
+        rows = []
         for week in range(1, 11):
             week_start = base_date + timedelta(weeks=week - 1)
             for emp in employees:
@@ -73,20 +118,121 @@ class DatabaseInitializer:
                 else:
                     activities = "Conducted market analysis and identified new business opportunities"
 
-                insert_query = """
-                               INSERT INTO employee_activities (employee_id, full_name, week_number, number_of_meetings, \
-                                                                total_sales_rmb, \
-                                                                hours_worked, activities, department, hire_date, \
-                                                                email_address, job_title, week_start_date) \
-                               VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) \
-                               """
-                values = (
+                rows.append((
                     emp["id"], emp["name"], week, meetings, sales, hours, activities,
                     emp["department"], emp["hire_date"], emp["email"], emp["job_title"], week_start
+                ))
+        self.bulk_load(cursor, rows, method="executemany")
+
+        # Optional generated employees on top of the curated ones
+        if self.synthetic_config.get("num_employees", 0) > 0:
+            self.bulk_load(cursor, self.create_generator().rows(), method=load_method)
+
+    def create_generator(self, num_employees: Optional[int] = None,
+                         num_weeks: Optional[int] = None) -> SyntheticDataGenerator:
+        """Build a seeded generator from SYNTHETIC_DATA, with optional size overrides"""
+        return SyntheticDataGenerator(
+            num_employees=num_employees if num_employees is not None else self.synthetic_config.get("num_employees", 0),
+            num_weeks=num_weeks if num_weeks is not None else self.synthetic_config.get("num_weeks", 10),
+            department_mix=self.synthetic_config.get("department_mix"),
+            seed=self.synthetic_config.get("seed", 42)
+        )
+
+    def bulk_load(self, cursor, rows: Iterable[Tuple], method: str = "executemany",
+                  batch_size: Optional[int] = None) -> int:
+        """Load rows into employee_activities with batched executemany or LOAD DATA LOCAL INFILE"""
+        batch_size = batch_size or self.synthetic_config.get("batch_size", 5000)
+        if method == "infile":
+            try:
+                return self._load_infile(cursor, rows, batch_size)
+            except mysql.connector.Error as err:
+                # The rows iterator is already consumed, so there is no silent fallback
+                self.connection.rollback()
+                raise RuntimeError(
+                    f"LOAD DATA LOCAL INFILE failed ({err}); check that local_infile is enabled "
+                    f"on the server or use load_method='executemany'"
                 )
-                cursor.execute(insert_query, values)
 
-        self.connection.commit()
-        cursor.close()
-        self.close()
-        print("Database initialized with synthetic data including Business Development department")
\ No newline at end of file
+        insert_query = SyntheticDataGenerator.insert_statement()
+        loaded = 0
+        rows = iter(rows)
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            # mysql-connector rewrites this into a single multi-row INSERT per batch
+            cursor.executemany(insert_query, batch)
+            self.connection.commit()
+            loaded += len(batch)
+        return loaded
+
+    def _load_infile(self, cursor, rows: Iterable[Tuple], batch_size: int) -> int:
+        """Write rows to a temporary TSV file and load it in one LOAD DATA statement"""
+        loaded = 0
+        fd, path = tempfile.mkstemp(prefix="employee_activities_", suffix=".tsv")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as f:
+                lines = []
+                for row in rows:
+                    lines.append("\t".join(self._tsv_value(v) for v in row))
+                    if len(lines) >= batch_size:
+                        f.write("\n".join(lines) + "\n")
+                        loaded += len(lines)
+                        lines = []
+                if lines:
+                    f.write("\n".join(lines) + "\n")
+                    loaded += len(lines)
+
+            cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE employee_activities "
+                f"CHARACTER SET utf8mb4 FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' "
+                f"({', '.join(SyntheticDataGenerator.COLUMNS)})",
+                (path,)
+            )
+            self.connection.commit()
+            return loaded
+        finally:
+            os.remove(path)
+
+    @staticmethod
+    def _tsv_value(value) -> str:
+        if value is None:
+            return "\\N"
+        text = str(value)
+        if isinstance(value, str):
+            text = text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+        return text
+
+    def bump_data_version(self, cursor, table_name: str = "employee_activities"):
+        """Increment the table's data version so cached query results are invalidated"""
+        cursor.execute(
+            "INSERT INTO data_versions (table_name, version) VALUES (%s, 1) "
+            "ON DUPLICATE KEY UPDATE version = version + 1",
+            (table_name,)
+        )
+
+
+if __name__ == "__main__":
+    from employee_config import Config
+
+    parser = argparse.ArgumentParser(description="Bulk load generated employee_activities rows")
+    parser.add_argument("--employees", type=int, default=1000)
+    parser.add_argument("--weeks", type=int, default=10)
+    parser.add_argument("--method", choices=["executemany", "infile"], default="executemany")
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+
+    initializer = DatabaseInitializer(Config())
+    generator = initializer.create_generator(args.employees, args.weeks)
+    cursor = initializer.connect(allow_local_infile=args.method == "infile")
+    cursor.execute(f"USE {initializer.config['database']}")
+
+    start = time.time()
+    loaded = initializer.bulk_load(cursor, generator.rows(), method=args.method, batch_size=args.batch_size)
+    initializer.bump_data_version(cursor)
+    initializer.connection.commit()
+    elapsed = time.time() - start
+
+    cursor.close()
+    initializer.close()
+    print(f"Loaded {loaded} rows in {elapsed:.1f}s ({loaded / max(elapsed, 1e-9):,.0f} rows/s)")
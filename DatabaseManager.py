@@ -2,16 +2,160 @@ import mysql.connector
 import os
 import re
 import json
+import logging
+import time
+from collections import deque
 from datetime import datetime, timedelta
-from typing import List, Dict, Union, Tuple
+from typing import List, Dict, Union, Tuple, Iterator, Optional, Callable
+from ConnectionPool import ConnectionPool
+from ResultCache import ResultCache
+from QueryGuard import QueryGuard
+from DataGenerator import SyntheticDataGenerator
 
 # ===========================
 # Database Module
 # ===========================
+class _RowCursor:
+    """Cursor-like view over already materialized rows (used for cache hits)"""
+
+    def __init__(self, columns: List[str], rows: List[Dict]):
+        self.description = [(col,) for col in columns]
+        self._rows = rows
+        self._pos = 0
+
+    def fetchmany(self, size: int) -> List[Dict]:
+        rows = self._rows[self._pos:self._pos + size]
+        self._pos += len(rows)
+        return rows
+
+    def close(self):
+        pass
+
+
+class ResultStream:
+    """Rows of a SELECT fetched in batches from an unbuffered cursor, capped at max_rows"""
+
+    def __init__(self, cursor, on_close: Callable[[bool], None], max_rows: Optional[int], batch_size: int,
+                 on_complete: Optional[Callable[[List[str], List[Dict]], None]] = None):
+        self.columns = [col[0] for col in cursor.description]
+        self.max_rows = max_rows
+        self.batch_size = batch_size
+        self.rowcount = 0
+        self.truncated = False
+        self.exhausted = False
+        self._cursor = cursor
+        self._on_close = on_close
+        self._on_complete = on_complete
+        self._seen = [] if on_complete else None
+        self._closed = False
+
+    @classmethod
+    def from_rows(cls, columns: List[str], rows: List[Dict], max_rows: Optional[int], batch_size: int):
+        """Build a stream over rows that are already in memory"""
+        return cls(_RowCursor(columns, rows), on_close=lambda discard: None,
+                   max_rows=max_rows, batch_size=batch_size)
+
+    def batches(self) -> Iterator[List[Dict]]:
+        """Yield lists of rows until the result set ends or the row cap is hit"""
+        try:
+            while not self._closed:
+                size = self.batch_size
+                if self.max_rows is not None:
+                    # Ask for one row past the cap so truncation can be detected
+                    size = min(size, self.max_rows - self.rowcount + 1)
+
+                rows = self._cursor.fetchmany(size)
+                if not rows:
+                    self.exhausted = True
+                    break
+
+                if self.max_rows is not None and self.rowcount + len(rows) > self.max_rows:
+                    rows = rows[:self.max_rows - self.rowcount]
+                    self.truncated = True
+
+                self.rowcount += len(rows)
+                if self._seen is not None:
+                    self._seen.extend(rows)
+                if rows:
+                    yield rows
+                if self.truncated:
+                    break
+        finally:
+            self.close()
+
+    def __iter__(self) -> Iterator[Dict]:
+        for batch in self.batches():
+            yield from batch
+
+    def fetch_all(self) -> List[Dict]:
+        """Collect the (capped) rows into a list"""
+        return list(self)
+
+    def close(self):
+        """Release the connection; unread rows force the connection to be discarded"""
+        if self._closed:
+            return
+        self._closed = True
+        discard = not self.exhausted
+        if not discard:
+            self._cursor.close()
+        self._on_close(discard)
+
+        # Only complete, untruncated results are handed on (e.g. to the result cache)
+        if self._on_complete and self.exhausted and not self.truncated:
+            self._on_complete(self.columns, self._seen)
+        self._seen = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
 class DatabaseManager:
     def __init__(self, config):
         self.config = config
         self.connection = None
+        self.pool = None
+
+        pool_config = getattr(config, "DB_POOL_CONFIG", {})
+        if pool_config.get("enabled"):
+            self.pool = ConnectionPool(
+                config.DB_CONFIG,
+                pool_size=pool_config.get("pool_size", 5),
+                recycle_seconds=pool_config.get("recycle_seconds", 1800),
+                health_check_interval=pool_config.get("health_check_interval", 30),
+                checkout_timeout=pool_config.get("checkout_timeout", 30)
+            )
+
+        self.result_cache = None
+        self.version_check_interval = 0
+        self._version_checked_at = None
+        cache_config = getattr(config, "RESULT_CACHE", {})
+        if cache_config.get("enabled"):
+            self.result_cache = ResultCache(
+                max_bytes=cache_config.get("max_bytes", 32 * 1024 * 1024),
+                ttl_seconds=cache_config.get("ttl_seconds", 300)
+            )
+            self.version_check_interval = cache_config.get("version_check_interval", 5)
+
+        explain_config = getattr(config, "EXPLAIN_CAPTURE", {})
+        self.explain_enabled = explain_config.get("enabled", False)
+        self.explain_log = deque(maxlen=explain_config.get("history_size", 200))
+        self.logger = logging.getLogger(__name__)
+
+        self.guard = None
+        guard_config = getattr(config, "QUERY_GUARD", {})
+        if guard_config.get("enabled"):
+            self.guard = QueryGuard(
+                config.DB_CONFIG,
+                max_rows_examined=guard_config.get("max_rows_examined", 1_000_000),
+                on_over_budget=guard_config.get("on_over_budget", "limit"),
+                auto_limit=guard_config.get("auto_limit", config.MAX_RESULT_ROWS),
+                max_execution_ms=guard_config.get("max_execution_ms", 10000),
+                kill_grace_seconds=guard_config.get("kill_grace_seconds", 2.0)
+            )
 
     def connect(self):
         """Establish database connection"""
@@ -26,23 +170,197 @@ class DatabaseManager:
         if self.connection and self.connection.is_connected():
             self.connection.close()
 
+    def _checkout(self):
+        """Get a connection from the pool, or open a new one in unpooled mode"""
+        if self.pool:
+            return self.pool.checkout()
+        try:
+            return mysql.connector.connect(**self.config.DB_CONFIG)
+        except mysql.connector.Error as err:
+            raise ConnectionError(f"Database connection failed: {err}")
+
+    def _checkin(self, connection, discard: bool = False):
+        """Return a connection to the pool, or close it in unpooled mode"""
+        if discard:
+            # Drop the socket without draining unread rows from the server
+            try:
+                connection.shutdown()
+            except mysql.connector.Error:
+                pass
+        if self.pool:
+            self.pool.checkin(connection, discard=discard)
+        elif connection.is_connected():
+            connection.close()
+
+    def get_pool_stats(self) -> Dict:
+        """Get connection pool statistics (checkouts, waits, connections created)"""
+        if not self.pool:
+            return {"enabled": False}
+        return {"enabled": True, **self.pool.get_stats()}
+
+    def get_cache_stats(self) -> Dict:
+        """Get result cache hit/miss metrics"""
+        if not self.result_cache:
+            return {"enabled": False}
+        return {"enabled": True, **self.result_cache.get_stats()}
+
+    def invalidate_cache(self):
+        """Drop all cached results, e.g. after reloading employee_activities in-process"""
+        if self.result_cache:
+            self.result_cache.invalidate()
+        self._version_checked_at = None
+
+    def _refresh_data_version(self):
+        """Re-read the employee_activities data version at most every version_check_interval seconds"""
+        now = time.monotonic()
+        if self._version_checked_at is not None and now - self._version_checked_at < self.version_check_interval:
+            return
+        self._version_checked_at = now
+
+        connection = self._checkout()
+        cursor = connection.cursor()
+        try:
+            cursor.execute(
+                "SELECT version FROM data_versions WHERE table_name = 'employee_activities'"
+            )
+            row = cursor.fetchone()
+            version = row[0] if row else None
+        except mysql.connector.Error:
+            # Older databases have no data_versions table; rely on the TTL alone
+            version = None
+        finally:
+            cursor.close()
+            self._checkin(connection)
+        self.result_cache.set_version(version)
+
+    def _get_cached(self, query: str) -> Optional[Dict]:
+        if not self.result_cache or not self._is_select(query):
+            return None
+        self._refresh_data_version()
+        return self.result_cache.get(query)
+
+    def _explain(self, connection, query: str) -> Optional[Dict]:
+        """Capture the EXPLAIN plan of a SELECT on the given connection and flag full table scans"""
+        if not self._is_select(query):
+            return None
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute(f"EXPLAIN {query.strip().rstrip(';')}")
+            plan = cursor.fetchall()
+        except mysql.connector.Error:
+            # Let the real execution report the error
+            return None
+        finally:
+            cursor.close()
+
+        # Nested-loop estimate: each table is probed once per row surviving the tables before it
+        rows_examined, fanout = 0.0, 1.0
+        for row in plan:
+            rows = float(row.get("rows") or 1)
+            rows_examined += fanout * rows
+            fanout *= rows * float(row.get("filtered") or 100.0) / 100.0
 
-    def execute_query(self, query: str) -> Dict:
+        entry = {
+            "sql": query,
+            "plan": plan,
+            "full_scan_tables": [row.get("table") for row in plan if row.get("type") == "ALL"],
+            "rows_examined": int(rows_examined),
+            "rows_estimated": int(fanout),
+            "captured_at": time.time()
+        }
+        # Plans taken only for the cost guard are not captured
+        if not self.explain_enabled:
+            return entry
+        self.explain_log.append(entry)
+        if entry["full_scan_tables"]:
+            self.logger.warning(
+                f"Full table scan on {', '.join(entry['full_scan_tables'])} "
+                f"(~{entry['rows_examined']} rows examined): {query}"
+            )
+        return entry
+
+    def get_guard_stats(self) -> Dict:
+        """Get cost guard counters (allowed, limited, rejected, killed)"""
+        if not self.guard:
+            return {"enabled": False}
+        return {"enabled": True, **self.guard.get_stats()}
+
+    def get_explain_log(self, full_scans_only: bool = False) -> List[Dict]:
+        """Return captured EXPLAIN entries, oldest first"""
+        entries = list(self.explain_log)
+        if full_scans_only:
+            entries = [entry for entry in entries if entry["full_scan_tables"]]
+        return entries
+
+    @staticmethod
+    def _is_select(query: str) -> bool:
+        return query.lstrip().upper().startswith("SELECT")
+
+    def dispose(self):
+        """Close all pooled connections"""
+        if self.pool:
+            self.pool.close_all()
+
+    def _prepare(self, connection, query: str, timeout: Optional[float]) -> Tuple[str, Optional[Dict]]:
+        """EXPLAIN the statement and run it past the cost guard; returns (sql_to_run, guard decision).
+        Without EXPLAIN capture or the guard the statement goes straight through."""
+        if not self._is_select(query) or not (self.explain_enabled or self.guard):
+            return query, None
+        plan = self._explain(connection, query)
+        if not self.guard:
+            return query, None
+        decision = self.guard.check(query, plan, timeout)
+        return decision["sql"], decision
+
+    def _timeout_message(self, watchdog, err) -> str:
+        if watchdog and watchdog.fired:
+            return f"Database error: query cancelled after {watchdog.timeout:.1f}s (KILL QUERY)"
+        if getattr(err, "errno", None) == 3024:
+            return f"Database error: query exceeded its execution time budget ({err})"
+        return f"Database error: {err}"
+
+    @staticmethod
+    def _timed_out(watchdog, err) -> bool:
+        """The statement was stopped for time rather than rejected by the server"""
+        return bool(watchdog and watchdog.fired) or getattr(err, "errno", None) == 3024
+
+    def execute_query(self, query: str, timeout: Optional[float] = None) -> Dict:
         """Execute SQL query and return structured results"""
-        cursor = self.connect()
+        cached = self._get_cached(query)
+        if cached:
+            return {**cached, "data": list(cached["data"]), "cached": True}
+
+        connection = self._checkout()
+        sql, decision = self._prepare(connection, query, timeout)
+        if decision and decision["action"] == "reject":
+            self._checkin(connection)
+            return {
+                "status": "error",
+                "message": decision["reason"],
+                "sql": query
+            }
+
+        watchdog = self.guard.watchdog(connection, decision["timeout"]) if decision else None
+        cursor = connection.cursor(dictionary=True)
         try:
-            cursor.execute(query)
+            cursor.execute(sql)
 
             # For SELECT queries, return results
             if cursor.description:
                 results = cursor.fetchall()
-                return {
+                result = {
                     "status": "success",
                     "type": "data",
                     "columns": [col[0] for col in cursor.description],
                     "data": results,
                     "rowcount": cursor.rowcount
                 }
+                if decision and decision["action"] == "limit":
+                    # A guard-limited result is partial, so it is flagged and never cached
+                    result.update({"truncated": True, "guard": decision["reason"]})
+                elif self.result_cache and self._is_select(query):
+                    self.result_cache.put(query, result)
+                return result
             # For other queries, return rowcount
             return {
                 "status": "success",
@@ -53,17 +371,114 @@ class DatabaseManager:
         except mysql.connector.Error as err:
             return {
                 "status": "error",
-                "message": f"Database error: {err}",
-                "sql": query
+                "message": self._timeout_message(watchdog, err),
+                "sql": query,
+                "timed_out": self._timed_out(watchdog, err)
             }
         finally:
+            if watchdog:
+                watchdog.cancel()
             cursor.close()
-            self.close()
+            self._checkin(connection, discard=bool(watchdog and watchdog.fired))
+
+    def execute_query_stream(self, query: str, max_rows: Optional[int] = None,
+                             batch_size: Optional[int] = None, timeout: Optional[float] = None) -> Dict:
+        """Execute SQL query and return a lazily fetched, row-capped ResultStream as data"""
+        max_rows = self.config.MAX_RESULT_ROWS if max_rows is None else max_rows
+        batch_size = batch_size or getattr(self.config, "STREAM_BATCH_SIZE", 50)
+
+        cached = self._get_cached(query)
+        if cached:
+            stream = ResultStream.from_rows(cached["columns"], cached["data"], max_rows, batch_size)
+            return {
+                "status": "success",
+                "type": "stream",
+                "columns": stream.columns,
+                "data": stream,
+                "cached": True
+            }
+
+        connection = self._checkout()
+        sql, decision = self._prepare(connection, query, timeout)
+        if decision and decision["action"] == "reject":
+            self._checkin(connection)
+            return {
+                "status": "error",
+                "message": decision["reason"],
+                "sql": query
+            }
+
+        # The watchdog covers execution and fetching; it is cancelled when the stream closes
+        watchdog = self.guard.watchdog(connection, decision["timeout"]) if decision else None
+        cursor = connection.cursor(dictionary=True, buffered=False)
+        try:
+            cursor.execute(sql)
+        except mysql.connector.Error as err:
+            if watchdog:
+                watchdog.cancel()
+            cursor.close()
+            self._checkin(connection, discard=bool(watchdog and watchdog.fired))
+            return {
+                "status": "error",
+                "message": self._timeout_message(watchdog, err),
+                "sql": query,
+                "timed_out": self._timed_out(watchdog, err)
+            }
+
+        # Non-SELECT statements have nothing to stream
+        if not cursor.description:
+            if watchdog:
+                watchdog.cancel()
+            rowcount = cursor.rowcount
+            cursor.close()
+            self._checkin(connection, discard=bool(watchdog and watchdog.fired))
+            return {
+                "status": "success",
+                "type": "operation",
+                "rowcount": rowcount,
+                "message": f"Operation affected {rowcount} rows"
+            }
+
+        def cache_result(columns, rows):
+            self.result_cache.put(query, {
+                "status": "success",
+                "type": "data",
+                "columns": columns,
+                "data": rows,
+                "rowcount": len(rows)
+            })
+
+        limited = bool(decision and decision["action"] == "limit")
+        cacheable = self.result_cache and self._is_select(query) and not limited
+        on_complete = cache_result if cacheable else None
+
+        def on_close(discard):
+            if watchdog:
+                watchdog.cancel()
+            self._checkin(connection, discard=discard or bool(watchdog and watchdog.fired))
+
+        stream = ResultStream(
+            cursor,
+            on_close=on_close,
+            max_rows=max_rows,
+            batch_size=batch_size,
+            on_complete=on_complete
+        )
+        result = {
+            "status": "success",
+            "type": "stream",
+            "columns": stream.columns,
+            "data": stream
+        }
+        if limited:
+            result["guard"] = decision["reason"]
+        return result
 
     def get_table_info(self) -> Dict:
         """Get database table metadata"""
+        connection = self._checkout()
+        cursor = connection.cursor(dictionary=True)
         try:
-            cursor = self.connect()
             cursor.execute("DESCRIBE employee_activities")
             return {
                 "status": "success",
@@ -74,7 +489,7 @@ class DatabaseManager:
             return {"status": "error", "message": str(err)}
         finally:
             cursor.close()
-            self.close()
+            self._checkin(connection)
 
     # Add to
     def initialize_database(self):
@@ -129,33 +544,13 @@ class DatabaseManager:
                            """)
 
             # Generate synthetic data for 10 employees × 10 weeks
-            departments = ["Sales", "Marketing", "Product Development", "Finance", "IT"]
-            job_titles = ["Sales Manager", "Data Analyst", "Marketing Specialist",
-                          "Product Manager", "Software Engineer", "Accountant"]
-
-            for emp_id in range(1, 11):
-                for week in range(1, 11):
-                    cursor.execute(f"""
-                    INSERT INTO employee_activities (
-                        employee_id, full_name, week_number, number_of_meetings,
-                        total_sales_rmb, hours_worked, activities, department,
-                        hire_date, email_address, job_title, week_start_date
-                    ) VALUES (
-                        'E{emp_id:03d}', 
-                        'Employee {emp_id}', 
-                        {week},
-                        {random.randint(5, 20)},
-                        {random.uniform(1000, 50000):.2f},
-                        {random.uniform(30.0, 50.0):.2f},
-                        'Prepared sales reports and client meetings',
-                        '{random.choice(departments)}',
-                        DATE_SUB(NOW(), INTERVAL {random.randint(1, 5)} YEAR),
-                        'employee{emp_id}@company.com',
-                        '{random.choice(job_titles)}',
-                        DATE_ADD('2024-01-01', INTERVAL {week - 1} WEEK)
-                    )
-                    """)
+            generator = SyntheticDataGenerator(
+                num_employees=10, num_weeks=10, seed=None,
+                base_date=datetime(2024, 1, 1), id_offset=1
+            )
+            cursor.executemany(SyntheticDataGenerator.insert_statement(), list(generator.rows()))
             self.connection.commit()
+            self.invalidate_cache()
             return {"status": "success", "message": "Database initialized"}
         except mysql.connector.Error as err:
             return {"status": "error", "message": str(err)}
\ No newline at end of file
@@ -0,0 +1,38 @@
+import time
+from typing import Optional
+
+
+# ===========================
+# Request Deadline Module
+# ===========================
+class DeadlineExceeded(Exception):
+    """Raised when a stage cannot finish before the request's deadline"""
+
+
+class Deadline:
+    """Point in time a request must be answered by, measured on the monotonic clock.
+    None seconds means unbounded: remaining() is then None and expired() is always False."""
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.seconds = seconds
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self) -> Optional[float]:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def reserve(self, seconds: float) -> "Deadline":
+        """Earlier deadline for one stage, keeping `seconds` for the stages after it"""
+        stage = Deadline()
+        if self.expires_at is not None:
+            stage.expires_at = self.expires_at - seconds
+            stage.seconds = max(0.0, stage.expires_at - time.monotonic())
+        return stage
+
+    def __repr__(self) -> str:
+        remaining = self.remaining()
+        return "Deadline(unbounded)" if remaining is None else f"Deadline({remaining:.2f}s left)"
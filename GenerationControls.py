@@ -0,0 +1,165 @@
+import re
+from typing import Optional, Tuple
+
+import torch
+from transformers import LogitsProcessor, StoppingCriteria
+
+
+# ===========================
+# Generation Controls Module
+# ===========================
+# Imported only once a real model is generating, like torch/transformers themselves.
+
+_HAS_SQL_RE = re.compile(r"\bSELECT\b[\s\S]*\bFROM\b\s*\w", re.IGNORECASE)
+# Lines a model tends to continue with after the SQL is done
+_NON_SQL_LINE_RE = re.compile(r"\s*(?:(?:question|explanation|note|answer|output|result)\b|#)", re.IGNORECASE)
+
+
+def statement_end(text: str) -> Optional[Tuple[int, str]]:
+    """Return (index just past the first complete SQL statement, reason), or None if it is still open.
+    Ends on ";" outside quotes, a closing code fence, or a newline followed by a blank or non-SQL line."""
+    quote = None
+    depth = 0
+    for i, ch in enumerate(text):
+        if quote:
+            if ch == quote:
+                quote = None
+            continue
+        if ch in "'\"":
+            quote = ch
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == ";":
+            return i + 1, "semicolon"
+        elif ch == "`" and text.startswith("```", i) and _HAS_SQL_RE.search(text[:i]):
+            return i, "fence"
+        elif ch == "\n" and depth <= 0 and _HAS_SQL_RE.search(text[:i]):
+            rest = text[i + 1:]
+            if rest.startswith("\n") or _NON_SQL_LINE_RE.match(rest):
+                return i, "newline"
+    return None
+
+
+def trim_to_statement(text: str) -> str:
+    """Drop whatever was generated after the first complete statement"""
+    end = statement_end(text)
+    return text[:end[0]] if end else text
+
+
+class SQLStatementStop(StoppingCriteria):
+    """Stops each sequence as soon as its completion holds a complete SQL statement"""
+
+    # The completion is only re-scanned when the newest token could have closed the statement.
+    # A newline closes it only once the next line shows it is not SQL, so rows whose last
+    # newline has been followed by nothing but whitespace are re-scanned on every token.
+    TRIGGERS = (";", "`", "\n")
+
+    def __init__(self, tokenizer, prompt_length: int):
+        self.tokenizer = tokenizer
+        self.prompt_length = prompt_length
+        self.reasons = {}  # row -> why it stopped
+        self._pending_newline = set()  # rows waiting for the line after a newline
+
+    def __call__(self, input_ids: torch.LongTensor, scores, **kwargs) -> torch.BoolTensor:
+        done = []
+        for row, ids in enumerate(input_ids):
+            if row not in self.reasons:
+                last = self.tokenizer.decode(ids[-1:], skip_special_tokens=True)
+                if row in self._pending_newline or any(trigger in last for trigger in self.TRIGGERS):
+                    end = statement_end(self.tokenizer.decode(ids[self.prompt_length:], skip_special_tokens=True))
+                    if end:
+                        self.reasons[row] = end[1]
+                if "\n" in last:
+                    self._pending_newline.add(row)
+                elif last.strip():
+                    self._pending_newline.discard(row)
+            done.append(row in self.reasons)
+        return torch.tensor(done, dtype=torch.bool, device=input_ids.device)
+
+
+class DeadlineStop(StoppingCriteria):
+    """Stops every sequence once the request's Deadline has passed"""
+
+    def __init__(self, deadline):
+        self.deadline = deadline
+        self.fired = False
+
+    def __call__(self, input_ids: torch.LongTensor, scores, **kwargs) -> torch.BoolTensor:
+        if self.deadline.expired():
+            self.fired = True
+        return torch.full((input_ids.shape[0],), self.fired, dtype=torch.bool, device=input_ids.device)
+
+
+class SQLGrammarLogitsProcessor(LogitsProcessor):
+    """Masks every token that would take the completion outside SQLGrammar.
+    Candidates are checked in score order, so a step usually costs only a few grammar checks,
+    and each check resumes from the row's parse state instead of re-reading the completion."""
+
+    def __init__(self, tokenizer, grammar, prompt_length: int, top_k: int = 100, keep: int = 1):
+        self.tokenizer = tokenizer
+        self.grammar = grammar
+        self.prompt_length = prompt_length
+        self.top_k = top_k
+        self.keep = keep  # Allowed tokens kept per step; 1 is enough for greedy decoding
+        self.eos_token_id = tokenizer.eos_token_id
+        self._token_text = {}
+        self._rows = {}  # row -> (completion, grammar state of it) as of the previous step
+        self.stats = {"steps": 0, "rejected_candidates": 0, "dead_ends": 0, "unconstrained_steps": 0}
+
+    def _text_of(self, token_id: int) -> str:
+        text = self._token_text.get(token_id)
+        if text is None:
+            text = self.tokenizer.decode([token_id], skip_special_tokens=True)
+            self._token_text[token_id] = text
+        return text
+
+    def _state_of(self, row: int, completion: str):
+        """Grammar state of the row's completion, advanced from the previous step's state"""
+        previous = self._rows.get(row)
+        if previous is not None and completion.startswith(previous[0]):
+            # A prefix that can never parse stays that way
+            state = None if previous[1] is None else self.grammar.parse(completion, resume=previous[1])
+        else:
+            state = self.grammar.parse(completion)
+        self._rows[row] = (completion, state)
+        return state
+
+    def _allowed(self, completion: str, state, token_id: int) -> bool:
+        if state is None:
+            return False
+        if token_id == self.eos_token_id:
+            return self.grammar.is_complete(completion, resume=state)
+        piece = self._text_of(token_id)
+        # Empty or partial-UTF-8 pieces are never part of a valid statement here
+        return (bool(piece) and "\ufffd" not in piece
+                and self.grammar.is_viable_prefix(completion + piece, resume=state))
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        for row in range(input_ids.shape[0]):
+            self.stats["steps"] += 1
+            completion = self.tokenizer.decode(input_ids[row, self.prompt_length:], skip_special_tokens=True)
+            state = self._state_of(row, completion)
+            allowed = []
+            candidates = torch.topk(scores[row], min(self.top_k, scores.shape[-1])).indices.tolist()
+            for token_id in candidates:
+                if self._allowed(completion, state, token_id):
+                    allowed.append(token_id)
+                    if len(allowed) >= self.keep:
+                        break
+                else:
+                    self.stats["rejected_candidates"] += 1
+            if not allowed and self.eos_token_id is not None:
+                # Nothing valid among the likely tokens: end here rather than spend the budget on
+                # text that cannot parse. LLMProcessor answers an incomplete statement from the rules.
+                if state is None or not self.grammar.is_complete(completion, resume=state):
+                    self.stats["dead_ends"] += 1
+                allowed = [self.eos_token_id]
+            if not allowed:
+                self.stats["unconstrained_steps"] += 1
+                continue
+            masked = torch.full_like(scores[row], float("-inf"))
+            masked[allowed] = scores[row, allowed]
+            scores[row] = masked
+        return scores
@@ -0,0 +1,149 @@
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Dict, List, Optional
+
+from Deadline import Deadline
+
+
+# ===========================
+# Inference Pool Module
+# ===========================
+# Worker processes each run their own LLMProcessor over one memory-mapped copy of the
+# weights (see ModelArtifact), so generation uses more cores without multiplying RSS.
+
+def _worker_main(worker_id: int, weights_dir: str, config_overrides: Dict, threads: int, tasks, results):
+    import torch
+    from employee_config import Config
+    from LLMProcessor import LLMProcessor
+
+    torch.set_num_threads(threads)
+    # The parent process runs the cache and rule tiers; workers only generate
+    worker_config = type("WorkerConfig", (Config,), dict(config_overrides, **{
+        "LLM_LOAD_MODE": "eager",
+        "RULE_ENGINE": dict(Config.RULE_ENGINE, ahead_of_model=False),
+        "SQL_CACHE": {"enabled": False},
+        "SQL_TEMPLATE_CACHE": {"enabled": False},
+        "SEMANTIC_CACHE": {"enabled": False}
+    }))()
+    processor = LLMProcessor(weights_dir, config=worker_config, backend="mmap")
+    results.put(("ready", worker_id, processor.state))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        request_id, question, expires_at = task
+        # Wall-clock expiry, since the monotonic clock is not shared between processes
+        deadline = Deadline(None if expires_at is None else max(0.0, expires_at - time.time()))
+        try:
+            result = {"status": "success", **processor.resolve_sql(question, deadline)}
+        except Exception as e:
+            result = {"status": "error", "message": str(e)}
+        results.put((request_id, worker_id, result))
+
+
+class InferencePool:
+    """Schedules questions over worker processes through one shared task queue: an idle
+    worker takes the next question, so load follows each worker's actual progress"""
+
+    def __init__(self, weights_dir: str, workers: Optional[int] = None, threads_per_worker: int = 4,
+                 config_overrides: Optional[Dict] = None, timeout: Optional[float] = None):
+        self.logger = logging.getLogger(__name__)
+        self.timeout = timeout
+        self.threads_per_worker = threads_per_worker
+        self.workers = workers or max(1, (os.cpu_count() or 1) // threads_per_worker)
+        # Spawned rather than forked: torch's thread pools do not survive a fork
+        context = multiprocessing.get_context("spawn")
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        self._pending: Dict[int, Future] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "workers_ready": 0, "per_worker": {}}
+
+        self._processes = [
+            context.Process(target=_worker_main, name=f"inference-worker-{i}", daemon=True,
+                            args=(i, weights_dir, config_overrides or {}, threads_per_worker,
+                                  self._tasks, self._results))
+            for i in range(self.workers)
+        ]
+        for process in self._processes:
+            process.start()
+        self._collector = threading.Thread(target=self._collect, name="inference-results", daemon=True)
+        self._collector.start()
+        self.logger.info(f"Started {self.workers} inference workers with {threads_per_worker} threads each")
+
+    def _collect(self):
+        while True:
+            request_id, worker_id, payload = self._results.get()
+            if request_id == "ready":
+                with self._lock:
+                    self.stats["workers_ready"] += 1
+                self.logger.info(f"Inference worker {worker_id} ready ({payload})")
+                continue
+            with self._lock:
+                future = self._pending.pop(request_id, None)
+                self.stats["per_worker"][worker_id] = self.stats["per_worker"].get(worker_id, 0) + 1
+            if future:
+                future.set_result(payload)
+
+    def _submit(self, question: str, timeout: Optional[float] = None) -> Future:
+        if not any(process.is_alive() for process in self._processes):
+            raise ConnectionError("Inference pool has no live workers")
+        future = Future()
+        with self._lock:
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+            self.stats["requests"] += 1
+        self._tasks.put((request_id, question, None if timeout is None else time.time() + timeout))
+        return future
+
+    def _result(self, future: Future, timeout: Optional[float] = None) -> Dict:
+        if timeout is None or (self.timeout is not None and self.timeout < timeout):
+            timeout = self.timeout
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            # A worker that died mid-question never answers; surface it like a lost connection.
+            # A late answer to an abandoned question is still collected and discarded.
+            raise TimeoutError(f"No answer from the inference pool within {timeout}s")
+
+    def generate_sql(self, question: str, timeout: Optional[float] = None) -> Dict:
+        return self._result(self._submit(question, timeout), timeout)
+
+    def generate_sql_batch(self, questions: List[str], timeout: Optional[float] = None) -> List[Dict]:
+        # All queued at once, so idle workers pick them up in parallel
+        deadline = Deadline(timeout)
+        futures = [self._submit(question, timeout) for question in questions]
+        results = []
+        for future in futures:
+            remaining = deadline.remaining()
+            try:
+                results.append(self._result(future, remaining))
+            except TimeoutError as e:
+                # Past the caller's timeout only this question is late; otherwise the pool is stuck
+                if remaining is None or (self.timeout is not None and self.timeout < remaining):
+                    raise
+                results.append({"status": "error", "message": str(e), "timed_out": True})
+        return results
+
+    def invalidate(self, question: str):
+        """Workers hold no caches"""
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats, per_worker=dict(self.stats["per_worker"]))
+        stats.update({"workers": self.workers, "threads_per_worker": self.threads_per_worker,
+                      "alive": sum(process.is_alive() for process in self._processes)})
+        return stats
+
+    def close(self):
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=10)
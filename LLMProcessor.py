@@ -1,135 +1,287 @@
-import re
 import os
 os.environ['KMP_DUPLICATE_LIB_OK'] = 'TRUE'
 import sys
 import logging
-import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer
+import threading
+import time
 from datetime import datetime
-from typing import Dict, List, Any  # Add this import for type hints
+from typing import Dict, List, Any, Optional, Tuple  # Add this import for type hints
+from SQLCache import SQLCache
+from TemplateCache import SQLTemplateCache
+from QueryNormalizer import LiteralExtractor
+from RuleEngine import MockModel, RuleEngine
+from PrefixCache import PrefixKVCache
+from PromptBuilder import PromptBuilder, prompt_fingerprint
+from Deadline import Deadline, DeadlineExceeded
+from SQLGrammar import IncompleteStatement
 
 
 class LLMProcessor:
-    def __init__(self, model_name: str):
+    WARMUP_QUESTION = "How many employees does the company have in total?"
+
+    def __init__(self, model_name: str, config=None, load_mode: Optional[str] = None,
+                 backend: Optional[str] = None):
         self.model_name = model_name
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.INFO)
-        self.config = None
-        self.llm = self._initialize_model()
+        self.config = config
+        self.load_mode = load_mode or getattr(config, "LLM_LOAD_MODE", "eager")
+        # "transformers" loads a real model; "mock" uses the rule-based model only and
+        # never imports torch/transformers; "remote" sends questions to a ModelServer process;
+        # "pool" spreads them over worker processes sharing memory-mapped weights, each of which
+        # uses "mmap" (model_name is then a local weights directory)
+        self.backend = backend or getattr(config, "LLM_BACKEND", "transformers")
+        self.cpu_config = getattr(config, "CPU_INFERENCE", {})
+        self.inference_mode = None  # Set once a real model is loaded: "device_map" or "cpu[-int8]"
+
+        self._sql_cache = None
+        self._template_cache = None
+        self._semantic_cache = None
+        self._semantic_unavailable = False
+        self._literal_extractor = None
+        self._cache_lock = threading.Lock()
+        self.generation_config = getattr(config, "GENERATION", {})
+        self._grammar = None
+        self.prompt_config = getattr(config, "PROMPT", {})
+        self._prompt_builder = None
+        self._stats_lock = threading.Lock()
+        self.generation_stats = {"calls": 0, "prompt_tokens": 0, "prefill_tokens": 0, "generated_tokens": 0,
+                                 "tokens_saved": 0, "seconds": 0.0, "stop_reasons": {}}
+        # Speculative decoding of single questions: a draft proposes tokens, the model verifies them
+        self.assisted_config = getattr(config, "ASSISTED_DECODING", {})
+        self._ngram_draft = None
+        self.assisted_stats = {"calls": 0, "generated_tokens": 0, "forward_passes": 0,
+                               "drafted_tokens": 0, "accepted_tokens": 0}
+        # Requests answered by the rule-based tier because the model could not meet their deadline
+        self.deadline_config = getattr(config, "DEADLINES", {})
+        self.deadline_stats = {"fallbacks": 0, "reasons": {}}
+        # Key/value cache of the static prompt prefix, rebuilt when the model or schema changes
+        prefix_config = getattr(config, "PREFIX_KV_CACHE", {})
+        self._prefix_cache = PrefixKVCache(prefix_config.get("max_entries", 1)) if prefix_config.get("enabled") else None
+
+        self.state = "loading"
+        self.load_seconds = None
+        self._ready = threading.Event()
+
+        rule_config = getattr(config, "RULE_ENGINE", {})
+        self.rule_engine = RuleEngine.load(rule_config.get("path"))
+        # Rules answer matching questions without any model call, even once the model is ready
+        self.rules_ahead_of_model = rule_config.get("ahead_of_model", False)
+
+        if self.load_mode == "background" and self.backend not in ("mock", "remote", "pool"):
+            # Serve rule-matched questions right away while the real model loads
+            self.llm = self._create_mock_model()
+            self._loader = threading.Thread(target=self._load_in_background, name="llm-loader", daemon=True)
+            self._loader.start()
+        else:
+            start = time.time()
+            self.llm = self._initialize_model()
+            self.load_seconds = time.time() - start
+            self.state = "ready" if self._is_real_model(self.llm) or self._is_remote(self.llm) else "mock"
+            self._ready.set()
 
     def set_config(self, config):
         """Set configuration separately"""
         self.config = config
 
+    @staticmethod
+    def _is_real_model(llm) -> bool:
+        return isinstance(llm, dict) and "tokenizer" in llm and "model" in llm
+
+    @staticmethod
+    def _is_remote(llm) -> bool:
+        return hasattr(llm, "generate_sql_batch")
+
+    def _load_in_background(self):
+        """Load the model, run a warm-up generation, then switch it in"""
+        start = time.time()
+        llm = self._initialize_model()
+        if self._is_real_model(llm):
+            self.state = "warming"
+            try:
+                # Also prefills the prompt prefix cache before the first real question
+                prefix, suffix = self._build_prompt_parts(self.WARMUP_QUESTION, llm)
+                self._run_model(llm, prefix + suffix, max_new_tokens=8, prefix=prefix)
+            except IncompleteStatement:
+                pass  # Eight tokens rarely finish a statement; the forward passes are what count
+            except Exception as e:
+                self.logger.warning(f"Model warm-up failed: {str(e)}")
+            self.llm = llm
+            self.state = "ready"
+        else:
+            # Loading failed; keep answering from the rule-based model
+            self.llm = llm
+            self.state = "mock"
+        self.load_seconds = time.time() - start
+        self.logger.info(f"Model state: {self.state} after {self.load_seconds:.1f}s")
+        self._ready.set()
+
+    def is_ready(self) -> bool:
+        """True once the model (or the mock fallback after a failed load) is in place"""
+        return self._ready.is_set()
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def get_status(self) -> Dict:
+        """Readiness state: loading, warming, ready, or mock"""
+        return {
+            "model_name": self.model_name,
+            "load_mode": self.load_mode,
+            "backend": self.backend,
+            "state": self.state,
+            "inference_mode": self.inference_mode,
+            "ready": self.is_ready(),
+            "load_seconds": self.load_seconds
+        }
+
     def _initialize_model(self):
         """Initialize the MiniMax language model without pipeline"""
+        if self.backend == "mock":
+            return self._create_mock_model()
+        if self.backend == "remote":
+            from ModelServer import ModelClient
+
+            # Connects lazily; the server may still be starting
+            self.inference_mode = "remote"
+            return ModelClient(getattr(self.config, "MODEL_SERVER", {}))
+        if self.backend == "pool":
+            return self._create_inference_pool()
+
         try:
             self.logger.info(f"Loading MiniMax model: {self.model_name}")
 
-            # Load tokenizer and model
-            tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-            model = AutoModelForCausalLM.from_pretrained(
-                self.model_name,
-                device_map="auto",
-                torch_dtype=torch.bfloat16,
-                trust_remote_code=True
-            )
+            # Heavy ML imports are deferred until a real backend is actually loaded
+            import torch
+            from transformers import AutoModelForCausalLM, AutoTokenizer
+
+            use_cpu = self._use_cpu_inference(torch)
+            artifact = self._load_artifact(torch, use_cpu) if self.backend != "mmap" else None
+            if self.backend == "mmap":
+                from ModelArtifact import load_artifact
+
+                # model_name is a local weights directory whose pages other processes share
+                tokenizer, model = load_artifact(self.model_name)
+                self.inference_mode = "cpu-mmap"
+            elif artifact:
+                tokenizer, model = artifact
+            else:
+                # Load tokenizer and model
+                tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+                if use_cpu:
+                    from Quantization import prepare_cpu_model
+
+                    # float32 on the CPU; bfloat16 matmuls are slow on most CPUs
+                    model = AutoModelForCausalLM.from_pretrained(
+                        self.model_name,
+                        torch_dtype=torch.float32,
+                        low_cpu_mem_usage=True,
+                        trust_remote_code=True
+                    )
+                    quantize = self.cpu_config.get("quantize")
+                    model = prepare_cpu_model(model, quantize, self.cpu_config.get("threads"))
+                    self.inference_mode = f"cpu-{quantize}" if quantize else "cpu"
+                else:
+                    model = AutoModelForCausalLM.from_pretrained(
+                        self.model_name,
+                        device_map="auto",
+                        torch_dtype=torch.bfloat16,
+                        trust_remote_code=True
+                    )
+                    self.inference_mode = "device_map"
 
             self.logger.info("MiniMax model loaded successfully")
-            return {"tokenizer": tokenizer, "model": model}
+            llm = {"tokenizer": tokenizer, "model": model}
+            if self.assisted_config.get("draft") == "model":
+                llm["draft_model"] = self._load_draft_model(model)
+            return llm
         except Exception as e:
             self.logger.error(f"Failed to load model: {str(e)}")
             return self._create_mock_model()
 
-    def _create_mock_model(self):
-        self.logger.warning("Using mock model for SQL generation")
-
-        class MockModel:
-            def __call__(self, prompt, **kwargs):
-                clean_prompt = re.sub(r"^\d+\.\s*", "", prompt)  # Remove numbering
-                clean_prompt = clean_prompt.replace("'", "").replace('"', '').lower()
-
-                patterns = {
-                    r".*email.*sales manager.*": "SELECT email_address FROM employee_activities WHERE job_title = 'Sales Manager' LIMIT 1;",
-
-                    # Fixed GROUP BY queries
-                    r".*product development department.*":
-                        "SELECT ANY_VALUE(full_name) AS full_name FROM employee_activities "
-                        "WHERE department = 'Product Development' GROUP BY employee_id;",
-
-                    r".*sales revenue.*wei zhang.*2024-08-28.*": "SELECT total_sales_rmb FROM employee_activities WHERE full_name = 'Wei Zhang' AND week_start_date = '2024-08-28';",
-
-                    # Added DISTINCT for unique employees
-                    r".*employees.*finance.*department.*": "SELECT DISTINCT full_name FROM employee_activities WHERE department = 'Finance';",
-
-                    r".*meetings.*na li.*": "SELECT SUM(number_of_meetings) AS total_meetings FROM employee_activities WHERE full_name = 'Na Li';",
-                    r".*worked more than 40 hours.*week 1.*": "SELECT full_name, hours_worked FROM employee_activities WHERE week_number = 1 AND hours_worked > 40;",
-                    r".*how many employees.*total.*": "SELECT COUNT(DISTINCT employee_id) AS total_employees FROM employee_activities;",
-                    r".*average hours.*week 2.*": "SELECT AVG(hours_worked) AS avg_hours FROM employee_activities WHERE week_number = 2;",
-                    r".*total sales revenue.*sales department.*": "SELECT SUM(total_sales_rmb) AS total_sales FROM employee_activities WHERE department = 'Sales';",
-                    r".*total sales revenue.*week 1.*": "SELECT SUM(total_sales_rmb) AS total_revenue FROM employee_activities WHERE week_number = 1;",
-                    r".*most hours.*first week of september 2024.*": "SELECT full_name, hours_worked FROM employee_activities WHERE week_start_date BETWEEN '2024-09-01' AND '2024-09-07' ORDER BY hours_worked DESC LIMIT 1;",
-                    r".*most meetings.*week 2.*": "SELECT full_name, number_of_meetings FROM employee_activities WHERE week_number = 2 ORDER BY number_of_meetings DESC LIMIT 1;",
-                    r".*challenges with customer retention.*": "SELECT full_name, activities FROM employee_activities WHERE activities LIKE '%customer retention%';",
-                    r".*data analysis or reporting skills.*": "SELECT full_name, job_title FROM employee_activities WHERE job_title LIKE '%Analyst%' OR job_title LIKE '%Data%' OR job_title LIKE '%Reporting%';",
-
-                    # Added DISTINCT for unique employees
-                    r".*it department.*": "SELECT DISTINCT full_name FROM employee_activities WHERE department = 'IT';",
-
-                    r".*compare.*hours worked.*wei zhang.*tao huang.*week 1.*": "SELECT full_name, hours_worked FROM employee_activities WHERE full_name IN ('Wei Zhang', 'Tao Huang') AND week_number = 1;",
-                    r".*top 3.*total hours.*last 4 weeks.*": "SELECT full_name, SUM(hours_worked) AS total_hours FROM employee_activities WHERE week_number BETWEEN 7 AND 10 GROUP BY full_name ORDER BY total_hours DESC LIMIT 3;",
-                    r".*highest sales revenue.*single week.*": "SELECT full_name, total_sales_rmb, week_start_date FROM employee_activities ORDER BY total_sales_rmb DESC LIMIT 1;",
-                    r".*business development department.*": "SELECT SUM(hours_worked) AS total_hours, AVG(total_sales_rmb) AS avg_sales FROM employee_activities WHERE department = 'Sales';",
-
-                    # Additional patterns for 20 example queries
-                    r".*employee.*product development department.*":
-                        "SELECT ANY_VALUE(full_name) AS full_name FROM employee_activities "
-                        "WHERE department = 'Product Development' GROUP BY employee_id;",
-
-                    r".*sales revenue.*wei zhang.*week starting.*2024-08-28.*": "SELECT total_sales_rmb FROM employee_activities WHERE full_name = 'Wei Zhang' AND week_start_date = '2024-08-28';",
-
-                    # Added DISTINCT for unique employees
-                    r".*employees.*finance.*department.*": "SELECT DISTINCT full_name FROM employee_activities WHERE department = 'Finance';",
-
-                    r".*total number of meetings.*na li.*": "SELECT SUM(number_of_meetings) AS total_meetings FROM employee_activities WHERE full_name = 'Na Li';",
-                    r".*employees worked more than 40 hours.*week 1.*": "SELECT full_name, hours_worked FROM employee_activities WHERE week_number = 1 AND hours_worked > 40;",
-                    r".*how many employees.*total.*": "SELECT COUNT(DISTINCT employee_id) AS total_employees FROM employee_activities;",
-                    r".*average hours worked.*all employees.*week 2.*": "SELECT AVG(hours_worked) AS avg_hours FROM employee_activities WHERE week_number = 2;",
-                    r".*total sales revenue.*sales department.*to date.*": "SELECT SUM(total_sales_rmb) AS total_sales FROM employee_activities WHERE department = 'Sales';",
-                    r".*total sales revenue.*company.*week 1.*": "SELECT SUM(total_sales_rmb) AS total_revenue FROM employee_activities WHERE week_number = 1;",
-                    r".*employees.*faced challenges with customer retention.*": "SELECT full_name, activities FROM employee_activities WHERE activities LIKE '%customer retention%';",
-                    r".*employees.*require data analysis or reporting skills.*": "SELECT full_name, job_title FROM employee_activities WHERE job_title LIKE '%Analyst%' OR job_title LIKE '%Data%' OR job_title LIKE '%Reporting%';",
-
-                    # Added DISTINCT for unique employees
-                    r".*employees.*it department.*": "SELECT DISTINCT full_name FROM employee_activities WHERE department = 'IT';",
-
-                    r".*total number of hours worked.*average sales revenue.*business development department.*": "SELECT SUM(hours_worked) AS total_hours, AVG(total_sales_rmb) AS avg_sales FROM employee_activities WHERE department = 'Sales';",
-                    # Improved Business Development handling
-                    r".*business development department.*":
-                        "SELECT SUM(hours_worked) AS total_hours, AVG(total_sales_rmb) AS avg_sales "
-                        "FROM employee_activities WHERE department = 'Business Development';",
-
-                    # Improved recession handling
-                    r".*hired during.*recession.*":
-                        "SELECT full_name, hire_date FROM employee_activities "
-                        "WHERE hire_date BETWEEN '2020-01-01' AND '2020-12-31';",
+    def _create_inference_pool(self):
+        """Worker processes over one memory-mapped copy of the weights, exported on first use"""
+        from InferencePool import InferencePool
+        from ModelArtifact import artifact_matches, export
 
-                    # Improved customer retention query
-                    r".*challenges with customer retention.*":
-                        "SELECT full_name, activities FROM employee_activities "
-                        "WHERE activities LIKE '%customer retention%' OR activities LIKE '%client retention%';"
-
-                }
+        pool_config = getattr(self.config, "INFERENCE_POOL", {})
+        weights_dir = pool_config.get("weights_dir", "model_weights")
+        try:
+            # Unquantized float32, since only plain tensors can share mapped pages
+            if not artifact_matches(weights_dir, self.model_name, "float32", None):
+                self.logger.info(f"Exporting {self.model_name} weights to {weights_dir} for the inference pool")
+                export(self.model_name, weights_dir, "float32")
+            # Workers run with this process's generation settings
+            overrides = {name: getattr(self.config, name) for name in
+                         ("GENERATION", "ASSISTED_DECODING", "PREFIX_KV_CACHE") if hasattr(self.config, name)}
+            self.inference_mode = "pool"
+            return InferencePool(weights_dir, pool_config.get("workers"), pool_config.get("threads_per_worker", 4),
+                                 config_overrides=overrides, timeout=pool_config.get("timeout"))
+        except Exception as e:
+            self.logger.error(f"Failed to start inference pool: {str(e)}")
+            return self._create_mock_model()
 
-                for pattern, sql in patterns.items():
-                    if re.search(pattern, clean_prompt):
-                        return [{"generated_text": sql}]
+    def _load_artifact(self, torch, use_cpu: bool) -> Optional[Tuple]:
+        """(tokenizer, model) from the pre-converted MODEL_ARTIFACT if it was exported for this
+        model and these load settings; None means loading from the hub instead"""
+        path = getattr(self.config, "MODEL_ARTIFACT", {}).get("path")
+        if not path:
+            return None
+        from ModelArtifact import artifact_matches, load_artifact, read_manifest
+
+        if read_manifest(path) is None:
+            return None  # Nothing exported
+        dtype, quantize = ("float32", self.cpu_config.get("quantize")) if use_cpu else ("bfloat16", None)
+        if not artifact_matches(path, self.model_name, dtype, quantize):
+            self.logger.warning(f"Model artifact {path} was exported for other settings; "
+                                f"loading {self.model_name} from the hub")
+            return None
+        try:
+            tokenizer, model = load_artifact(path)
+        except Exception as e:
+            self.logger.warning(f"Model artifact {path} failed to load, using the hub: {str(e)}")
+            return None
+        if use_cpu:
+            from Quantization import prepare_cpu_model
+            # Already quantized at export time; only the thread count is applied
+            model = prepare_cpu_model(model, None, self.cpu_config.get("threads"))
+        elif torch.cuda.is_available():
+            model = model.to("cuda")
+        self.inference_mode = f"artifact-{quantize or dtype}"
+        self.logger.info(f"Loaded model artifact {path} ({quantize or dtype})")
+        return tokenizer, model
+
+    def _use_cpu_inference(self, torch) -> bool:
+        mode = self.cpu_config.get("mode", "never")
+        if mode == "auto":
+            return not torch.cuda.is_available()
+        return mode == "always"
+
+    def _load_draft_model(self, model):
+        """Small model for assisted decoding; it has to share the main model's vocabulary"""
+        draft_name = self.assisted_config.get("draft_model", "gpt2")
+        try:
+            from transformers import AutoModelForCausalLM
 
-                return [{"generated_text": "SELECT * FROM employee_activities LIMIT 5;"}]
+            draft_model = AutoModelForCausalLM.from_pretrained(draft_name, torch_dtype=model.dtype).to(model.device)
+            draft_model.eval()
+            if self.inference_mode and self.inference_mode.startswith("cpu"):
+                from Quantization import prepare_cpu_model
+                draft_model = prepare_cpu_model(draft_model, self.cpu_config.get("quantize"))
+        except Exception as e:
+            self.logger.warning(f"Draft model {draft_name} unavailable, using n-gram drafts: {str(e)}")
+            return None
+        if draft_model.config.vocab_size != model.config.vocab_size:
+            self.logger.warning(f"Draft model {draft_name} has a different vocabulary, using n-gram drafts")
+            return None
+        self.logger.info(f"Loaded draft model {draft_name} for assisted decoding")
+        return draft_model
 
-        return MockModel()
+    def _create_mock_model(self):
+        self.logger.warning("Using mock model for SQL generation")
+        return MockModel(self.rule_engine)
 
-    def handle_knowledge_query(self, query: str, db_manager) -> Dict:
+    def handle_knowledge_query(self, query: str, db_manager, deadline: Optional[Deadline] = None) -> Dict:
         """Handle knowledge-based queries with configurable periods"""
         # Use recession periods from config
         if "recession" in query.lower() or "hired during" in query.lower():
@@ -137,7 +289,8 @@ class LLMProcessor:
             for period in self.config.RECESSION_PERIODS:
                 res = db_manager.execute_query(
                     f"SELECT full_name, hire_date FROM employee_activities "
-                    f"WHERE hire_date BETWEEN '{period['start']}' AND '{period['end']}'"
+                    f"WHERE hire_date BETWEEN '{period['start']}' AND '{period['end']}'",
+                    timeout=deadline.remaining() if deadline else None
                 )
                 if res["status"] == "success":
                     for emp in res["data"]:
@@ -215,42 +368,543 @@ class LLMProcessor:
         # Fallback summary
         if rowcount == 0:
             return "No matching records found"
+        if db_results.get("truncated"):
+            return f"Found more than {rowcount} matching records (showing the first {rowcount})"
         return f"Found {rowcount} matching records"
-    def generate_sql(self, natural_language_query: str) -> str:
-        """Generate SQL from natural language query"""
-        schema = self.config.get_db_schema() if self.config else "employee_activities table"
-
-        prompt = f"""You are a SQL expert. Generate PostgreSQL using this schema:
-        {schema}
-        Rules:
-        1. Use ONLY columns/tables from schema
-        2. NEVER include explanations
-        3. Return PURE SQL
-
-        Question: {natural_language_query}
-        SQL:"""
+    def _get_prompt_builder(self) -> PromptBuilder:
+        """Prompt builder over the current schema, rebuilt when get_db_schema() changes"""
+        schema = self.config.get_db_schema() if self.config else "Table: employee_activities"
+        if self._prompt_builder is None or self._prompt_builder[0] != schema:
+            self._prompt_builder = (schema, PromptBuilder(schema, self.prompt_config,
+                                                          getattr(self.config, "DEPARTMENTS", [])))
+        return self._prompt_builder[1]
+
+    def _build_prompt_parts(self, natural_language_query: str, llm=None) -> Tuple[str, str]:
+        """Split the prompt into the static prefix (preamble, schema, rules) and the per-question suffix.
+        For a real model the schema is pruned to the question and the prompt counted with its tokenizer;
+        the rule-based model matches against the whole prompt, so it keeps the full schema."""
+        if self._is_real_model(llm):
+            tokenizer = llm["tokenizer"]
+            return self._get_prompt_builder().build_parts(
+                natural_language_query, lambda text: len(tokenizer(text)["input_ids"]))
+        return self._get_prompt_builder().build_parts(natural_language_query, prune=False)
+
+    def _build_prompt(self, natural_language_query: str, llm=None) -> str:
+        return "".join(self._build_prompt_parts(natural_language_query, llm))
+
+    def _generation_kwargs(self, llm: Dict, prompt_length: int, max_new_tokens: Optional[int],
+                           deadline: Optional[Deadline] = None) -> Dict:
+        """Shared generate() arguments, including the stop-at-end-of-statement and deadline criteria"""
+        from GenerationControls import DeadlineStop, SQLStatementStop
+        from transformers import StoppingCriteriaList
+
+        kwargs = {
+            "max_new_tokens": max_new_tokens or self.generation_config.get("max_new_tokens", 100),
+            "temperature": 0.1,
+            "do_sample": False
+        }
+        criteria = []
+        if self.generation_config.get("stop_on_statement_end", True):
+            criteria.append(SQLStatementStop(llm["tokenizer"], prompt_length))
+        if deadline is not None and deadline.remaining() is not None:
+            criteria.append(DeadlineStop(deadline))
+        if criteria:
+            kwargs["stopping_criteria"] = StoppingCriteriaList(criteria)
+        if self.generation_config.get("grammar_constrained"):
+            from GenerationControls import SQLGrammarLogitsProcessor
+            from transformers import LogitsProcessorList
+            kwargs["logits_processor"] = LogitsProcessorList([SQLGrammarLogitsProcessor(
+                llm["tokenizer"], self._get_grammar(), prompt_length,
+                top_k=self.generation_config.get("grammar_top_k", 100)
+            )])
+        return kwargs
+
+    def _get_grammar(self):
+        """SQL grammar over the current schema, rebuilt when get_db_schema() changes"""
+        from SQLGrammar import SQLGrammar
+
+        schema = self.config.get_db_schema() if self.config else ""
+        if self._grammar is None or self._grammar[0] != schema:
+            self._grammar = (schema, SQLGrammar.from_schema(schema))
+        return self._grammar[1]
+
+    def _grammar_rejects(self, completion: str) -> bool:
+        """With grammar-constrained decoding, a completion that is not a whole statement (the
+        processor ended it at a dead end, or the token budget ran out) must not reach the database"""
+        return bool(self.generation_config.get("grammar_constrained")) and not self._get_grammar().is_complete(completion)
+
+    @staticmethod
+    def _stopping_criterion(kwargs: Dict, kind):
+        """The generate() stopping criterion of the given class, if there is one"""
+        return next((criterion for criterion in kwargs.get("stopping_criteria", []) if isinstance(criterion, kind)),
+                    None)
+
+    def _decode_completion(self, tokenizer, row, prompt_length: int) -> str:
+        """Decode only the generated tokens, cut after the first complete statement"""
+        from GenerationControls import trim_to_statement
+        return trim_to_statement(tokenizer.decode(row[prompt_length:], skip_special_tokens=True))
+
+    def _record_generation(self, prompt_tokens: int, prefill_tokens: int, generated_tokens: int,
+                           max_new_tokens: int, stop_reason: str, seconds: float):
+        with self._stats_lock:
+            stats = self.generation_stats
+            stats["calls"] += 1
+            stats["prompt_tokens"] += prompt_tokens
+            stats["prefill_tokens"] += prefill_tokens
+            stats["generated_tokens"] += generated_tokens
+            stats["tokens_saved"] += max_new_tokens - generated_tokens
+            stats["seconds"] += seconds
+            stats["stop_reasons"][stop_reason] = stats["stop_reasons"].get(stop_reason, 0) + 1
+        self.logger.info(
+            f"Generated {generated_tokens}/{max_new_tokens} tokens in {seconds * 1000:.0f} ms "
+            f"(prefilled {prefill_tokens} of {prompt_tokens} prompt tokens, stop: {stop_reason})"
+        )
+
+    def get_generation_stats(self) -> Dict:
+        """Token and latency counters of real-model generation"""
+        with self._stats_lock:
+            stats = dict(self.generation_stats, stop_reasons=dict(self.generation_stats["stop_reasons"]))
+            assisted = dict(self.assisted_stats)
+        calls = stats["calls"]
+        stats["avg_generated_tokens"] = stats["generated_tokens"] / calls if calls else 0.0
+        stats["avg_latency_ms"] = stats["seconds"] * 1000 / calls if calls else 0.0
+        assisted["acceptance_rate"] = (assisted["accepted_tokens"] / assisted["drafted_tokens"]
+                                       if assisted["drafted_tokens"] else 0.0)
+        # Above 1.0 means the draft saved main-model passes
+        assisted["tokens_per_forward_pass"] = (assisted["generated_tokens"] / assisted["forward_passes"]
+                                               if assisted["forward_passes"] else 0.0)
+        stats["assisted"] = assisted
+        builder = self._prompt_builder
+        stats["prompt"] = builder[1].get_stats() if builder else {}
+        with self._stats_lock:
+            stats["deadline"] = dict(self.deadline_stats, reasons=dict(self.deadline_stats["reasons"]))
+        return stats
+
+    def _assisted_decoder(self, llm: Dict):
+        """Decoder for the configured draft ("ngram" or "model"), or None when assisted decoding is off"""
+        draft_kind = self.assisted_config.get("draft")
+        if draft_kind not in ("ngram", "model"):
+            return None
+        from AssistedDecoding import AssistedDecoder, ModelDraft, NgramDraft
+
+        if draft_kind == "model" and llm.get("draft_model") is not None:
+            draft = ModelDraft(llm["draft_model"])
+        else:
+            # Also the fallback when the draft model could not be loaded
+            with self._stats_lock:
+                if self._ngram_draft is None:
+                    self._ngram_draft = NgramDraft(self.assisted_config.get("ngram_size", 3),
+                                                   self.assisted_config.get("max_history", 256))
+            draft = self._ngram_draft
+        return AssistedDecoder(llm["model"], draft, self.assisted_config.get("num_draft_tokens", 5),
+                               eos_token_id=llm["tokenizer"].eos_token_id)
+
+    def _record_assisted(self, decoder, generated_tokens: int):
+        stats = decoder.get_stats()
+        with self._stats_lock:
+            self.assisted_stats["calls"] += 1
+            self.assisted_stats["generated_tokens"] += generated_tokens
+            for name in ("forward_passes", "drafted_tokens", "accepted_tokens"):
+                self.assisted_stats[name] += stats[name]
+        self.logger.info(
+            f"Assisted decoding: accepted {stats['accepted_tokens']}/{stats['drafted_tokens']} drafted tokens, "
+            f"{generated_tokens} tokens in {stats['forward_passes']} model passes"
+        )
+
+    def _run_model(self, llm: Dict, prompt: str, max_new_tokens: Optional[int] = None,
+                   prefix: Optional[str] = None, deadline: Optional[Deadline] = None) -> str:
+        """Run a real tokenizer/model pair on the prompt and return only the generated SQL text.
+        With a prefix, its key/value cache is reused and only the remaining tokens are prefilled.
+        Raises DeadlineExceeded if the deadline stopped generation before the statement was done, and
+        IncompleteStatement if grammar-constrained generation ended without a whole statement."""
+        from GenerationControls import DeadlineStop, SQLStatementStop
+
+        start = time.time()
+        tokenizer, model = llm["tokenizer"], llm["model"]
+        if prefix is not None and self._prefix_cache is not None and prompt.startswith(prefix):
+            inputs = self._prefix_cache.prepare(llm, self.model_name, prefix, prompt[len(prefix):])
+        else:
+            inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
+        cached_tokens = inputs.pop("cached_tokens", 0)
+        prompt_length = inputs["input_ids"].shape[1]
+
+        kwargs = self._generation_kwargs(llm, prompt_length, max_new_tokens, deadline)
+        decoder = self._assisted_decoder(llm)
+        if decoder is not None:
+            outputs = decoder.generate(**inputs, **kwargs)
+        else:
+            outputs = model.generate(**inputs, **kwargs)
+
+        generated_tokens = outputs.shape[1] - prompt_length
+        if decoder is not None:
+            self._record_assisted(decoder, generated_tokens)
+        stopper = self._stopping_criterion(kwargs, SQLStatementStop)
+        deadline_stop = self._stopping_criterion(kwargs, DeadlineStop)
+        stop_reason = stopper.reasons.get(0) if stopper else None
+        if stop_reason is None:
+            if deadline_stop and deadline_stop.fired:
+                stop_reason = "deadline"
+            else:
+                stop_reason = "max_tokens" if generated_tokens >= kwargs["max_new_tokens"] else "eos"
+        completion = self._decode_completion(tokenizer, outputs[0], prompt_length)
+        if stop_reason != "deadline" and self._grammar_rejects(completion):
+            stop_reason = "incomplete"
+        self._record_generation(prompt_length, prompt_length - cached_tokens, generated_tokens,
+                                kwargs["max_new_tokens"], stop_reason, time.time() - start)
+        if stop_reason == "deadline":
+            raise DeadlineExceeded(f"Generation stopped at the deadline after {generated_tokens} tokens")
+        if stop_reason == "incomplete":
+            raise IncompleteStatement(f"No complete statement after {generated_tokens} tokens")
+        return completion
+
+    def _run_model_batch(self, llm: Dict, prompts: List[str], max_new_tokens: Optional[int] = None,
+                         deadline: Optional[Deadline] = None) -> List[Tuple[Optional[str], str]]:
+        """Generate for several prompts in one padded forward pass; returns (new text, stop reason)
+        per row. The text is None for rows the deadline stopped before their statement was done
+        ("deadline") and for grammar-constrained rows that ended without a whole statement ("incomplete")."""
+        import torch
+
+        start = time.time()
+        tokenizer, model = llm["tokenizer"], llm["model"]
+        pad_token_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+
+        # Decoder-only models continue from the last position, so pad on the left. Padding by
+        # hand leaves the shared tokenizer's pad_token and padding_side alone for other callers.
+        encoded = [tokenizer(prompt)["input_ids"] for prompt in prompts]
+        prompt_length = max(len(ids) for ids in encoded)
+        inputs = {
+            "input_ids": torch.tensor([[pad_token_id] * (prompt_length - len(ids)) + ids for ids in encoded],
+                                      device=model.device),
+            "attention_mask": torch.tensor([[0] * (prompt_length - len(ids)) + [1] * len(ids) for ids in encoded],
+                                           device=model.device)
+        }
+        kwargs = self._generation_kwargs(llm, prompt_length, max_new_tokens, deadline)
+        outputs = model.generate(**inputs, **kwargs, pad_token_id=pad_token_id)
+
+        from GenerationControls import DeadlineStop, SQLStatementStop
+
+        elapsed = time.time() - start
+        stopper = self._stopping_criterion(kwargs, SQLStatementStop)
+        deadline_stop = self._stopping_criterion(kwargs, DeadlineStop)
+        completions = []
+        for row, output in enumerate(outputs):
+            # Rows that stopped early are padded up to the longest one in the batch
+            generated = output[prompt_length:]
+            generated_tokens = int((generated != pad_token_id).sum())
+            stop_reason = stopper.reasons.get(row) if stopper else None
+            if stop_reason is None:
+                # Only rows still running when the deadline fired were cut off by it
+                cut_off = deadline_stop and deadline_stop.fired and generated_tokens == len(generated)
+                if cut_off:
+                    stop_reason = "deadline"
+                else:
+                    stop_reason = "max_tokens" if generated_tokens >= kwargs["max_new_tokens"] else "eos"
+            completion = None
+            if stop_reason != "deadline":
+                completion = self._decode_completion(tokenizer, output, prompt_length)
+                if self._grammar_rejects(completion):
+                    completion, stop_reason = None, "incomplete"
+            real_prompt_tokens = int(inputs["attention_mask"][row].sum())
+            self._record_generation(real_prompt_tokens, real_prompt_tokens, generated_tokens,
+                                    kwargs["max_new_tokens"], stop_reason, elapsed / len(prompts))
+            completions.append((completion, stop_reason))
+        return completions
+
+    def _get_literal_extractor(self) -> LiteralExtractor:
+        if self._literal_extractor is None:
+            self._literal_extractor = LiteralExtractor(getattr(self.config, "DEPARTMENTS", []))
+        return self._literal_extractor
+
+    def _sync_caches(self):
+        """Open the enabled SQL caches on first use and keep their version in step with model, schema,
+        prompt and decoding settings"""
+        cache_config = getattr(self.config, "SQL_CACHE", {})
+        template_config = getattr(self.config, "SQL_TEMPLATE_CACHE", {})
+        semantic_config = getattr(self.config, "SEMANTIC_CACHE", {})
+        if not any(c.get("enabled") for c in (cache_config, template_config, semantic_config)):
+            return
+
+        # Grammar constraints, the token budget and int8 weights all change which SQL the model writes
+        generation = {"grammar_constrained": self.generation_config.get("grammar_constrained"),
+                      "max_new_tokens": self.generation_config.get("max_new_tokens"),
+                      "quantize": self.cpu_config.get("quantize")}
+        version = SQLCache.make_version(self.model_name, self.backend, self.config.get_db_schema(),
+                                        prompt_fingerprint(self.prompt_config), generation)
+        with self._cache_lock:
+            if cache_config.get("enabled") and self._sql_cache is None:
+                self._sql_cache = SQLCache(
+                    cache_config.get("path", "sql_cache.sqlite3"),
+                    version,
+                    memory_entries=cache_config.get("memory_entries", 1024)
+                )
+            if template_config.get("enabled") and self._template_cache is None:
+                self._template_cache = SQLTemplateCache(
+                    self._get_literal_extractor(),
+                    max_entries=template_config.get("max_entries", 512)
+                )
+            if semantic_config.get("enabled") and self._semantic_cache is None and not self._semantic_unavailable:
+                try:
+                    # numpy (and sentence-transformers, if configured) load only when this tier is enabled
+                    from SemanticCache import SemanticCache
+                    self._semantic_cache = SemanticCache.from_config(semantic_config, self._get_literal_extractor())
+                except ImportError as e:
+                    self.logger.warning(f"Semantic cache disabled: {str(e)}")
+                    self._semantic_unavailable = True
+
+            for cache in (self._sql_cache, self._template_cache, self._semantic_cache):
+                if cache is not None:
+                    cache.set_version(version)
+
+    def _lookup_cached_sql(self, natural_language_query: str) -> Optional[Dict]:
+        """Exact-question cache first, then re-binding a learned template, then the nearest paraphrase"""
+        self._sync_caches()
+        if self._sql_cache is not None:
+            cached_sql = self._sql_cache.get(natural_language_query)
+            if cached_sql:
+                return {"sql": cached_sql, "source": "cache"}
+        if self._template_cache is not None:
+            bound_sql = self._template_cache.get(natural_language_query)
+            if bound_sql:
+                return {"sql": bound_sql, "source": "template"}
+        if self._semantic_cache is not None:
+            match = self._semantic_cache.get(natural_language_query)
+            if match:
+                self.logger.info(f"Semantic cache hit ({match['similarity']:.3f}): '{match['matched_question']}'")
+                return {"sql": match["sql"], "source": "semantic"}
+        return None
+
+    def _store_generated_sql(self, natural_language_query: str, sql: str):
+        """Persist model output; rule answers are already instant and are not stored"""
+        for cache in (self._sql_cache, self._template_cache, self._semantic_cache):
+            if cache is not None:
+                cache.put(natural_language_query, sql)
+
+    def invalidate_cached_sql(self, natural_language_query: str):
+        """Forget cached SQL for a question, e.g. after it failed to execute"""
+        self._sync_caches()
+        if self._semantic_cache is not None:
+            # If a paraphrase match served this question, the match itself is wrong
+            self._semantic_cache.report_false_hit(natural_language_query)
+        for cache in (self._sql_cache, self._template_cache, self._semantic_cache):
+            if cache is not None:
+                cache.invalidate(natural_language_query)
+        if self._is_remote(self.llm):
+            try:
+                self.llm.invalidate(natural_language_query)
+            except (OSError, ConnectionError) as e:
+                self.logger.warning(f"Could not invalidate server-side cache: {str(e)}")
+
+    def get_cache_stats(self) -> Dict:
+        """Hit/miss statistics of the SQL generation caches"""
+        caches = {"sql_cache": self._sql_cache, "template_cache": self._template_cache,
+                  "semantic_cache": self._semantic_cache}
+        stats = {name: cache.get_stats() if cache else {"enabled": False} for name, cache in caches.items()}
+        stats["rules"] = self.rule_engine.get_stats()
+        stats["prefix_kv_cache"] = self._prefix_cache.get_stats() if self._prefix_cache else {"enabled": False}
+        return stats
+
+    def generate_sql_batch(self, questions: List[str], max_batch_size: Optional[int] = None,
+                           deadlines: Optional[List[Optional[Deadline]]] = None) -> List[Dict]:
+        """Generate SQL for many questions, batching real-model prompts into shared forward passes.
+        deadlines (one per question) bound the model the way resolve_sql's deadline does."""
+        max_batch_size = max_batch_size or getattr(self.config, "LLM_MAX_BATCH_SIZE", 8)
+        deadlines = deadlines or [None] * len(questions)
+        results: List[Optional[Dict]] = [None] * len(questions)
+        pending = list(range(len(questions)))
+
+        misses = []
+        for i in pending:
+            cached = self._lookup_cached_sql(questions[i])
+            if cached:
+                results[i] = {"status": "success", **cached}
+            else:
+                misses.append(i)
+        pending = misses
+
+        # Same rule tier as resolve_sql
+        if pending and (self.rules_ahead_of_model or not self._ready.is_set()):
+            unmatched = []
+            for i in pending:
+                rule_sql = self.rule_engine.match(questions[i])
+                if rule_sql:
+                    results[i] = self._cleaned_result(rule_sql, "rules")
+                else:
+                    unmatched.append(i)
+            pending = unmatched
+        if pending and not self._ready.is_set():
+            self.logger.info("Waiting for the model to finish loading")
+            latest = self._latest_deadline([deadlines[i] for i in pending])
+            ready = self._ready.wait(latest.remaining() if latest else None)
+            late = [i for i in pending if not ready or (deadlines[i] is not None and deadlines[i].expired())]
+            pending = self._fall_back(questions, late, pending, results, "model still loading")
+
+        llm = self.llm
+        if self._is_remote(llm) and pending:
+            late = [i for i in pending if self._no_time_left(deadlines[i])]
+            pending = self._fall_back(questions, late, pending, results, "no time left to generate")
+        if self._is_remote(llm) and pending:
+            latest = self._latest_deadline([deadlines[i] for i in pending])
+            try:
+                remote_results = llm.generate_sql_batch([questions[i] for i in pending],
+                                                        timeout=latest.remaining() if latest else None)
+            except (OSError, ConnectionError) as e:
+                late = [i for i in pending if deadlines[i] is not None and deadlines[i].expired()]
+                pending = self._fall_back(questions, late, pending, results, "no answer from the model backend")
+                self.logger.error(f"Model server unreachable, using the rule-based model: {str(e)}")
+                llm = self._create_mock_model()
+            else:
+                for i, result in zip(pending, remote_results):
+                    if result.get("timed_out"):
+                        result = {"status": "success",
+                                  **self._deadline_fallback(questions[i], "no answer from the model backend")}
+                    results[i] = result
+                    if result["status"] == "success" and result["source"] == "model":
+                        self._store_generated_sql(questions[i], result["sql"])
+                return results
+        if not self._is_real_model(llm):
+            for i in pending:
+                results[i] = self._cleaned_result(llm(self._build_prompt(questions[i]))[0]["generated_text"], "mock")
+            return results
+
+        for start in range(0, len(pending), max_batch_size):
+            chunk = pending[start:start + max_batch_size]
+            late = [i for i in chunk if self._no_time_left(deadlines[i])]
+            chunk = self._fall_back(questions, late, chunk, results, "no time left to generate")
+            if not chunk:
+                continue
+            # The rows share one generate() call, which runs until the latest of their deadlines
+            try:
+                raw_responses = self._run_model_batch(llm, [self._build_prompt(questions[i], llm) for i in chunk],
+                                                      deadline=self._latest_deadline([deadlines[i] for i in chunk]))
+            except Exception as e:
+                self.logger.error(f"Batch SQL generation failed: {str(e)}")
+                for i in chunk:
+                    results[i] = {"status": "error", "message": f"LLM Error: {str(e)}"}
+                continue
+            for i, (raw_response, stop_reason) in zip(chunk, raw_responses):
+                if stop_reason == "deadline":
+                    results[i] = {"status": "success",
+                                  **self._deadline_fallback(questions[i], "generation stopped at the deadline")}
+                    continue
+                if stop_reason == "incomplete":
+                    results[i] = {"status": "success", **self._grammar_fallback(questions[i])}
+                    continue
+                results[i] = self._cleaned_result(raw_response, "model")
+                if results[i]["status"] == "success":
+                    self._store_generated_sql(questions[i], results[i]["sql"])
+        return results
+
+    def _cleaned_result(self, raw_response: str, source: str) -> Dict:
+        try:
+            return {"status": "success", "sql": self._clean_sql(raw_response), "source": source}
+        except ValueError as e:
+            return {"status": "error", "message": f"LLM Error: {str(e)}"}
+
+    @staticmethod
+    def _latest_deadline(deadlines: List[Optional[Deadline]]) -> Optional[Deadline]:
+        """The deadline expiring last, or None (unbounded) if any of them is unbounded"""
+        if not deadlines or any(deadline is None or deadline.expires_at is None for deadline in deadlines):
+            return None
+        return max(deadlines, key=lambda deadline: deadline.expires_at)
+
+    def _no_time_left(self, deadline: Optional[Deadline]) -> bool:
+        """Too little of the deadline remains to start generating"""
+        remaining = deadline.remaining() if deadline else None
+        return remaining is not None and remaining < self.deadline_config.get("min_generation_seconds", 0.0)
+
+    def _fall_back(self, questions: List[str], late: List[int], pending: List[int], results: List[Optional[Dict]],
+                   reason: str) -> List[int]:
+        """Fill in _deadline_fallback results for the late indices and return the rest of pending"""
+        for i in late:
+            results[i] = {"status": "success", **self._deadline_fallback(questions[i], reason)}
+        return [i for i in pending if i not in late]
+
+    def _deadline_fallback(self, natural_language_query: str, reason: str) -> Dict:
+        """Answer from the rule-based tier (MockModel's generic query if no rule matches) when
+        the model cannot answer before the deadline; flagged so callers can tell"""
+        self.logger.warning(f"Deadline: {reason}; answering from the rule-based model")
+        with self._stats_lock:
+            self.deadline_stats["fallbacks"] += 1
+            self.deadline_stats["reasons"][reason] = self.deadline_stats["reasons"].get(reason, 0) + 1
+        rule_sql = self.rule_engine.match(natural_language_query)
+        return {"sql": self._clean_sql(rule_sql or MockModel.FALLBACK_SQL),
+                "source": "rules" if rule_sql else "mock", "deadline_exceeded": True}
+
+    def _grammar_fallback(self, natural_language_query: str) -> Dict:
+        """Answer from the rule-based tier when grammar-constrained generation produced no whole statement"""
+        self.logger.warning("Generated SQL is not a complete statement; answering from the rule-based model")
+        rule_sql = self.rule_engine.match(natural_language_query)
+        return {"sql": self._clean_sql(rule_sql or MockModel.FALLBACK_SQL), "source": "rules" if rule_sql else "mock"}
+
+    def resolve_sql(self, natural_language_query: str, deadline: Optional[Deadline] = None) -> Dict:
+        """Generate SQL and report which tier produced it: cache, template, semantic, rules, model or mock.
+        With a deadline, the model is only waited for until then (see _deadline_fallback)."""
+        cached = self._lookup_cached_sql(natural_language_query)
+        if cached:
+            return cached
+
+        # Rules are always tried first when configured, otherwise only while the model loads
+        if self.rules_ahead_of_model or not self._ready.is_set():
+            rule_sql = self.rule_engine.match(natural_language_query)
+            if rule_sql:
+                return {"sql": self._clean_sql(rule_sql), "source": "rules"}
+        if not self._ready.is_set():
+            self.logger.info("Waiting for the model to finish loading")
+            if not self._ready.wait(deadline.remaining() if deadline else None):
+                return self._deadline_fallback(natural_language_query, "model still loading")
+
+        llm = self.llm
+        remaining = deadline.remaining() if deadline else None
+        if (self._is_real_model(llm) or self._is_remote(llm)) and self._no_time_left(deadline):
+            return self._deadline_fallback(natural_language_query, "no time left to generate")
+
+        if self._is_remote(llm):
+            try:
+                result = llm.generate_sql(natural_language_query, timeout=remaining)
+            except (OSError, ConnectionError) as e:
+                if deadline is not None and deadline.expired():
+                    return self._deadline_fallback(natural_language_query, "no answer from the model backend")
+                self.logger.error(f"Model server unreachable, using the rule-based model: {str(e)}")
+                llm = self._create_mock_model()
+            else:
+                if result.get("timed_out"):
+                    return self._deadline_fallback(natural_language_query, "no answer from the model backend")
+                if result["status"] != "success":
+                    raise RuntimeError(result["message"])
+                if result["source"] == "model":
+                    self._store_generated_sql(natural_language_query, result["sql"])
+                return {"sql": result["sql"], "source": result["source"]}
 
         try:
+            prefix, suffix = self._build_prompt_parts(natural_language_query, llm)
+            prompt = prefix + suffix
             # For real models
-            if isinstance(self.llm, dict) and "tokenizer" in self.llm and "model" in self.llm:
-                inputs = self.llm["tokenizer"](prompt, return_tensors="pt").to(self.llm["model"].device)
-                outputs = self.llm["model"].generate(
-                    **inputs,
-                    max_new_tokens=100,
-                    temperature=0.1,
-                    do_sample=False
-                )
-                raw_response = self.llm["tokenizer"].decode(outputs[0], skip_special_tokens=True)
+            if self._is_real_model(llm):
+                raw_response = self._run_model(llm, prompt, prefix=prefix, deadline=deadline)
+                source = "model"
             # For mock models
             else:
-                raw_response = self.llm(prompt)[0]["generated_text"]
+                raw_response = llm(prompt)[0]["generated_text"]
+                source = "mock"
 
             # Clean and return SQL
-            return self._clean_sql(raw_response)
+            sql = self._clean_sql(raw_response)
+        except DeadlineExceeded:
+            return self._deadline_fallback(natural_language_query, "generation stopped at the deadline")
+        except IncompleteStatement:
+            return self._grammar_fallback(natural_language_query)
         except Exception as e:
             self.logger.error(f"SQL generation failed: {str(e)}")
             raise RuntimeError(f"LLM Error: {str(e)}")
 
+        if source == "model":
+            self._store_generated_sql(natural_language_query, sql)
+        return {"sql": sql, "source": source}
+
+    def generate_sql(self, natural_language_query: str) -> str:
+        """Generate SQL from natural language query"""
+        return self.resolve_sql(natural_language_query)["sql"]
+
     def _clean_sql(self, raw_sql: str) -> str:
         """Clean and validate generated SQL"""
         # Remove any trailing explanations
@@ -0,0 +1,284 @@
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+# ===========================
+# Model Artifact Module
+# ===========================
+# A local directory holding one model.safetensors file, config, tokenizer and an
+# artifact.json manifest. Weights are stored already converted to the target dtype (or
+# int8-quantized) and memory-mapped copy-on-write on load, so every process loading the
+# same file shares its pages. torch/transformers are imported only inside the functions
+# that need them.
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+WEIGHTS_FILE = "model.safetensors"
+MANIFEST_FILE = "artifact.json"
+_SAFETENSORS_DTYPES = {
+    "F64": "float64", "F32": "float32", "F16": "float16", "BF16": "bfloat16",
+    "I64": "int64", "I32": "int32", "I16": "int16", "I8": "int8", "U8": "uint8", "BOOL": "bool"
+}
+
+
+def make_fingerprint(model_name: str, dtype: str, quantize: Optional[str]) -> str:
+    """Everything that decides whether an artifact can stand in for loading model_name from the hub.
+    torch/transformers versions are included because module layouts can change between them."""
+    import torch
+    import transformers
+
+    settings = {
+        "format_version": FORMAT_VERSION,
+        "model_name": model_name,
+        "dtype": dtype,
+        "quantize": quantize,
+        "torch": ".".join(torch.__version__.split(".")[:2]),
+        "transformers": ".".join(transformers.__version__.split(".")[:2])
+    }
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def read_manifest(directory: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def artifact_matches(directory: str, model_name: str, dtype: str, quantize: Optional[str]) -> bool:
+    """True if the directory holds a complete artifact exported for exactly these settings"""
+    manifest = read_manifest(directory)
+    if not manifest or manifest.get("fingerprint") != make_fingerprint(model_name, dtype, quantize):
+        return False
+    weights = os.path.join(directory, WEIGHTS_FILE)
+    # A truncated copy would fail later inside the mmap
+    return os.path.isfile(weights) and os.path.getsize(weights) == manifest.get("weights_bytes")
+
+
+def _persistent_tensors(model, skip: List[str]) -> Dict:
+    """Float parameters and persistent buffers outside the skipped (quantized) layers,
+    each shared tensor once (tied weights)"""
+    tensors, seen = {}, set()
+    for module_name, module in model.named_modules():
+        if any(module_name == name or module_name.startswith(f"{name}.") for name in skip):
+            continue
+        prefix = f"{module_name}." if module_name else ""
+        items = list(module._parameters.items()) + [
+            (name, buffer) for name, buffer in module._buffers.items()
+            if name not in module._non_persistent_buffers_set
+        ]
+        for name, tensor in items:
+            if tensor is None or id(tensor) in seen:
+                continue
+            seen.add(id(tensor))
+            tensors[prefix + name] = tensor.detach().contiguous()
+    return tensors
+
+
+def _quantized_tensors(model) -> Tuple[Dict, List[str]]:
+    """int8 weights with their scales and zero points, plus float biases, per quantized layer"""
+    import torch
+    from torch.ao.nn.quantized.dynamic import Linear as DynamicLinear
+
+    tensors, names = {}, []
+    for name, module in model.named_modules():
+        if not isinstance(module, DynamicLinear):
+            continue
+        weight = module.weight()
+        tensors[f"{name}.weight"] = weight.int_repr().contiguous()
+        if weight.qscheme() in (torch.per_channel_affine, torch.per_channel_symmetric):
+            tensors[f"{name}.weight_scale"] = weight.q_per_channel_scales().to(torch.float64)
+            tensors[f"{name}.weight_zero_point"] = weight.q_per_channel_zero_points().to(torch.int64)
+        else:
+            tensors[f"{name}.weight_scale"] = torch.tensor([weight.q_scale()], dtype=torch.float64)
+            tensors[f"{name}.weight_zero_point"] = torch.tensor([weight.q_zero_point()], dtype=torch.int64)
+        if module.bias() is not None:
+            tensors[f"{name}.bias"] = module.bias().detach().contiguous()
+        names.append(name)
+    return tensors, names
+
+
+def export(model_name: str, directory: str, dtype: str = "float32", quantize: Optional[str] = None) -> Dict:
+    """Load model_name once from the hub, convert it and write it as a single-file artifact"""
+    import torch
+    from safetensors.torch import save_file
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    if quantize and dtype != "float32":
+        raise ValueError("Quantized artifacts are exported from float32 weights")
+    model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=getattr(torch, dtype),
+                                                 low_cpu_mem_usage=True)
+    model.eval()
+    quantized_modules = []
+    tensors = {}
+    if quantize == "int8":
+        from Quantization import quantize_int8
+        model = quantize_int8(model)
+        tensors, quantized_modules = _quantized_tensors(model)
+    elif quantize:
+        raise ValueError(f"Unsupported quantization: {quantize}")
+    tensors.update(_persistent_tensors(model, quantized_modules))
+
+    os.makedirs(directory, exist_ok=True)
+    # One file, so a single mmap covers every weight
+    save_file(tensors, os.path.join(directory, WEIGHTS_FILE), metadata={"format": "pt"})
+    model.config.save_pretrained(directory)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(directory)
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "model_name": model_name,
+        "dtype": dtype,
+        "quantize": quantize,
+        "quantized_modules": quantized_modules,
+        "fingerprint": make_fingerprint(model_name, dtype, quantize),
+        "weights_bytes": os.path.getsize(os.path.join(directory, WEIGHTS_FILE)),
+        "exported_at": datetime.now().isoformat(timespec="seconds")
+    }
+    # Written last: a directory without a manifest is never mistaken for a finished export
+    with open(os.path.join(directory, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    logger.info(f"Exported {model_name} ({quantize or dtype}, {manifest['weights_bytes'] / 2 ** 20:.0f} MB) "
+                f"to {directory}")
+    return manifest
+
+
+def mmap_state_dict(path: str) -> Dict:
+    """Tensors viewing a memory-mapped safetensors file. The mapping is private (copy-on-write):
+    pages are shared between processes and a stray in-place write stays local to its process."""
+    import torch
+
+    with open(path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_size))
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    data_start = 8 + header_size
+    state = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = getattr(torch, _SAFETENSORS_DTYPES[info["dtype"]])
+        begin, end = info["data_offsets"]
+        if begin == end:
+            state[name] = torch.empty(info["shape"], dtype=dtype)
+            continue
+        element_size = torch.empty((), dtype=dtype).element_size()
+        tensor = torch.frombuffer(buffer, dtype=dtype, count=(end - begin) // element_size,
+                                  offset=data_start + begin)
+        state[name] = tensor.view(info["shape"])
+    return state
+
+
+def _no_init_weights():
+    try:
+        from transformers.initialization import no_init_weights
+    except ImportError:
+        from transformers.modeling_utils import no_init_weights
+    return no_init_weights()
+
+
+def _install_quantized(model, state: Dict, names: List[str]):
+    """Replace each listed layer with a dynamic int8 Linear built from the stored int8 weights"""
+    import torch
+    from torch.ao.nn.quantized.dynamic import Linear as DynamicLinear
+    from Quantization import select_quantized_engine
+
+    select_quantized_engine()
+    for name in names:
+        weight = state.pop(f"{name}.weight")
+        scale = state.pop(f"{name}.weight_scale")
+        zero_point = state.pop(f"{name}.weight_zero_point")
+        bias = state.pop(f"{name}.bias", None)
+        if scale.numel() == 1:
+            qweight = torch._make_per_tensor_quantized_tensor(weight, float(scale[0]), int(zero_point[0]))
+        else:
+            qweight = torch._make_per_channel_quantized_tensor(weight, scale, zero_point, 0)
+        module = DynamicLinear(weight.shape[1], weight.shape[0], bias_=bias is not None, dtype=torch.qint8)
+        module.set_weight_bias(qweight, None if bias is None else bias.clone())
+        parent_name, _, child_name = name.rpartition(".")
+        setattr(model.get_submodule(parent_name) if parent_name else model, child_name, module)
+
+
+def load_artifact(directory: str) -> Tuple:
+    """(tokenizer, model) with every float weight backed by the shared mapping of model.safetensors.
+    Quantized layers are packed into private memory, but without ever materializing float weights."""
+    from transformers import AutoConfig, AutoModelForCausalLM, AutoTokenizer
+
+    manifest = read_manifest(directory) or {}
+    config = AutoConfig.from_pretrained(directory)
+    # Skipping initialization leaves the placeholder weights untouched, so they never become
+    # resident before being replaced by the mapped tensors
+    with _no_init_weights():
+        model = AutoModelForCausalLM.from_config(config)
+    state = mmap_state_dict(os.path.join(directory, WEIGHTS_FILE))
+    quantized = manifest.get("quantized_modules", [])
+    # Quantized layers are swapped in after the float weights are assigned, since
+    # load_state_dict expects a different key layout for them
+    quantized_state = {key: state.pop(key) for key in list(state)
+                       if key.rpartition(".")[0] in quantized}
+    result = model.load_state_dict(state, strict=False, assign=True)
+    if quantized:
+        _install_quantized(model, quantized_state, quantized)
+    # Tied weights (e.g. GPT-2's output head) are stored once and re-linked here
+    model.tie_weights()
+    skipped = _tied_output_names(model) | {f"{name}.{part}" for name in quantized for part in ("weight", "bias")}
+    missing = [key for key in result.missing_keys if key not in skipped]
+    if missing:
+        raise ValueError(f"{directory} is missing weights: {', '.join(missing[:5])}")
+    model.eval()
+    return AutoTokenizer.from_pretrained(directory), model
+
+
+def _tied_output_names(model) -> set:
+    """Parameter names of an output head sharing its weight with the input embeddings"""
+    output, embeddings = model.get_output_embeddings(), model.get_input_embeddings()
+    if output is None or output.weight is not embeddings.weight:
+        return set()
+    return {f"{name}.weight" for name, module in model.named_modules(remove_duplicate=False) if module is output}
+
+
+def target_spec(cpu_config: Dict) -> Tuple[str, Optional[str]]:
+    """(dtype, quantize) LLMProcessor loads with under these CPU_INFERENCE settings"""
+    import torch
+
+    mode = cpu_config.get("mode", "never")
+    if mode == "always" or (mode == "auto" and not torch.cuda.is_available()):
+        return "float32", cpu_config.get("quantize")
+    return "bfloat16", None
+
+
+if __name__ == "__main__":
+    from employee_config import Config
+
+    parser = argparse.ArgumentParser(description="Pre-converted model artifacts for fast cold loads")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Write an artifact for a hub model")
+    export_parser.add_argument("--model", default="gpt2-medium")
+    export_parser.add_argument("--output", default=None, help="Default: Config.MODEL_ARTIFACT['path']")
+    export_parser.add_argument("--dtype", default=None, help="Default: what CPU_INFERENCE loads")
+    export_parser.add_argument("--quantize", default=None, choices=["none", "int8"],
+                               help="Default: what CPU_INFERENCE loads")
+    info_parser = commands.add_parser("info", help="Show an artifact's manifest")
+    info_parser.add_argument("path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "export":
+        dtype, quantize = target_spec(getattr(Config, "CPU_INFERENCE", {}))
+        if args.quantize:
+            quantize = None if args.quantize == "none" else args.quantize
+            if quantize:
+                dtype = "float32"
+        output = args.output or getattr(Config, "MODEL_ARTIFACT", {}).get("path") or "model_artifact"
+        print(json.dumps(export(args.model, output, args.dtype or dtype, quantize), indent=2))
+    else:
+        print(json.dumps(read_manifest(args.path), indent=2))
@@ -0,0 +1,281 @@
+import argparse
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Callable, Dict, List, Optional
+
+from Deadline import Deadline
+
+
+# ===========================
+# Model Server Module
+# ===========================
+# One long-lived process owns the model; front-end LLMProcessor instances with
+# backend "remote" send it questions as JSON lines over localhost or a Unix socket.
+# A request's optional "timeout" (seconds) bounds both the wait and the generation.
+MAX_LINE_BYTES = 1 << 20
+
+
+def parse_address(server_config: Dict):
+    """(family, address) from Config.MODEL_SERVER: a Unix socket path if set, else host/port"""
+    socket_path = server_config.get("socket_path")
+    if socket_path and hasattr(socket, "AF_UNIX"):
+        return socket.AF_UNIX, socket_path
+    return socket.AF_INET, (server_config.get("host", "127.0.0.1"), server_config.get("port", 8765))
+
+
+class DynamicBatcher:
+    """Collects concurrent questions into batches: a batch is handed to the handler once it
+    reaches max_batch_size or max_wait_ms after its first question arrived"""
+
+    def __init__(self, handler: Callable[[List[str], List[Optional[Deadline]]], List[Dict]], max_batch_size: int = 8,
+                 max_wait_ms: float = 10.0):
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.logger = logging.getLogger(__name__)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "batches": 0, "max_batch": 0, "queue_seconds": 0.0, "batch_seconds": 0.0}
+        self._worker = threading.Thread(target=self._run, name="model-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, question: str, deadline: Optional[Deadline] = None) -> Future:
+        future = Future()
+        self._queue.put((question, deadline, future, time.time()))
+        return future
+
+    def _collect(self) -> List:
+        batch = [self._queue.get()]
+        deadline = time.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            start = time.time()
+            try:
+                results = list(self.handler([question for question, _, _, _ in batch],
+                                            [deadline for _, deadline, _, _ in batch]))
+            except Exception as e:
+                self.logger.error(f"Batch generation failed: {str(e)}")
+                results = [{"status": "error", "message": f"LLM Error: {str(e)}"}] * len(batch)
+            elapsed = time.time() - start
+            with self._lock:
+                self.stats["requests"] += len(batch)
+                self.stats["batches"] += 1
+                self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+                self.stats["queue_seconds"] += sum(start - queued for _, _, _, queued in batch)
+                self.stats["batch_seconds"] += elapsed
+            if len(results) < len(batch):
+                # A question without an answer would leave its client waiting until it times out
+                self.logger.error(f"Batch handler returned {len(results)} results for {len(batch)} questions")
+                missing = {"status": "error", "message": "LLM Error: no result for this question"}
+                results += [missing] * (len(batch) - len(results))
+            for (_, _, future, _), result in zip(batch, results):
+                future.set_result(result)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+        stats["avg_batch_size"] = stats["requests"] / stats["batches"] if stats["batches"] else 0.0
+        stats["avg_queue_ms"] = stats["queue_seconds"] * 1000 / stats["requests"] if stats["requests"] else 0.0
+        stats["pending"] = self._queue.qsize()
+        return stats
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """One connection: a JSON request per line, answered in order with a JSON line each"""
+
+    def handle(self):
+        while True:
+            line = self.rfile.readline(MAX_LINE_BYTES + 1)
+            if not line:
+                return
+            try:
+                if len(line) > MAX_LINE_BYTES:
+                    raise ValueError("Request too large")
+                response = self.server.model_server.dispatch(json.loads(line))
+            except Exception as e:
+                response = {"status": "error", "message": f"Bad request: {str(e)}"}
+            self.wfile.write(json.dumps(response, default=str).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+
+class ModelServer:
+    """Serves generate_sql / generate_sql_batch from one LLMProcessor through a DynamicBatcher"""
+
+    def __init__(self, llm_processor, server_config: Optional[Dict] = None):
+        server_config = server_config or {}
+        self.llm_processor = llm_processor
+        self.logger = logging.getLogger(__name__)
+        self.family, self.address = parse_address(server_config)
+        self.batcher = DynamicBatcher(
+            lambda questions, deadlines: llm_processor.generate_sql_batch(
+                questions, server_config.get("max_batch_size"), deadlines),
+            max_batch_size=server_config.get("max_batch_size", 8),
+            max_wait_ms=server_config.get("max_wait_ms", 10.0)
+        )
+        self._server = None
+
+    @staticmethod
+    def _result(future: Future, deadline: Deadline) -> Dict:
+        """The answer, or a timed_out error once the request's deadline has passed"""
+        try:
+            return future.result(deadline.remaining())
+        except FutureTimeout:
+            return {"status": "error", "message": f"No answer within {deadline.seconds}s", "timed_out": True}
+
+    def dispatch(self, request: Dict) -> Dict:
+        op = request.get("op")
+        deadline = Deadline(request.get("timeout"))
+        if op == "generate_sql":
+            return self._result(self.batcher.submit(request["question"], deadline), deadline)
+        if op == "generate_sql_batch":
+            # Submitted together, so they usually share one batch with other callers' questions
+            futures = [self.batcher.submit(question, deadline) for question in request["questions"]]
+            return {"status": "success", "results": [self._result(future, deadline) for future in futures]}
+        if op == "invalidate":
+            self.llm_processor.invalidate_cached_sql(request["question"])
+            return {"status": "success"}
+        if op == "status":
+            return {"status": "success", "model": self.llm_processor.get_status(),
+                    "batcher": self.batcher.get_stats()}
+        return {"status": "error", "message": f"Unknown operation: {op}"}
+
+    def serve_forever(self):
+        if self.family == socket.AF_INET:
+            self._server = _TCPServer(self.address, _RequestHandler)
+        else:
+            if os.path.exists(self.address):
+                os.unlink(self.address)  # Left behind by a previous run
+            self._server = _UnixServer(self.address, _RequestHandler)
+        self._server.model_server = self
+        self.logger.info(f"Model server listening on {self.address}")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if self.family != socket.AF_INET and os.path.exists(self.address):
+                os.unlink(self.address)
+
+    def shutdown(self):
+        if self._server:
+            self._server.shutdown()
+
+
+class ModelClient:
+    """Client for ModelServer; each thread keeps its own connection, reconnecting once on failure"""
+
+    # Extra wait past a request's timeout for the server's own timed_out answer, which keeps
+    # the connection usable instead of dropping it with the answer still in flight
+    RESPONSE_GRACE_SECONDS = 0.25
+
+    def __init__(self, server_config: Dict):
+        self.family, self.address = parse_address(server_config)
+        self.timeout = server_config.get("timeout", 120.0)
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            sock = socket.socket(self.family, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.address)
+            except OSError:
+                sock.close()
+                raise
+            conn = (sock, sock.makefile("rb"))
+            self._local.conn = conn
+        return conn
+
+    def _close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn:
+            conn[1].close()
+            conn[0].close()
+            self._local.conn = None
+
+    def request(self, payload: Dict, timeout: Optional[float] = None) -> Dict:
+        """Send one request; timeout (seconds, at most the configured one) bounds the wait for the answer"""
+        data = json.dumps(payload).encode("utf-8") + b"\n"
+        timeout = self.timeout if timeout is None else max(0.001, min(timeout, self.timeout))
+        for attempt in range(2):
+            try:
+                sock, reader = self._connection()
+                sock.settimeout(timeout)
+                sock.sendall(data)
+                line = reader.readline(MAX_LINE_BYTES + 1)
+                if not line:
+                    raise ConnectionError("Model server closed the connection")
+                return json.loads(line)
+            except (OSError, ConnectionError) as e:
+                # The late answer would arrive on this connection, so it is dropped either way
+                self._close()
+                # A pooled connection may have gone stale when the server restarted; a timeout
+                # is not retried, since the time is already used up
+                if attempt or isinstance(e, socket.timeout):
+                    raise
+        raise ConnectionError("Model server unreachable")
+
+    def _wait(self, timeout: Optional[float]) -> Optional[float]:
+        return None if timeout is None else timeout + self.RESPONSE_GRACE_SECONDS
+
+    def generate_sql(self, question: str, timeout: Optional[float] = None) -> Dict:
+        return self.request({"op": "generate_sql", "question": question, "timeout": timeout}, self._wait(timeout))
+
+    def generate_sql_batch(self, questions: List[str], timeout: Optional[float] = None) -> List[Dict]:
+        response = self.request({"op": "generate_sql_batch", "questions": questions, "timeout": timeout},
+                                self._wait(timeout))
+        if response.get("status") != "success":
+            raise RuntimeError(response.get("message", "Model server error"))
+        return response["results"]
+
+    def invalidate(self, question: str):
+        self.request({"op": "invalidate", "question": question})
+
+    def get_status(self) -> Dict:
+        return self.request({"op": "status"})
+
+
+if __name__ == "__main__":
+    from employee_config import Config
+    from LLMProcessor import LLMProcessor
+
+    parser = argparse.ArgumentParser(description="Serve SQL generation from one shared model")
+    parser.add_argument("--model", default="gpt2-medium")
+    parser.add_argument("--backend", default=None, help="transformers or mock (default: Config.LLM_BACKEND)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    config = Config()
+    backend = args.backend or config.LLM_BACKEND
+    if backend == "remote":
+        raise SystemExit("The model server needs a local backend (transformers or mock)")
+    llm_processor = LLMProcessor(args.model, config=config, backend=backend)
+    ModelServer(llm_processor, getattr(config, "MODEL_SERVER", {})).serve_forever()
@@ -0,0 +1,98 @@
+import copy
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict
+
+
+# ===========================
+# Prompt Prefix KV Cache Module
+# ===========================
+class PrefixKVCache:
+    """Keeps the past_key_values of static prompt prefixes so each query only prefills its own tokens.
+    Every question shares one prefix per schema (pruned columns go in the suffix); the most
+    recently used max_entries prefixes are kept. torch/transformers are imported only when a real model uses the cache."""
+
+    def __init__(self, max_entries: int = 1):
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self.max_entries = max(1, max_entries)
+        self._entries = OrderedDict()  # key -> (prefix_ids, past_key_values)
+        self.stats = {"builds": 0, "reuses": 0, "evictions": 0, "prefix_tokens": 0, "build_seconds": 0.0}
+
+    @staticmethod
+    def make_key(model_name: str, prefix: str) -> str:
+        """The prefix text embeds the schema, so a schema change yields a new key"""
+        return hashlib.sha256(f"{model_name}\0{prefix}".encode("utf-8")).hexdigest()
+
+    def _build(self, llm: Dict, prefix: str):
+        import torch
+
+        tokenizer, model = llm["tokenizer"], llm["model"]
+        prefix_ids = tokenizer(prefix, return_tensors="pt")["input_ids"].to(model.device)
+        with torch.no_grad():
+            outputs = model(input_ids=prefix_ids, use_cache=True)
+        return prefix_ids, outputs.past_key_values
+
+    @staticmethod
+    def _copy(past):
+        """Copy-on-write view of a prefix cache for one generate() call. A DynamicCache grows by
+        concatenating into new tensors, so copying its per-layer containers is enough: generate()
+        replaces the copy's tensors and the shared prefix keys/values are never duplicated."""
+        if isinstance(past, tuple):
+            # Legacy tuple-of-tuples format from older transformers versions is immutable
+            return past
+        if type(past).__name__ != "DynamicCache":
+            # Other cache classes may write into preallocated tensors
+            return copy.deepcopy(past)
+        view = copy.copy(past)
+        if hasattr(past, "layers"):
+            view.layers = [copy.copy(layer) for layer in past.layers]
+        else:
+            view.key_cache, view.value_cache = list(past.key_cache), list(past.value_cache)
+        return view
+
+    def prepare(self, llm: Dict, model_name: str, prefix: str, suffix: str) -> Dict:
+        """Return generate() inputs for prefix + suffix with the prefix already prefilled.
+        "cached_tokens" must be popped before the dict is passed to generate()."""
+        import torch
+
+        key = self.make_key(model_name, prefix)
+        with self._lock:
+            built = key not in self._entries
+            if built:
+                start = time.time()
+                self._entries[key] = self._build(llm, prefix)
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.stats["evictions"] += 1
+                elapsed = time.time() - start
+                prefix_tokens = self._entries[key][0].shape[1]
+                self.stats["builds"] += 1
+                self.stats["build_seconds"] += elapsed
+                self.stats["prefix_tokens"] = prefix_tokens
+                self.logger.info(f"Prefilled {prefix_tokens} prompt prefix tokens in {elapsed:.2f}s")
+            else:
+                self._entries.move_to_end(key)
+                self.stats["reuses"] += 1
+            prefix_ids, past = self._entries[key][0], self._copy(self._entries[key][1])
+
+        suffix_ids = llm["tokenizer"](suffix, add_special_tokens=False, return_tensors="pt")["input_ids"]
+        input_ids = torch.cat([prefix_ids, suffix_ids.to(prefix_ids.device)], dim=1)
+        return {
+            "input_ids": input_ids,
+            "attention_mask": torch.ones_like(input_ids),
+            "past_key_values": past,
+            # A prefix prefilled by this call saved nothing; only a reuse skips its tokens
+            "cached_tokens": 0 if built else prefix_ids.shape[1]
+        }
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries))
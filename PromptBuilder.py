@@ -0,0 +1,203 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from QueryNormalizer import LiteralExtractor
+
+
+# ===========================
+# Prompt Builder Module
+# ===========================
+# Builds the SQL prompt with only the schema columns a question refers to, in a compact
+# "Table:" / "- column (TYPE): description" layout (the one SQLGrammar parses), and keeps it
+# within a token budget counted with the model's own tokenizer.
+PREAMBLE = "You are a SQL expert. Generate PostgreSQL using this schema:"
+RULES = "Rules:\n1. Use ONLY columns/tables from schema\n2. NEVER include explanations\n3. Return PURE SQL"
+COLUMNS_HEADING = "Columns for this question:"
+# Question words that say nothing about which column is meant, aggregates included
+# ("total" would otherwise pull in total_sales_rmb for every count)
+STOPWORDS = {
+    "a", "all", "an", "and", "any", "are", "average", "by", "company", "count", "did", "do", "does",
+    "each", "for", "from", "has", "have", "highest", "how", "in", "is", "it", "list", "lowest", "many",
+    "me", "most", "of", "on", "or", "per", "show", "sum", "than", "that", "the", "their", "to", "top",
+    "total", "was", "were", "what", "which", "who", "with"
+}
+
+
+def parse_schema(schema: str) -> Dict[str, List[Dict]]:
+    """{table: [{"name", "type", "description"}]} from the layout of Config.get_db_schema()"""
+    tables, current = {}, None
+    for line in schema.splitlines():
+        line = line.strip()
+        table = re.match(r"Table:\s*(\w+)", line)
+        column = re.match(r"-\s*(\w+)\s*\(([^)]*)\)\s*:?\s*(.*)", line)
+        if table:
+            current = table.group(1)
+            tables[current] = []
+        elif column and current:
+            tables[current].append({"name": column.group(1), "type": column.group(2).strip(),
+                                    "description": " ".join(column.group(3).split())})
+    return tables
+
+
+def _stem(word: str) -> str:
+    """Crude plural/possessive folding, enough to match "meetings" to number_of_meetings"""
+    word = word.lower().replace("'s", "")
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def _terms(text: str) -> set:
+    return {_stem(word) for word in re.findall(r"[A-Za-z][A-Za-z']*", text.replace("_", " "))
+            if word.lower() not in STOPWORDS}
+
+
+class PromptBuilder:
+    """Schema-pruned, token-budgeted SQL prompts for one schema text"""
+
+    def __init__(self, schema: str, prompt_config: Optional[Dict] = None, departments: Optional[List[str]] = None):
+        prompt_config = prompt_config or {}
+        self.tables = parse_schema(schema)
+        self.prune = prompt_config.get("prune_schema", True)
+        self.max_tokens = prompt_config.get("max_prompt_tokens")
+        self.always_include = set(prompt_config.get("always_include", []))
+        self.entity_columns = prompt_config.get("entity_columns", {})
+        keywords = prompt_config.get("column_keywords", {})
+        self.logger = logging.getLogger(__name__)
+        self._literals = LiteralExtractor(departments or [])
+        # Name terms count double: a column named in the question beats one merely described.
+        # column_keywords are words the column's values use ("manager" for job_title).
+        self._column_terms = {
+            (table, column["name"]): (_terms(column["name"]),
+                                      _terms(" ".join([column["description"]] + keywords.get(column["name"], []))))
+            for table, columns in self.tables.items() for column in columns
+        }
+        self._header = self.render_header(self.tables)
+        self._lock = threading.Lock()
+        self.stats = {"prompts": 0, "measured": 0, "prompt_tokens": 0, "pruned": 0, "full_schema": 0,
+                      "over_budget": 0}
+
+    def _score(self, question: str) -> Dict[Tuple[str, str], int]:
+        question_terms = _terms(question)
+        _, literals = self._literals.extract(question)
+        entity_hits = {column for kind, _ in literals for column in self.entity_columns.get(kind, [])}
+        scores = {}
+        for key, (name_terms, description_terms) in self._column_terms.items():
+            score = 2 * len(name_terms & question_terms) + len(description_terms & question_terms)
+            if key[1] in entity_hits:
+                score += 2
+            if score:
+                scores[key] = score
+        return scores
+
+    def select(self, question: str) -> Dict[str, List[Dict]]:
+        """Tables with only the columns the question matches (plus always_include); the full
+        schema when nothing matches, since an unmatched question gives no basis for pruning"""
+        if not self.prune:
+            return self.tables
+        scores = self._score(question)
+        if not scores:
+            return self.tables
+        mentioned = {table for table in self.tables if _stem(table) in _terms(question)}
+        selection = {}
+        for table, columns in self.tables.items():
+            kept = [column for column in columns
+                    if (table, column["name"]) in scores or column["name"] in self.always_include]
+            if table in mentioned or any((table, column["name"]) in scores for column in columns):
+                selection[table] = kept
+        return selection
+
+    @staticmethod
+    def render_schema(selection: Dict[str, List[Dict]], descriptions: bool = True) -> str:
+        lines = []
+        for table, columns in selection.items():
+            lines.append(f"Table: {table}")
+            for column in columns:
+                detail = f": {column['description']}" if descriptions and column["description"] else ""
+                lines.append(f"- {column['name']} ({column['type']}){detail}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def render_header(tables: Dict[str, List[Dict]]) -> str:
+        """Every table with its column names only"""
+        return "\n".join(f"Table: {table} ({', '.join(column['name'] for column in columns)})"
+                         for table, columns in tables.items())
+
+    @staticmethod
+    def _parts(schema_text: str, question: str, columns_text: Optional[str] = None) -> Tuple[str, str]:
+        # The prefix ends after a word so byte-level BPE tokenizes prefix and suffix exactly as
+        # the whole prompt. A pruned selection goes in the suffix, so the prefix is the same for
+        # every question and its KV cache is reused.
+        prefix = f"{PREAMBLE}\n{schema_text}\n{RULES}"
+        suffix = f"\n\nQuestion: {' '.join(question.split())}\nSQL:"
+        if columns_text is not None:
+            suffix = f"\n\n{COLUMNS_HEADING}\n{columns_text}{suffix}"
+        return prefix, suffix
+
+    def build_parts(self, question: str, count_tokens: Optional[Callable[[str], int]] = None,
+                    prune: bool = True) -> Tuple[str, str]:
+        """(static prefix, per-question suffix). Without pruning the prefix holds the whole schema;
+        with it, the prefix lists every table's column names and the suffix details the selected
+        columns. With count_tokens, the prompt is cut to max_prompt_tokens by dropping column
+        descriptions, then the lowest-scoring columns."""
+        split = prune and self.prune
+
+        def parts(selection: Dict[str, List[Dict]], descriptions: bool = True) -> Tuple[str, str]:
+            if split:
+                return self._parts(self._header, question, self.render_schema(selection, descriptions))
+            return self._parts(self.render_schema(selection, descriptions), question)
+
+        selection = self.select(question) if prune else self.tables
+        full = selection is self.tables
+        prefix, suffix = parts(selection)
+        tokens = count_tokens(prefix + suffix) if count_tokens else None
+
+        if tokens is not None and self.max_tokens and tokens > self.max_tokens:
+            prefix, suffix = parts(selection, descriptions=False)
+            tokens = count_tokens(prefix + suffix)
+            scores = self._score(question)
+            ranked = sorted(((scores.get((table, column["name"]), 0), table, column)
+                             for table, columns in selection.items() for column in columns
+                             if column["name"] not in self.always_include),
+                            key=lambda item: item[0])
+            selection = {table: list(columns) for table, columns in selection.items()}
+            while tokens > self.max_tokens and ranked:
+                _, table, column = ranked.pop(0)
+                selection[table].remove(column)
+                prefix, suffix = parts(selection, descriptions=False)
+                tokens = count_tokens(prefix + suffix)
+            if tokens > self.max_tokens:
+                self.logger.warning(f"Prompt is {tokens} tokens, over the {self.max_tokens} token budget")
+
+        kept = sum(len(columns) for columns in selection.values())
+        total = sum(len(columns) for columns in self.tables.values())
+        with self._lock:
+            self.stats["prompts"] += 1
+            if tokens is not None:
+                self.stats["measured"] += 1
+                self.stats["prompt_tokens"] += tokens
+            self.stats["full_schema" if full else "pruned"] += 1
+            self.stats["over_budget"] += bool(tokens and self.max_tokens and tokens > self.max_tokens)
+        self.logger.info(f"Prompt: {tokens if tokens is not None else 'n/a'} tokens, "
+                         f"{len(prefix) + len(suffix)} chars, schema {kept}/{total} columns")
+        return prefix, suffix
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+        stats["avg_prompt_tokens"] = stats["prompt_tokens"] / stats["measured"] if stats["measured"] else 0.0
+        return stats
+
+
+def prompt_fingerprint(prompt_config: Optional[Dict] = None) -> str:
+    """Digest of the prompt layout, preamble, rules, stopwords and PROMPT settings: a change to
+    any of them changes the prompt, so cached SQL generated from the old one is dropped"""
+    template = "".join(PromptBuilder._parts("{schema}", "{question}", "{columns}"))
+    text = "\n".join([template, " ".join(sorted(STOPWORDS)), json.dumps(prompt_config or {}, sort_keys=True)])
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
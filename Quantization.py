@@ -0,0 +1,73 @@
+import logging
+from typing import Optional
+
+import torch
+from torch import nn
+
+
+# ===========================
+# CPU Quantization Module
+# ===========================
+# Imported only when a real model is loaded for CPU inference, like torch/transformers themselves.
+logger = logging.getLogger(__name__)
+
+
+def conv1d_to_linear(model: nn.Module) -> int:
+    """Replace transformers' Conv1D (GPT-2 style, weight stored as in x out) with equivalent
+    nn.Linear layers, which dynamic quantization knows how to handle. Returns the count replaced."""
+    from transformers.pytorch_utils import Conv1D
+
+    replaced = 0
+    for parent in list(model.modules()):
+        for name, child in list(parent.named_children()):
+            if isinstance(child, Conv1D):
+                in_features, out_features = child.weight.shape
+                linear = nn.Linear(in_features, out_features, bias=child.bias is not None,
+                                   dtype=child.weight.dtype, device=child.weight.device)
+                with torch.no_grad():
+                    linear.weight.copy_(child.weight.t())
+                    if child.bias is not None:
+                        linear.bias.copy_(child.bias)
+                setattr(parent, name, linear)
+                replaced += 1
+    return replaced
+
+
+def select_quantized_engine() -> str:
+    """Use the fastest quantized kernel backend this torch build supports"""
+    engines = torch.backends.quantized.supported_engines
+    for engine in ("x86", "fbgemm", "qnnpack"):
+        if engine in engines:
+            torch.backends.quantized.engine = engine
+            break
+    return torch.backends.quantized.engine
+
+
+def quantize_int8(model: nn.Module, skip_output_head: bool = True) -> nn.Module:
+    """Dynamic int8 quantization of the linear layers: weights are stored as int8 and
+    activations are quantized per call. The output head stays in float so the argmax over
+    the vocabulary, and with it the chosen tokens, moves as little as possible."""
+    select_quantized_engine()
+    converted = conv1d_to_linear(model)
+    output_head = model.get_output_embeddings() if skip_output_head else None
+    targets = {name for name, module in model.named_modules()
+               if isinstance(module, nn.Linear) and module is not output_head}
+    # In place, so the float weights are not held twice while converting
+    model = torch.ao.quantization.quantize_dynamic(model, targets, dtype=torch.qint8, inplace=True)
+    logger.info(f"Quantized {len(targets)} linear layers to int8 "
+                f"({converted} Conv1D layers converted, engine {torch.backends.quantized.engine})")
+    return model
+
+
+def prepare_cpu_model(model: nn.Module, quantize: Optional[str] = "int8",
+                      threads: Optional[int] = None) -> nn.Module:
+    """Put a float32 model in inference mode on the CPU, optionally int8-quantized"""
+    if threads:
+        torch.set_num_threads(threads)
+    model.eval()
+    if quantize == "int8":
+        model = quantize_int8(model)
+    elif quantize:
+        raise ValueError(f"Unsupported CPU quantization: {quantize}")
+    logger.info(f"CPU inference with {torch.get_num_threads()} threads, quantization: {quantize or 'none'}")
+    return model
@@ -0,0 +1,166 @@
+import heapq
+import itertools
+import logging
+import re
+import threading
+import time
+from typing import Dict, Optional
+
+import mysql.connector
+
+
+# ===========================
+# Query Guard Module
+# ===========================
+class Watchdog:
+    """Issues KILL QUERY for a connection if the statement outlives its timeout.
+    Expiry is tracked by the guard's single watchdog thread (see QueryGuard.watchdog)."""
+
+    def __init__(self, guard, connection_id: int, timeout: float):
+        self.guard = guard
+        self.connection_id = connection_id
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+        self.fired = False
+        self.finished = False
+        self._lock = threading.Lock()
+
+    def fire(self):
+        # The KILL is issued under the lock so cancel() cannot return while it is in flight
+        with self._lock:
+            if self.finished:
+                return
+            self.finished = True
+            self.fired = True
+            self.guard.kill_query(self.connection_id)
+
+    def cancel(self):
+        """Stop watching, waiting for a KILL already in flight. The connection must not be
+        reused before this returns; fired is final afterwards."""
+        with self._lock:
+            self.finished = True
+
+
+class QueryGuard:
+    """Checks SELECTs against a row budget using EXPLAIN and bounds their execution time"""
+
+    # Constructs for which an appended LIMIT does not bound the work done by the server
+    _UNBOUNDED_RE = re.compile(r"\b(GROUP\s+BY|ORDER\s+BY|DISTINCT|HAVING|COUNT|SUM|AVG|MIN|MAX)\b", re.IGNORECASE)
+    _LIMIT_RE = re.compile(r"\bLIMIT\s+\d+", re.IGNORECASE)
+    _LITERAL_RE = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"")
+
+    def __init__(self, db_config: Dict, max_rows_examined: int = 1_000_000, on_over_budget: str = "limit",
+                 auto_limit: int = 100, max_execution_ms: int = 10000, kill_grace_seconds: float = 2.0):
+        self.db_config = db_config
+        self.max_rows_examined = max_rows_examined
+        self.on_over_budget = on_over_budget
+        self.auto_limit = auto_limit
+        self.max_execution_ms = max_execution_ms
+        self.kill_grace_seconds = kill_grace_seconds
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self.stats = {"checked": 0, "allowed": 0, "limited": 0, "rejected": 0, "killed": 0, "kill_failures": 0}
+        # Watchdogs by expiry, served by one thread started on first use
+        self._watched = []
+        self._watch_ids = itertools.count()
+        self._watch_condition = threading.Condition()
+        self._watcher = None
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def check(self, query: str, plan: Optional[Dict], timeout: Optional[float] = None) -> Dict:
+        """Decide whether to run, auto-LIMIT or reject a SELECT and attach the execution time hint"""
+        self._count("checked")
+        sql = query.strip().rstrip(";").strip()
+        execution_ms = self.max_execution_ms
+        if timeout is not None:
+            execution_ms = max(1, min(execution_ms, int(timeout * 1000)))
+
+        decision = {"action": "allow", "reason": None, "timeout": execution_ms / 1000.0}
+        rows_examined = plan["rows_examined"] if plan else None
+        if rows_examined is not None and rows_examined > self.max_rows_examined:
+            bare = self._LITERAL_RE.sub("''", sql)
+            bounded_by_limit = not self._UNBOUNDED_RE.search(bare)
+
+            if bounded_by_limit and self._LIMIT_RE.search(bare):
+                pass  # The existing LIMIT already stops the scan early
+            elif bounded_by_limit and self.on_over_budget == "limit":
+                sql = f"{sql} LIMIT {self.auto_limit}"
+                decision.update({
+                    "action": "limit",
+                    "reason": f"Estimated {rows_examined} rows examined exceeds budget of "
+                              f"{self.max_rows_examined}; limited to {self.auto_limit} rows"
+                })
+            else:
+                decision.update({
+                    "action": "reject",
+                    "reason": f"Query rejected by cost guard: estimated {rows_examined} rows examined "
+                              f"exceeds budget of {self.max_rows_examined}"
+                })
+                self._count("rejected")
+                self.logger.warning(f"{decision['reason']}: {query}")
+                decision["sql"] = query
+                return decision
+
+        self._count("limited" if decision["action"] == "limit" else "allowed")
+        decision["sql"] = self.add_execution_hint(sql, execution_ms)
+        return decision
+
+    @staticmethod
+    def add_execution_hint(sql: str, execution_ms: int) -> str:
+        """Insert a MAX_EXECUTION_TIME optimizer hint after the leading SELECT"""
+        if "MAX_EXECUTION_TIME" in sql.upper():
+            return sql
+        return re.sub(r"^\s*SELECT\b", f"SELECT /*+ MAX_EXECUTION_TIME({int(execution_ms)}) */",
+                      sql, count=1, flags=re.IGNORECASE)
+
+    def watchdog(self, connection, timeout: float) -> Watchdog:
+        """Watch the running statement and kill it after timeout plus grace unless cancelled first"""
+        watchdog = Watchdog(self, connection.connection_id, timeout + self.kill_grace_seconds)
+        with self._watch_condition:
+            if self._watcher is None:
+                self._watcher = threading.Thread(target=self._watch, name="query-watchdog", daemon=True)
+                self._watcher.start()
+            heapq.heappush(self._watched, (watchdog.expires_at, next(self._watch_ids), watchdog))
+            self._watch_condition.notify()
+        return watchdog
+
+    def _watch(self):
+        while True:
+            with self._watch_condition:
+                while True:
+                    # Cancelled watchdogs are dropped once they reach the front
+                    while self._watched and self._watched[0][2].finished:
+                        heapq.heappop(self._watched)
+                    if not self._watched:
+                        self._watch_condition.wait()
+                        continue
+                    delay = self._watched[0][0] - time.monotonic()
+                    if delay <= 0:
+                        due = heapq.heappop(self._watched)[2]
+                        break
+                    self._watch_condition.wait(delay)
+            # Outside the condition, so statements can be registered while the KILL runs
+            due.fire()
+
+    def kill_query(self, connection_id: int):
+        """Abort the statement running on connection_id from a separate connection"""
+        try:
+            killer = mysql.connector.connect(**self.db_config)
+            try:
+                cursor = killer.cursor()
+                cursor.execute(f"KILL QUERY {int(connection_id)}")
+                cursor.close()
+            finally:
+                killer.close()
+            self._count("killed")
+            self.logger.warning(f"Killed query on connection {connection_id} after client-side timeout")
+        except mysql.connector.Error as err:
+            self._count("kill_failures")
+            self.logger.error(f"KILL QUERY {connection_id} failed: {err}")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return dict(self.stats)
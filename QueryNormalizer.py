@@ -0,0 +1,54 @@
+import re
+from typing import List, Tuple
+
+
+# ===========================
+# Query Normalization Module
+# ===========================
+class QueryNormalizer:
+    @staticmethod
+    def clean(query: str) -> str:
+        """Remove numbering and quotes from a typed or listed question"""
+        query = re.sub(r"^\d+\.\s*", "", query.strip())
+        return query.replace("'", "").replace('"', '')
+
+    @staticmethod
+    def cache_key(query: str) -> str:
+        """Cleaned question, lowercased, with whitespace collapsed and trailing punctuation dropped"""
+        query = QueryNormalizer.clean(query).lower()
+        query = re.sub(r"\s+", " ", query).strip()
+        return query.rstrip("?.! ")
+
+
+class LiteralExtractor:
+    """Finds the literal values in a question: dates, known departments, capitalized names and numbers"""
+
+    DATE_RE = r"\b\d{4}-\d{2}-\d{2}\b"
+    NAME_RE = r"\b[A-Z][a-z]+(?: [A-Z][a-z]+)+\b"
+    NUMBER_RE = re.compile(r"(?<![\w.-])\d+(?:\.\d+)?(?![\w.-])")
+
+    def __init__(self, departments: List[str]):
+        # Alternatives are tried in order at each position: dates before numbers, and known
+        # departments (longest first) before generic capitalized names. A department matches
+        # in any case only when followed by "department", so "sales revenue" stays literal text.
+        departments = sorted(departments, key=len, reverse=True)
+        self._canonical = {d.lower(): d for d in departments}
+        alternatives = [f"(?P<date>{self.DATE_RE})"]
+        if departments:
+            names = "|".join(re.escape(d) for d in departments)
+            alternatives.append(rf"(?P<dept>\b(?:(?i:{names})(?=\s+(?i:department))|(?:{names}))\b)")
+        alternatives += [f"(?P<name>{self.NAME_RE})", f"(?P<num>{self.NUMBER_RE.pattern})"]
+        self._literal_re = re.compile("|".join(alternatives))
+
+    def extract(self, question: str) -> Tuple[str, List[Tuple[str, str]]]:
+        """Return the question shape with literals replaced by slot markers, and the literals"""
+        literals = []
+
+        def slot(match):
+            kind = match.lastgroup
+            value = match.group(0)
+            literals.append((kind, self._canonical[value.lower()] if kind == "dept" else value))
+            return f"<{kind}>"
+
+        shape = self._literal_re.sub(slot, QueryNormalizer.clean(question))
+        return QueryNormalizer.cache_key(shape), literals
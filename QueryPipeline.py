@@ -0,0 +1,228 @@
+import logging
+import queue
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from Deadline import Deadline
+
+# ===========================
+# Query Pipeline Module
+# ===========================
+# SQL generation, query execution and summarization of a question list run as separate
+# stages joined by bounded queues: the database works on earlier questions while the model
+# generates SQL for later ones, so throughput approaches that of the slowest stage.
+_DONE = object()  # End-of-input marker passed down the stages
+
+
+class QueryPipeline:
+    """Runs a list of questions through a QueryProcessor's stages and yields results in input order.
+    One generation thread (the model is a single resource) feeds db_workers execution threads,
+    which feed summary_workers summarization threads."""
+
+    def __init__(self, query_processor, pipeline_config: Optional[Dict] = None, batch_size: int = 8):
+        pipeline_config = pipeline_config or {}
+        self.query_processor = query_processor
+        self.batch_size = pipeline_config.get("generation_batch_size") or batch_size
+        self.db_workers = max(1, pipeline_config.get("db_workers", 4))
+        self.summary_workers = max(1, pipeline_config.get("summary_workers", 1))
+        self.queue_size = max(1, pipeline_config.get("queue_size", 16))
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self.stats = {"queries": 0, "seconds": 0.0, "busy_seconds": {}}
+
+    def _put(self, target: queue.Queue, item, stop: threading.Event):
+        # A full queue blocks the stage until the next one catches up, unless the caller stopped reading
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, source: queue.Queue, stop: threading.Event):
+        while not stop.is_set():
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _run_stage(self, stage, stop: threading.Event, *args):
+        try:
+            stage(*args)
+        except BaseException as e:
+            # The other stages may be blocked on this one, so the whole run is stopped
+            self.logger.error(f"Pipeline stage {threading.current_thread().name} failed: {e!r}")
+            stop.set()
+
+    def _busy(self, busy: Dict, stage: str, start: float):
+        with self._lock:
+            busy[stage] = busy.get(stage, 0.0) + time.time() - start
+
+    @staticmethod
+    def _tag(result: Dict, generation: Dict) -> Dict:
+        """Mark a result with the tier that produced its SQL, as handle_standard_query does"""
+        result["sql_source"] = generation["source"]
+        if generation.get("deadline_exceeded"):
+            result["deadline_exceeded"] = True
+        return result
+
+    def _generate(self, queries: List[str], deadline_seconds: Optional[float], to_execute: queue.Queue,
+                  done: queue.Queue, stop: threading.Event, busy: Dict):
+        processor = self.query_processor
+        reserve = processor.deadline_config.get("execution_reserve_seconds", 0.0)
+        try:
+            for start in range(0, len(queries), self.batch_size):
+                if stop.is_set():
+                    return
+                chunk = list(range(start, min(start + self.batch_size, len(queries))))
+                # A question's deadline starts when it enters the pipeline; generation has to
+                # leave execution_reserve_seconds of it for running the query
+                deadlines = {i: Deadline(deadline_seconds) for i in chunk}
+                standard = []
+                for i in chunk:
+                    try:
+                        knowledge = processor.is_knowledge_query(queries[i])
+                    except Exception as e:
+                        processor.logger.error(f"Unexpected error processing query: {str(e)}")
+                        done.put((i, {"status": "error", "message": f"System error: {str(e)}"}))
+                        continue
+                    if knowledge:
+                        # Knowledge questions run their own lookups in the execution stage
+                        self._put(to_execute, ("knowledge", i, None, deadlines[i]), stop)
+                    else:
+                        standard.append(i)
+
+                began = time.time()
+                try:
+                    generated = processor.llm_processor.generate_sql_batch(
+                        [queries[i] for i in standard], deadlines=[deadlines[i].reserve(reserve) for i in standard])
+                except Exception as e:
+                    processor.logger.error(f"Batch SQL generation failed: {str(e)}")
+                    for i in standard:
+                        done.put((i, {"status": "error", "message": f"SQL generation failed: {str(e)}"}))
+                    continue
+                finally:
+                    self._busy(busy, "generation", began)
+
+                for i, generation in zip(standard, generated):
+                    if generation["status"] == "error":
+                        done.put((i, {"status": "error", "message": f"SQL generation failed: {generation['message']}"}))
+                    else:
+                        processor.logger.info(f"Generated SQL ({generation['source']}): {generation['sql']}")
+                        self._put(to_execute, ("sql", i, generation, deadlines[i]), stop)
+        finally:
+            # Sent even if this stage fails, so the stages after it still shut down
+            for _ in range(self.db_workers):
+                self._put(to_execute, _DONE, stop)
+
+    def _execute(self, queries: List[str], to_execute: queue.Queue, to_summarize: queue.Queue, done: queue.Queue,
+                 stop: threading.Event, busy: Dict, remaining_workers: List[int]):
+        processor = self.query_processor
+        try:
+            while True:
+                item = self._get(to_execute, stop)
+                if item is _DONE:
+                    break
+                kind, i, generation, deadline = item
+                began = time.time()
+                try:
+                    if kind == "knowledge":
+                        done.put((i, processor.handle_knowledge_query(queries[i], deadline)))
+                        continue
+                    db_results = processor.run_generated_sql(queries[i], generation["sql"], deadline)
+                    if db_results.get("status") == "error":
+                        done.put((i, self._tag(dict(db_results), generation)))
+                    else:
+                        self._put(to_summarize, (i, generation, db_results, deadline), stop)
+                except Exception as e:
+                    processor.logger.error(f"Unexpected error processing query: {str(e)}")
+                    done.put((i, {"status": "error", "message": f"System error: {str(e)}"}))
+                finally:
+                    self._busy(busy, "execution", began)
+        finally:
+            # The last execution worker to finish ends the summary stage
+            with self._lock:
+                remaining_workers[0] -= 1
+                last = remaining_workers[0] == 0
+            if last:
+                for _ in range(self.summary_workers):
+                    self._put(to_summarize, _DONE, stop)
+
+    def _summarize(self, queries: List[str], to_summarize: queue.Queue, done: queue.Queue,
+                   stop: threading.Event, busy: Dict):
+        processor = self.query_processor
+        while True:
+            item = self._get(to_summarize, stop)
+            if item is _DONE:
+                return
+            i, generation, db_results, deadline = item
+            began = time.time()
+            try:
+                result = self._tag(processor.summarize_results(queries[i], generation["sql"], db_results, deadline),
+                                   generation)
+            except Exception as e:
+                processor.logger.error(f"Unexpected error processing query: {str(e)}")
+                result = {"status": "error", "message": f"System error: {str(e)}"}
+            self._busy(busy, "summary", began)
+            done.put((i, result))
+
+    def run(self, queries: List[str], deadline_seconds: Optional[float] = None) -> Iterator[Dict]:
+        """Yield one result per question, in input order, each as soon as it and all before it are done.
+        Each question has deadline_seconds (None: no limit) from entering the pipeline."""
+        start = time.time()
+        to_execute = queue.Queue(maxsize=self.queue_size)
+        to_summarize = queue.Queue(maxsize=self.queue_size)
+        done = queue.Queue()  # Holds at most one result per question
+        stop = threading.Event()
+        busy = {}
+        threads = [threading.Thread(target=self._run_stage, name="pipeline-generation", daemon=True,
+                                    args=(self._generate, stop, queries, deadline_seconds, to_execute, done, stop,
+                                          busy))]
+        remaining_workers = [self.db_workers]
+        threads += [threading.Thread(target=self._run_stage, name=f"pipeline-execution-{n}", daemon=True,
+                                     args=(self._execute, stop, queries, to_execute, to_summarize, done, stop, busy,
+                                           remaining_workers))
+                    for n in range(self.db_workers)]
+        threads += [threading.Thread(target=self._run_stage, name=f"pipeline-summary-{n}", daemon=True,
+                                     args=(self._summarize, stop, queries, to_summarize, done, stop, busy))
+                    for n in range(self.summary_workers)]
+        for thread in threads:
+            thread.start()
+
+        # Results arrive in completion order; later ones wait here until their turn
+        pending, next_index = {}, 0
+        try:
+            while next_index < len(queries):
+                try:
+                    i, result = done.get(timeout=0.5)
+                    pending[i] = result
+                except queue.Empty:
+                    # Once every stage has exited, a result not in done by now can no longer arrive
+                    if not any(thread.is_alive() for thread in threads) and done.empty():
+                        lost = [j for j in range(next_index, len(queries)) if j not in pending]
+                        self.logger.error(f"Pipeline stages exited without answering {len(lost)} queries")
+                        for j in lost:
+                            pending[j] = {"status": "error", "message": "System error: query was not processed"}
+                while next_index in pending:
+                    yield pending.pop(next_index)
+                    next_index += 1
+        finally:
+            # Also reached when the caller stops iterating early
+            stop.set()
+            elapsed = time.time() - start
+            with self._lock:
+                self.stats["queries"] += next_index
+                self.stats["seconds"] += elapsed
+                for stage, seconds in busy.items():
+                    self.stats["busy_seconds"][stage] = self.stats["busy_seconds"].get(stage, 0.0) + seconds
+            stages = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in busy.items())
+            self.logger.info(f"Pipeline processed {next_index}/{len(queries)} queries in {elapsed:.2f}s "
+                             f"(busy: {stages or 'none'})")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats, busy_seconds=dict(self.stats["busy_seconds"]))
+        stats["queries_per_second"] = stats["queries"] / stats["seconds"] if stats["seconds"] else 0.0
+        return stats
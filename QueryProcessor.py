@@ -58,13 +58,22 @@
 #         return any(kw in query.lower() for kw in keywords)
 
 import logging
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional
+
+from Deadline import Deadline
+from QueryPipeline import QueryPipeline
+
+# Default of deadline_seconds, so that an explicit None can mean "no limit"
+_DEFAULT_DEADLINE = object()
 
 
 class QueryProcessor:
     def __init__(self, db_manager, llm_processor):
         self.db_manager = db_manager
         self.llm_processor = llm_processor
+        self.deadline_config = getattr(llm_processor.config, "DEADLINES", {})
+        self.pipeline = QueryPipeline(self, getattr(llm_processor.config, "PIPELINE", {}),
+                                      getattr(llm_processor.config, "LLM_MAX_BATCH_SIZE", 8))
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.INFO)
 
@@ -74,18 +83,28 @@ class QueryProcessor:
         handler.setFormatter(formatter)
         self.logger.addHandler(handler)
 
-    def process_query(self, natural_language_query: str) -> Dict:
-        """Process natural language query end-to-end"""
+    def _deadline_seconds(self, deadline_seconds) -> Optional[float]:
+        """The configured request limit when the caller gave none; an explicit None means no limit"""
+        if deadline_seconds is _DEFAULT_DEADLINE:
+            return self.deadline_config.get("request_seconds")
+        return deadline_seconds
+
+    def process_query(self, natural_language_query: str, deadline_seconds: Optional[float] = _DEFAULT_DEADLINE,
+                      stream: bool = False) -> Dict:
+        """Process natural language query end-to-end, within deadline_seconds
+        (default Config.DEADLINES['request_seconds']; None means no limit).
+        With stream, rows are fetched as the result's "data" is iterated (see stream_rows)."""
         self.logger.info(f"Processing query: {natural_language_query}")
+        deadline = Deadline(self._deadline_seconds(deadline_seconds))
 
         try:
             # Special handling for knowledge-based queries
             if self.is_knowledge_query(natural_language_query):
                 self.logger.info("Identified as knowledge query")
-                return self.handle_knowledge_query(natural_language_query)
+                return self.handle_knowledge_query(natural_language_query, deadline)
 
             # Standard query processing
-            return self.handle_standard_query(natural_language_query)
+            return self.handle_standard_query(natural_language_query, deadline, stream)
 
         except Exception as e:
             self.logger.error(f"Unexpected error processing query: {str(e)}")
@@ -94,12 +113,26 @@ class QueryProcessor:
                 "message": f"System error: {str(e)}"
             }
 
-    def handle_knowledge_query(self, query: str) -> Dict:
+    def process_queries(self, queries: List[str],
+                        deadline_seconds: Optional[float] = _DEFAULT_DEADLINE) -> List[Dict]:
+        """Process several queries, returning their results in order (see iter_queries)"""
+        return list(self.iter_queries(queries, deadline_seconds))
+
+    def iter_queries(self, queries: List[str],
+                     deadline_seconds: Optional[float] = _DEFAULT_DEADLINE) -> Iterator[Dict]:
+        """Process several queries as a pipeline: SQL is generated in batches while earlier
+        queries execute and are summarized. Results are yielded in input order as they complete.
+        Each query gets deadline_seconds (default as in process_query) from entering the pipeline."""
+        self.logger.info(f"Processing batch of {len(queries)} queries")
+        return self.pipeline.run(queries, self._deadline_seconds(deadline_seconds))
+
+    def handle_knowledge_query(self, query: str, deadline: Optional[Deadline] = None) -> Dict:
         """Process knowledge-based queries"""
         try:
             summary = self.llm_processor.handle_knowledge_query(
                 query,
-                self.db_manager
+                self.db_manager,
+                deadline
             )
             return {
                 "status": "success",
@@ -113,12 +146,17 @@ class QueryProcessor:
                 "message": f"Knowledge processing error: {str(e)}"
             }
 
-    def handle_standard_query(self, query: str) -> Dict:
+    def handle_standard_query(self, query: str, deadline: Optional[Deadline] = None, stream: bool = False) -> Dict:
         """Process standard database queries"""
         try:
-            # Generate SQL query
-            sql_query = self.llm_processor.generate_sql(query)
-            self.logger.info(f"Generated SQL: {sql_query}")
+            # Generate SQL query (possibly served from the SQL cache). Generation has to finish
+            # early enough to leave execution_reserve_seconds for running the query.
+            generation_deadline = None
+            if deadline:
+                generation_deadline = deadline.reserve(self.deadline_config.get("execution_reserve_seconds", 0.0))
+            generation = self.llm_processor.resolve_sql(query, deadline=generation_deadline)
+            sql_query = generation["sql"]
+            self.logger.info(f"Generated SQL ({generation['source']}): {sql_query}")
         except Exception as e:
             self.logger.error(f"SQL generation failed: {str(e)}")
             return {
@@ -126,25 +164,76 @@ class QueryProcessor:
                 "message": f"SQL generation failed: {str(e)}"
             }
 
-        # Execute SQL
-        db_results = self.db_manager.execute_query(sql_query)
+        result = self.execute_generated_sql(query, sql_query, deadline, stream)
+        result["sql_source"] = generation["source"]
+        if generation.get("deadline_exceeded"):
+            # Answered by the rule-based tier because the model could not make the deadline
+            result["deadline_exceeded"] = True
+        return result
+
+    def execute_generated_sql(self, query: str, sql_query: str, deadline: Optional[Deadline] = None,
+                              stream: bool = False) -> Dict:
+        """Execute generated SQL and summarize the results"""
+        db_results = self.run_generated_sql(query, sql_query, deadline, stream)
+        if db_results.get("status") == "error":
+            return db_results
+        return self.summarize_results(query, sql_query, db_results, deadline)
+
+    def run_generated_sql(self, query: str, sql_query: str, deadline: Optional[Deadline] = None,
+                          stream: bool = False) -> Dict:
+        """Execute generated SQL; returns the collected rows (or, with stream, the first batch and
+        an iterator over the rest), or the error response for the query"""
+        # Execute SQL, reading at most MAX_RESULT_ROWS rows from the server; the query guard
+        # cancels it once the deadline passes
+        timeout = deadline.remaining() if deadline else None
+        db_results = self.db_manager.execute_query_stream(sql_query, timeout=timeout)
+        if db_results.get("type") == "stream":
+            try:
+                db_results = self.stream_rows(db_results) if stream else self.collect_stream(db_results)
+            except Exception as e:
+                self.logger.error(f"Database error while streaming results: {str(e)}")
+                return {
+                    "status": "error",
+                    "message": f"Database error: {str(e)}",
+                    "sql": sql_query
+                }
 
         # Handle database errors
         if db_results.get("status") == "error":
             error_msg = db_results.get("message", "Unknown database error")
             self.logger.error(f"Database error: {error_msg}")
+            if db_results.get("timed_out"):
+                # Cancelled for time rather than rejected, so the SQL itself may be fine
+                return {
+                    "status": "error",
+                    "message": error_msg,
+                    "sql": sql_query,
+                    "deadline_exceeded": bool(deadline and deadline.expired())
+                }
+            # Do not keep serving cached SQL that the database rejects
+            self.llm_processor.invalidate_cached_sql(query)
             return {
                 "status": "error",
                 "message": error_msg,
                 "sql": sql_query
             }
 
-        # Generate summary
-        try:
-            summary = self.llm_processor.generate_summary(query, db_results)
-        except Exception as e:
-            self.logger.warning(f"Summary generation failed: {str(e)}")
-            summary = "Could not generate summary - showing raw results"
+        return db_results
+
+    def summarize_results(self, query: str, sql_query: str, db_results: Dict,
+                          deadline: Optional[Deadline] = None) -> Dict:
+        """Build the success response for executed SQL"""
+        # A streamed result is summarized from the rows read so far, leaving "data" unconsumed
+        read = dict(db_results, data=db_results["preview"]) if "preview" in db_results else db_results
+        # Generate summary; past the deadline only the row count is reported
+        if deadline and deadline.expired():
+            summary = f"Found {read.get('rowcount', 0)} matching records"
+        else:
+            try:
+                summary = self.llm_processor.generate_summary(query, read)
+            except Exception as e:
+                self.logger.warning(f"Summary generation failed: {str(e)}")
+                summary = "Could not generate summary - showing raw results"
 
         # Prepare result
         return {
@@ -152,7 +241,58 @@ class QueryProcessor:
             "sql": sql_query,
             "data": db_results.get("data", []),
             "summary": summary,
-            "rowcount": db_results.get("rowcount", 0)
+            "rowcount": db_results.get("rowcount", 0),
+            "truncated": db_results.get("truncated", False),
+            "guard": db_results.get("guard"),
+            **({"stream": db_results["stream"]} if "stream" in db_results else {})
+        }
+
+    def collect_stream(self, db_results: Dict) -> Dict:
+        """Consume a streamed result batch by batch into a capped row list"""
+        stream = db_results["data"]
+        rows = []
+        with stream:
+            for batch in stream.batches():
+                rows.extend(batch)
+
+        if stream.truncated:
+            self.logger.info(f"Result truncated at {stream.rowcount} rows")
+        return {
+            "status": "success",
+            "type": "data",
+            "columns": db_results["columns"],
+            "data": rows,
+            "rowcount": stream.rowcount,
+            "truncated": stream.truncated or "guard" in db_results,
+            "cached": db_results.get("cached", False),
+            "guard": db_results.get("guard")
+        }
+
+    def stream_rows(self, db_results: Dict) -> Dict:
+        """Lazy counterpart of collect_stream for callers that iterate the rows: only the first
+        batch is read now (as "preview"); "data" yields it and then fetches the rest batch by
+        batch. rowcount/truncated cover the preview; the ResultStream under "stream" has the
+        final values once "data" is exhausted. Closing "data" early releases the connection."""
+        stream = db_results["data"]
+        batches = stream.batches()
+        first = next(batches, [])
+
+        def rows() -> Iterator[Dict]:
+            yield from first
+            for batch in batches:
+                yield from batch
+
+        return {
+            "status": "success",
+            "type": "stream",
+            "columns": db_results["columns"],
+            "data": rows(),
+            "preview": first,
+            "stream": stream,
+            "rowcount": len(first),
+            "truncated": not stream.exhausted or stream.truncated or "guard" in db_results,
+            "cached": db_results.get("cached", False),
+            "guard": db_results.get("guard")
         }
 
     # In QueryProcessor.py - add to is_knowledge_query()
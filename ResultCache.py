@@ -0,0 +1,122 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+# ===========================
+# Result Cache Module
+# ===========================
+class ResultCache:
+    """LRU cache of SELECT results with a byte budget, a TTL and data-version invalidation"""
+
+    # String literals are kept verbatim; everything else is whitespace-normalized
+    _LITERAL_RE = re.compile(r"('(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\")")
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, ttl_seconds: float = 300):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max(1, max_bytes // 8)
+        self.ttl_seconds = ttl_seconds
+        self.version = None
+        self._entries = OrderedDict()  # key -> (result, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+            "oversized": 0
+        }
+
+    @classmethod
+    def normalize_sql(cls, sql: str) -> str:
+        """Collapse whitespace and drop the trailing semicolon outside string literals"""
+        parts = cls._LITERAL_RE.split(sql.strip().rstrip(";").strip())
+        normalized = []
+        for i, part in enumerate(parts):
+            if i % 2 == 1:
+                normalized.append(part)
+                continue
+            part = re.sub(r"\s+", " ", part)
+            part = re.sub(r"\s*([=<>!,()+*/])\s*", r"\1", part)
+            normalized.append(part)
+        return "".join(normalized).strip()
+
+    def get(self, sql: str) -> Optional[Dict]:
+        """Return a cached result for the statement, or None"""
+        key = self.normalize_sql(sql)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+
+            result, size, expires_at = entry
+            if time.monotonic() > expires_at:
+                self._remove(key)
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return result
+
+    def put(self, sql: str, result: Dict):
+        """Store a successful result, evicting least recently used entries to fit the budget"""
+        key = self.normalize_sql(sql)
+        size = len(json.dumps(result.get("data", []), default=str))
+        if size > self.max_entry_bytes:
+            with self._lock:
+                self.stats["oversized"] += 1
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            while self._entries and self._bytes + size > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.stats["evictions"] += 1
+
+            self._entries[key] = (result, size, time.monotonic() + self.ttl_seconds)
+            self._bytes += size
+            self.stats["stores"] += 1
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def set_version(self, version):
+        """Record the current data version, dropping all entries if it changed"""
+        with self._lock:
+            if version == self.version:
+                return
+            self.version = version
+        self.invalidate()
+
+    def invalidate(self):
+        """Drop all cached results"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.stats["invalidations"] += 1
+
+    def get_stats(self) -> Dict:
+        """Return hit/miss metrics and current usage"""
+        with self._lock:
+            stats = dict(self.stats)
+            lookups = stats["hits"] + stats["misses"]
+            stats.update({
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+                "data_version": self.version
+            })
+        return stats
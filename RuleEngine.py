@@ -0,0 +1,110 @@
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+from QueryNormalizer import QueryNormalizer
+
+
+# ===========================
+# Rule-Based SQL Engine Module
+# ===========================
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sql_rules.json")
+
+
+class RuleEngine:
+    """Maps question shapes to fixed SQL using rules compiled once, in priority order, behind a keyword prefilter"""
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, rules: List[Dict]):
+        # Highest priority first; ties keep file order (sorted is stable)
+        self.rules = sorted(rules, key=lambda r: -r["priority"])
+        self._index = []
+        for rule in self.rules:
+            pattern = re.compile(rule["pattern"])
+            # Literal pieces between ".*" must all occur in the question, which rejects most
+            # rules with plain substring checks before any regex runs
+            pieces = [piece for piece in rule["pattern"].split(".*") if piece]
+            keywords = tuple(piece for piece in pieces if re.fullmatch(r"[a-z0-9 _-]+", piece))
+            self._index.append((keywords, pattern, rule))
+
+        self._lock = threading.Lock()
+        self.hits = {rule["name"]: 0 for rule in self.rules}
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "RuleEngine":
+        """Load rules from a JSON file; relative paths resolve next to this module"""
+        path = path or DEFAULT_RULES_PATH
+        if not os.path.isabs(path):
+            path = os.path.join(os.path.dirname(DEFAULT_RULES_PATH), path)
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("format_version") != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported rules format {data.get('format_version')} in {path}")
+
+        names = [rule["name"] for rule in data["rules"]]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"Duplicate rule names in {path}: {', '.join(duplicates)}")
+        engine = cls(data["rules"])
+        logging.getLogger(__name__).info(f"Loaded {len(engine.rules)} SQL rules from {path}")
+        return engine
+
+    @staticmethod
+    def normalize(question: str) -> str:
+        return QueryNormalizer.clean(question).lower()
+
+    def match_rule(self, question: str) -> Optional[Dict]:
+        """Return the highest-priority rule matching the question, or None"""
+        text = self.normalize(question)
+        matched = None
+        for keywords, pattern, rule in self._index:
+            if all(keyword in text for keyword in keywords) and pattern.search(text):
+                matched = rule
+                break
+        with self._lock:
+            if matched is None:
+                self.misses += 1
+            else:
+                self.hits[matched["name"]] += 1
+        return matched
+
+    def match(self, question: str) -> Optional[str]:
+        """Return the SQL of the highest-priority matching rule, or None"""
+        rule = self.match_rule(question)
+        return rule["sql"] if rule else None
+
+    def get_stats(self) -> Dict:
+        """Per-rule hit counters, most used first"""
+        with self._lock:
+            hits = dict(sorted(self.hits.items(), key=lambda item: -item[1]))
+            total = sum(hits.values())
+            lookups = total + self.misses
+            return {
+                "rules": len(self.rules),
+                "hits": total,
+                "misses": self.misses,
+                "hit_rate": total / lookups if lookups else 0.0,
+                "rule_hits": hits
+            }
+
+
+class MockModel:
+    """Stand-in for a real model: answers from the rule engine, with a generic fallback"""
+
+    FALLBACK_SQL = "SELECT * FROM employee_activities LIMIT 5;"
+
+    def __init__(self, engine: RuleEngine):
+        self.engine = engine
+
+    def __call__(self, prompt, **kwargs):
+        sql = self.match(prompt)
+        return [{"generated_text": sql or self.FALLBACK_SQL}]
+
+    def match(self, prompt) -> Optional[str]:
+        """Return the SQL of the first matching rule, or None"""
+        return self.engine.match(prompt)
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from QueryNormalizer import QueryNormalizer
+
+
+# ===========================
+# Generated SQL Cache Module
+# ===========================
+class SQLCache:
+    """Two-tier cache of generated SQL: an in-memory LRU in front of a SQLite file"""
+
+    # Bump when the cache key or stored format changes
+    FORMAT_VERSION = "1"
+
+    def __init__(self, path: str, version: str, memory_entries: int = 1024):
+        self.path = path
+        self.version = version
+        self.memory_entries = memory_entries
+        self.logger = logging.getLogger(__name__)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "invalidations": 0}
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+                         CREATE TABLE IF NOT EXISTS sql_cache
+                         (
+                             question   TEXT NOT NULL,
+                             version    TEXT NOT NULL,
+                             sql        TEXT NOT NULL,
+                             created_at REAL NOT NULL,
+                             PRIMARY KEY (question, version)
+                         )
+                         """)
+        self._purge_stale()
+
+    @classmethod
+    def make_version(cls, model_name: str, backend: str, schema: str, prompt: str = "",
+                     generation: Optional[Dict] = None) -> str:
+        """Fingerprint of everything that determines the generated SQL; prompt is a digest of
+        the prompt template and pruning settings, generation the decoding settings"""
+        text = "\n".join([cls.FORMAT_VERSION, model_name, backend, schema, prompt,
+                          json.dumps(generation or {}, sort_keys=True)])
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+    def _purge_stale(self):
+        with self._lock:
+            deleted = self._db.execute("DELETE FROM sql_cache WHERE version != ?", (self.version,)).rowcount
+            self._db.commit()
+        if deleted:
+            self.logger.info(f"Dropped {deleted} cached SQL entries from older model/schema versions")
+
+    def set_version(self, version: str):
+        """Switch to a new model/schema version, discarding entries of the old one"""
+        if version == self.version:
+            return
+        with self._lock:
+            self.version = version
+            self._memory.clear()
+            self.stats["invalidations"] += 1
+        self._purge_stale()
+
+    def get(self, question: str) -> Optional[str]:
+        key = QueryNormalizer.cache_key(question)
+        with self._lock:
+            sql = self._memory.get(key)
+            if sql is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return sql
+
+            row = self._db.execute(
+                "SELECT sql FROM sql_cache WHERE question = ? AND version = ?", (key, self.version)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+
+            self.stats["disk_hits"] += 1
+            self._remember(key, row[0])
+            return row[0]
+
+    def put(self, question: str, sql: str):
+        key = QueryNormalizer.cache_key(question)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sql_cache (question, version, sql, created_at) VALUES (?, ?, ?, ?)",
+                (key, self.version, sql, time.time())
+            )
+            self._db.commit()
+            self._remember(key, sql)
+            self.stats["stores"] += 1
+
+    def invalidate(self, question: str):
+        """Forget the SQL for one question, e.g. after it failed to execute"""
+        key = QueryNormalizer.cache_key(question)
+        with self._lock:
+            self._memory.pop(key, None)
+            self._db.execute("DELETE FROM sql_cache WHERE question = ? AND version = ?", (key, self.version))
+            self._db.commit()
+            self.stats["invalidations"] += 1
+
+    def _remember(self, key: str, sql: str):
+        self._memory[key] = sql
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+            stats.update({
+                "memory_entries": len(self._memory),
+                "hit_rate": (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0,
+                "version": self.version
+            })
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,279 @@
+import re
+from typing import Dict, List, Optional
+
+
+# ===========================
+# SQL Grammar Module
+# ===========================
+class IncompleteStatement(Exception):
+    """Grammar-constrained generation ended without a statement the grammar accepts"""
+
+
+class SQLGrammar:
+    """Incremental check of generated text against a single-table SELECT grammar whose
+    identifiers are limited to the tables and columns of the schema (plus AS aliases)"""
+
+    CLAUSES = ["select", "from", "where", "group", "having", "order", "limit"]
+    KEYWORDS = {"distinct", "and", "or", "not", "in", "is", "like", "between", "by", "as", "asc", "desc", "null",
+                "case", "when", "then", "else", "end", "interval", "day", "week", "month", "year"}
+    FUNCTIONS = {"count", "sum", "avg", "min", "max", "any_value", "round", "coalesce", "lower", "upper",
+                 "concat", "date", "year", "month", "week", "datediff", "date_sub", "date_add", "curdate", "now"}
+    # Keywords that close the expression before them ("x DESC", "INTERVAL 1 DAY")
+    TERMINALS = {"asc", "desc", "end", "day", "week", "month", "year"}
+    # Keywords that join two expressions, and ones that can only start one
+    INFIX = {"and", "or", "like", "between", "in", "is", "then", "else"}
+    PREFIX = {"case", "interval"}
+    # Longest whitespace run accepted (with at most one newline) and longest string literal
+    MAX_WHITESPACE = 12
+    MAX_STRING = 64
+    MAX_DEPTH = 4
+    MAX_NUMBER = 12
+
+    # An unterminated string runs to the end of the text. It is tried first so that a
+    # doubled quote being typed ('it'' on the way to 'it''s') is not split after 'it'.
+    _LEXEME_RE = re.compile(r"""
+        (?P<ws>[ \t\r\n]+)
+      | (?P<open_string>'(?:[^'\\\n]|\\.|'')*\\?$)
+      | (?P<string>'(?:[^'\\\n]|\\.|'')*')
+      | (?P<number>\d+(?:\.\d*)?)
+      | (?P<word>[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<op><=|>=|<>|!=|=|<|>|\+|-|/|%|!$)
+      | (?P<punct>[(),*;])
+    """, re.VERBOSE)
+
+    def __init__(self, tables: Dict[str, List[str]]):
+        self.tables = {table.lower() for table in tables}
+        self.columns = {column.lower() for columns in tables.values() for column in columns}
+        self._known = self.columns | self.tables | self.KEYWORDS | self.FUNCTIONS | self.TERMINALS | set(self.CLAUSES)
+
+    @classmethod
+    def from_schema(cls, schema: str) -> "SQLGrammar":
+        """Parse the "Table: name" / "- column (TYPE): ..." layout of Config.get_db_schema()"""
+        tables, current = {}, None
+        for line in schema.splitlines():
+            line = line.strip()
+            table = re.match(r"Table:\s*(\w+)", line)
+            column = re.match(r"-\s*(\w+)\s*\(", line)
+            if table:
+                current = table.group(1)
+                tables[current] = []
+            elif column and current:
+                tables[current].append(column.group(1))
+        return cls(tables)
+
+    @staticmethod
+    def _copy(state: Dict) -> Dict:
+        return dict(state, aliases=set(state["aliases"]), checkpoint=None)
+
+    def parse(self, text: str, resume: Optional[Dict] = None) -> Optional[Dict]:
+        """Feed every complete lexeme through the clause automaton; None if the text can never parse.
+        More text may still extend the last lexeme, so the state keeps a checkpoint from just before
+        it; given the state of a prefix of text as resume, only the text from there on is read."""
+        if resume is not None and resume["checkpoint"] is not None:
+            pos, state = resume["checkpoint"]
+            state = self._copy(state)
+        else:
+            pos = 0
+            state = {"clause": -1, "expect": None, "prev": "start", "last": None, "depth": 0, "aliases": set(),
+                     "from_seen": False, "interval": False, "partial": None, "checkpoint": None}
+        while pos < len(text):
+            match = self._LEXEME_RE.match(text, pos)
+            if not match:
+                return None
+            kind, value = match.lastgroup, match.group(0)
+            at_end = match.end() == len(text)
+            if at_end:
+                state["checkpoint"] = (pos, self._copy(state))
+            pos = match.end()
+            if kind == "ws":
+                # MySQL treats "COUNT (" as an identifier followed by a parenthesis
+                if len(value) > self.MAX_WHITESPACE or value.count("\n") > 1 or state["prev"] == "func":
+                    return None
+                continue
+            if state["expect"] == "ended":
+                return None
+            # A word, number or string touching the end of the text may still grow
+            if (at_end and kind in ("word", "number", "string", "open_string")) or (kind == "op" and value == "!"):
+                state["partial"] = (kind, value)
+                return state
+            if not self._step(state, kind, value):
+                return None
+            state["last"] = value.lower()
+        return state
+
+    def _step(self, state: Dict, kind: str, value: str) -> bool:
+        prev, expect = state["prev"], state["expect"]
+        ends_expression = prev in ("operand", "close")
+        if prev == "func" and value != "(":
+            return False
+        if expect == "number" and kind != "number":
+            return False
+        if expect == "by" and value.lower() != "by":
+            return False
+        if expect in ("table", "alias") and kind != "word":
+            return False
+        if expect == "infix":
+            # NOT after an expression only negates IN, LIKE or BETWEEN
+            if value.lower() not in ("in", "like", "between"):
+                return False
+            state["expect"] = None
+
+        if state["clause"] < 0:
+            # Nothing but SELECT may open the statement
+            if kind != "word" or value.lower() != "select":
+                return False
+            state.update(clause=0, prev="kw")
+            return True
+
+        if kind == "word":
+            word = value.lower()
+            if expect == "table":
+                if word not in self.tables:
+                    return False
+                state.update(expect=None, prev="operand", from_seen=True)
+                return True
+            if expect == "alias":
+                if word in self._known - self.columns:
+                    return False
+                state["aliases"].add(word)
+                state.update(expect=None, prev="operand")
+                return True
+            if expect == "by":
+                state.update(expect=None, prev="kw")
+                return True
+            if word in self.CLAUSES:
+                index = self.CLAUSES.index(word)
+                if index <= state["clause"] or state["depth"] != 0 or not ends_expression:
+                    return False
+                if index > 1 and not state["from_seen"]:
+                    return False
+                state.update(clause=index, prev="kw",
+                             expect={"from": "table", "group": "by", "order": "by", "limit": "number"}.get(word))
+                return True
+            if word == "as":
+                if not ends_expression:
+                    return False
+                state.update(expect="alias", prev="kw")
+                return True
+            # YEAR(...) is a function, INTERVAL 1 YEAR a terminal
+            if word in self.TERMINALS and ends_expression:
+                if word in ("asc", "desc") and state["clause"] != self.CLAUSES.index("order"):
+                    return False
+                if word in ("day", "week", "month", "year"):
+                    if not state["interval"]:
+                        return False
+                    state["interval"] = False
+                state["prev"] = "operand"
+                return True
+            if word in self.FUNCTIONS and not ends_expression:
+                state["prev"] = "func"
+                return True
+            if word == "null" and not ends_expression:
+                state["prev"] = "operand"
+                return True
+            if word == "not" and ends_expression:
+                state["expect"] = "infix"
+                return True
+            if word in self.INFIX and not ends_expression:
+                return False
+            if word in self.PREFIX and ends_expression:
+                return False
+            if word == "interval":
+                state["interval"] = True
+            if word == "distinct" and state["last"] not in ("select", "("):
+                return False
+            if word == "by":
+                return False  # Only directly after GROUP or ORDER
+            if word in self.KEYWORDS and word not in self.TERMINALS | {"null"}:
+                state["prev"] = "kw"
+                return True
+            if word in self.columns or word in state["aliases"]:
+                if ends_expression:
+                    return False
+                state["prev"] = "operand"
+                return True
+            return False
+
+        if kind in ("number", "string"):
+            if ends_expression or len(value) > (self.MAX_NUMBER if kind == "number" else self.MAX_STRING):
+                return False
+            state.update(expect=None, prev="operand")
+            return True
+        if value == "(":
+            if ends_expression or state["depth"] >= self.MAX_DEPTH:
+                return False
+            state["depth"] += 1
+            state["prev"] = "open"
+            return True
+        if value == ")":
+            state["depth"] -= 1
+            if state["depth"] < 0 or prev in ("op", "comma"):
+                return False
+            state["prev"] = "close"
+            return True
+        if value == ",":
+            if not ends_expression:
+                return False
+            state["prev"] = "comma"
+            return True
+        if value == "*":
+            if ends_expression:
+                state["prev"] = "op"  # Multiplication
+                return True
+            # SELECT * or COUNT(*)
+            if prev == "open" or (state["clause"] == 0 and state["last"] in ("select", "distinct", ",")):
+                state["prev"] = "operand"
+                return True
+            return False
+        if value == ";":
+            if state["depth"] != 0 or not state["from_seen"] or not ends_expression:
+                return False
+            state.update(expect="ended", prev="end")
+            return True
+        if kind == "op":
+            if not ends_expression and value != "-":
+                return False
+            state["prev"] = "op"
+            return True
+        return False
+
+    def _partial_ok(self, state: Dict) -> bool:
+        kind, value = state["partial"]
+        if state["clause"] < 0:
+            return kind == "word" and "select".startswith(value.lower())
+        if state["prev"] == "func":
+            return False  # Only "(" may follow a function name
+        if kind == "open_string":
+            return state["expect"] is None and state["prev"] not in ("operand", "close") and len(value) < self.MAX_STRING
+        if kind in ("number", "string"):
+            return self._step(self._copy(state), kind, value)
+        if kind == "op":
+            return state["expect"] is None and state["prev"] in ("operand", "close")
+        word = value.lower()
+        if state["expect"] == "alias":
+            return True
+        # The word is still being typed: it has to be the start of a word allowed right here
+        return any(candidate.startswith(word) and self._step(self._copy(state), "word", candidate)
+                   for candidate in self._known | state["aliases"])
+
+    def is_viable_prefix(self, text: str, resume: Optional[Dict] = None) -> bool:
+        """True if text can still be extended into a valid statement (resume: see parse)"""
+        state = self.parse(text, resume)
+        if state is None:
+            return False
+        return state["partial"] is None or self._partial_ok(state)
+
+    def is_complete(self, text: str, resume: Optional[Dict] = None) -> bool:
+        """True if text is a whole statement, with or without the closing semicolon (resume: see parse)"""
+        state = self.parse(text, resume)
+        if state is None:
+            return False
+        if state["partial"] is not None:
+            if state["partial"][0] in ("open_string", "op"):
+                return False
+            if not self._step(state, *state["partial"]):
+                return False
+        if state["expect"] == "ended":
+            return True
+        return (state["from_seen"] and state["depth"] == 0 and state["expect"] is None
+                and state["prev"] in ("operand", "close"))
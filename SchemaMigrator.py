@@ -0,0 +1,191 @@
+import hashlib
+import logging
+import re
+from typing import Dict, List, Tuple
+
+
+# ===========================
+# Schema Migration Module
+# ===========================
+# Ordered (version, description, statements). Applied migrations are recorded with
+# a checksum, so never edit one in place: append a new version instead. Every
+# migration must be safe to re-run after employee_activities has been dropped,
+# because reseeding drops that table and replays the whole list.
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (1, "Create employee_activities", [
+        """
+        CREATE TABLE IF NOT EXISTS employee_activities
+        (
+            record_id          INT AUTO_INCREMENT PRIMARY KEY,
+            employee_id        VARCHAR(20)  NOT NULL,
+            full_name          VARCHAR(100) NOT NULL,
+            week_number        INT          NOT NULL,
+            number_of_meetings INT            DEFAULT 0,
+            total_sales_rmb    DECIMAL(10, 2) DEFAULT 0.0,
+            hours_worked       DECIMAL(5, 2)  DEFAULT 0.0,
+            activities         TEXT,
+            department         VARCHAR(50),
+            hire_date          DATE,
+            email_address      VARCHAR(100),
+            job_title          VARCHAR(100),
+            week_start_date    DATE
+        )
+        """
+    ]),
+    (2, "Create data_versions for result cache invalidation", [
+        """
+        CREATE TABLE IF NOT EXISTS data_versions
+        (
+            table_name VARCHAR(64) PRIMARY KEY,
+            version    BIGINT    NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+        """
+    ]),
+]
+
+# Secondary indexes for the access paths used by Config.get_query_examples. Unlike
+# MIGRATIONS this set is reconciled on every startup, so entries can be added or
+# changed in place.
+MANAGED_INDEXES: Dict[str, Dict] = {
+    "employee_activities": {
+        "idx_department_week": ("department", "week_number"),
+        "idx_full_name_week": ("full_name", "week_number"),
+        "idx_week_number": ("week_number",),
+        "idx_job_title": ("job_title",),
+        "idx_hire_date": ("hire_date",),
+        "idx_week_start_date": ("week_start_date",),
+    }
+}
+
+
+class SchemaMigrator:
+    """Applies pending MIGRATIONS and verifies checksums of already applied ones"""
+
+    def __init__(self, connection, migrations: List[Tuple[int, str, List[str]]] = None,
+                 managed_indexes: Dict[str, Dict] = None):
+        self.connection = connection
+        self.migrations = sorted(migrations or MIGRATIONS, key=lambda m: m[0])
+        self.managed_indexes = MANAGED_INDEXES if managed_indexes is None else managed_indexes
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def checksum(statements: List[str]) -> str:
+        """SHA-256 of the statements with whitespace collapsed"""
+        normalized = "\n".join(re.sub(r"\s+", " ", stmt).strip() for stmt in statements)
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def ensure_migrations_table(self):
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute("""
+                           CREATE TABLE IF NOT EXISTS schema_migrations
+                           (
+                               version     INT PRIMARY KEY,
+                               description VARCHAR(255) NOT NULL,
+                               checksum    CHAR(64)     NOT NULL,
+                               applied_at  TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP
+                           )
+                           """)
+        finally:
+            cursor.close()
+
+    def applied(self) -> Dict[int, str]:
+        """Return {version: checksum} of applied migrations"""
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute("SELECT version, checksum FROM schema_migrations ORDER BY version")
+            return {version: checksum for version, checksum in cursor.fetchall()}
+        finally:
+            cursor.close()
+
+    def verify(self, applied: Dict[int, str]):
+        """Fail if an applied migration was edited after it ran"""
+        known = {version: (description, statements) for version, description, statements in self.migrations}
+        for version, recorded in applied.items():
+            if version not in known:
+                self.logger.warning(f"Database has migration {version}, which this code does not know about")
+                continue
+            expected = self.checksum(known[version][1])
+            if recorded != expected:
+                raise RuntimeError(
+                    f"Checksum mismatch for migration {version} ({known[version][0]}): "
+                    f"database has {recorded[:12]}, code has {expected[:12]}. "
+                    f"Add a new migration instead of editing an applied one, or run with --reseed."
+                )
+
+    def pending(self, applied: Dict[int, str]) -> List[Tuple[int, str, List[str]]]:
+        return [m for m in self.migrations if m[0] not in applied]
+
+    def migrate(self, sync_indexes: bool = True) -> List[int]:
+        """Verify applied migrations, apply pending ones and return their versions"""
+        self.ensure_migrations_table()
+        applied = self.applied()
+        self.verify(applied)
+
+        done = []
+        cursor = self.connection.cursor()
+        try:
+            for version, description, statements in self.pending(applied):
+                self.logger.info(f"Applying migration {version}: {description}")
+                # MySQL DDL commits implicitly, so each migration is recorded right after it runs
+                for statement in statements:
+                    cursor.execute(statement)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, description, checksum) VALUES (%s, %s, %s)",
+                    (version, description, self.checksum(statements))
+                )
+                self.connection.commit()
+                done.append(version)
+        finally:
+            cursor.close()
+
+        if sync_indexes:
+            self.sync_indexes()
+        return done
+
+    def existing_indexes(self, table: str) -> Dict[str, Tuple[str, ...]]:
+        """Return {index_name: columns} for the table's secondary indexes"""
+        cursor = self.connection.cursor(dictionary=True)
+        try:
+            cursor.execute(f"SHOW INDEX FROM {table}")
+            indexes = {}
+            for row in sorted(cursor.fetchall(), key=lambda r: (r["Key_name"], r["Seq_in_index"])):
+                if row["Key_name"] == "PRIMARY":
+                    continue
+                indexes.setdefault(row["Key_name"], []).append(row["Column_name"])
+            return {name: tuple(columns) for name, columns in indexes.items()}
+        finally:
+            cursor.close()
+
+    def sync_indexes(self) -> List[str]:
+        """Create missing managed indexes and rebuild ones whose columns changed"""
+        changed = []
+        cursor = self.connection.cursor()
+        try:
+            for table, indexes in self.managed_indexes.items():
+                existing = self.existing_indexes(table)
+                clauses = []
+                for name, columns in indexes.items():
+                    if existing.get(name) == tuple(columns):
+                        continue
+                    if name in existing:
+                        clauses.append(f"DROP INDEX {name}")
+                    clauses.append(f"ADD INDEX {name} ({', '.join(columns)})")
+                    changed.append(name)
+
+                for name in existing:
+                    if name not in indexes:
+                        self.logger.warning(f"Unmanaged index {table}.{name} left in place")
+
+                if clauses:
+                    # One ALTER so InnoDB builds all indexes in a single pass over the table
+                    self.logger.info(f"Syncing indexes on {table}: {', '.join(clauses)}")
+                    cursor.execute(f"ALTER TABLE {table} {', '.join(clauses)}")
+        finally:
+            cursor.close()
+        return changed
+
+    def current_version(self) -> int:
+        applied = self.applied()
+        return max(applied) if applied else 0
@@ -0,0 +1,295 @@
+import json
+import logging
+import math
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from QueryNormalizer import LiteralExtractor, QueryNormalizer
+
+
+# ===========================
+# Semantic Question Cache Module
+# ===========================
+class HashedTfidfEncoder:
+    """Dependency-free fallback: hashed word, word-bigram and character-trigram counts.
+    IDF weights are applied by SemanticCache at lookup time from the questions it holds."""
+
+    uses_idf = True
+    STOPWORDS = {"a", "an", "the", "of", "in", "on", "for", "to", "by", "do", "does", "did", "is", "are",
+                 "was", "were", "we", "our", "us", "me", "please", "what", "which", "who", "how", "show", "give",
+                 "there", "have", "has", "had", "per", "each"}
+    # Phrasings of one aggregate are rewritten to a single word before hashing, so
+    # "total employee count" and "how many employees" share their features
+    PHRASES = [
+        (re.compile(r"\b(?:total|overall)\s+(?:(\w+)\s+)?(?:count|number)\b"), r"count \1"),
+        (re.compile(r"\bheadcount\b"), "count employee"),
+        (re.compile(r"\b(?:how many|number of|count of)\b"), "count"),
+        (re.compile(r"\b(?:sum of|totals?)\b"), "sum"),
+        (re.compile(r"\b(?:average|mean|avg)\b"), "avg"),
+        (re.compile(r"\b(?:highest|most|maximum|top|largest|greatest)\b"), "max"),
+        (re.compile(r"\b(?:lowest|least|minimum|fewest|smallest)\b"), "min")
+    ]
+    SYNONYMS = {"staff": "employee", "worker": "employee", "people": "employee", "person": "employee",
+                "revenue": "sale", "dept": "department"}
+
+    def __init__(self, dim: int = 2048):
+        self.dim = dim
+
+    @staticmethod
+    def _stem(word: str) -> str:
+        """Crude suffix folding: plurals, and -ed/-ing on longer words"""
+        if word.endswith("ies") and len(word) > 4:
+            return word[:-3] + "y"
+        if word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+            return word[:-1]
+        if word.endswith("ed") and len(word) > 5:
+            return word[:-2]
+        if word.endswith("ing") and len(word) > 6:
+            return word[:-3]
+        return word
+
+    def _words(self, text: str) -> List[str]:
+        text = text.lower()
+        for pattern, replacement in self.PHRASES:
+            text = pattern.sub(replacement, text)
+        words = (self._stem(w) for w in re.findall(r"[a-z0-9]+", text) if w not in self.STOPWORDS)
+        return [self.SYNONYMS.get(w, w) for w in words]
+
+    def _features(self, text: str) -> List[str]:
+        words = self._words(text)
+        features = list(words)
+        features += [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for word in words:
+            padded = f"#{word}#"
+            features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+        return features
+
+    def encode(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in self._features(text):
+            vector[zlib.crc32(feature.encode("utf-8")) % self.dim] += 1.0
+        return np.log1p(vector)  # Sublinear term frequency
+
+
+class SentenceEncoder:
+    """Small CPU sentence-transformers model producing normalized embeddings"""
+
+    uses_idf = False
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, text: str) -> np.ndarray:
+        return self.model.encode(text, normalize_embeddings=True).astype(np.float32)
+
+
+class SemanticCache:
+    """Nearest-neighbour cache of generated SQL over question embeddings in a fixed-size matrix"""
+
+    def __init__(self, encoder, threshold: float = 0.9, max_entries: int = 1024,
+                 extractor: Optional[LiteralExtractor] = None, audit_log: Optional[str] = None,
+                 audit_margin: float = 0.1):
+        self.encoder = encoder
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.extractor = extractor
+        self.audit_log = audit_log
+        self.audit_margin = audit_margin
+        self.version = None
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._audit_lock = threading.Lock()  # Serializes audit writes, which happen outside _lock
+
+        self._vectors = np.zeros((max_entries, encoder.dim), dtype=np.float32)
+        self._df = np.zeros(encoder.dim, dtype=np.float32)  # Document frequency per feature, for IDF
+        self._entries: List[Optional[Dict]] = [None] * max_entries
+        self._slots = OrderedDict()  # cache key -> row, least recently used first
+        self._free_rows = list(range(max_entries - 1, -1, -1))
+        self._served = OrderedDict()  # cache key of a question answered by a hit -> matched key
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "literal_mismatches": 0,
+                      "false_hits": 0, "invalidations": 0}
+
+    @classmethod
+    def from_config(cls, cache_config: Dict, extractor: Optional[LiteralExtractor] = None) -> "SemanticCache":
+        """Build with the configured encoder, falling back to hashed TF-IDF if it cannot load"""
+        encoder = None
+        if cache_config.get("encoder") == "sentence-transformers":
+            try:
+                encoder = SentenceEncoder(cache_config.get("model_name", "all-MiniLM-L6-v2"))
+            except Exception as e:
+                logging.getLogger(__name__).warning(f"Sentence encoder unavailable, using TF-IDF: {str(e)}")
+        if encoder is None:
+            encoder = HashedTfidfEncoder(cache_config.get("dim", 2048))
+        return cls(
+            encoder,
+            threshold=cache_config.get("threshold", 0.9),
+            max_entries=cache_config.get("max_entries", 1024),
+            extractor=extractor,
+            audit_log=cache_config.get("audit_log"),
+            audit_margin=cache_config.get("audit_margin", 0.1)
+        )
+
+    def _literals(self, question: str):
+        return sorted(self.extractor.extract(question)[1]) if self.extractor else []
+
+    def _similarities(self, vector: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Cosine similarity of the vector to every occupied row, returned with those rows"""
+        rows = np.fromiter(self._slots.values(), dtype=np.int64, count=len(self._slots))
+        matrix = self._vectors[rows]
+        if self.encoder.uses_idf:
+            idf = np.log((1.0 + len(rows)) / (1.0 + self._df)) + 1.0
+            matrix = matrix * idf
+            vector = vector * idf
+            norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(vector) or 1.0)
+            return rows, (matrix @ vector) / np.where(norms > 0, norms, 1.0)
+        return rows, matrix @ vector
+
+    def get(self, question: str) -> Optional[Dict]:
+        """Return {"sql", "matched_question", "similarity"} of the nearest cached question above
+        the threshold whose literals match exactly, or None"""
+        key = QueryNormalizer.cache_key(question)
+        vector = self.encoder.encode(key)
+        result, record = None, None
+        with self._lock:
+            if not self._slots:
+                self.stats["misses"] += 1
+                return None
+            rows, similarities = self._similarities(vector)
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            entry = self._entries[rows[best]]
+
+            if similarity < self.threshold:
+                self.stats["misses"] += 1
+                # Only near misses say anything about where the threshold should be
+                if similarity >= self.threshold - self.audit_margin:
+                    record = self._audit_record("near_miss", question, entry, similarity)
+            # Paraphrases must ask about the same weeks, names, departments and dates
+            elif entry["literals"] != self._literals(question):
+                self.stats["literal_mismatches"] += 1
+                self.stats["misses"] += 1
+                record = self._audit_record("literal_mismatch", question, entry, similarity)
+            else:
+                self._slots.move_to_end(entry["key"])
+                self._served[key] = entry["key"]
+                self._served.move_to_end(key)
+                while len(self._served) > self.max_entries:
+                    self._served.popitem(last=False)
+                self.stats["hits"] += 1
+                record = self._audit_record("hit", question, entry, similarity)
+                result = {"sql": entry["sql"], "matched_question": entry["question"], "similarity": similarity}
+        self._audit(record)
+        return result
+
+    def put(self, question: str, sql: str):
+        """Store generated SQL for a question, evicting the least recently used entry when full"""
+        key = QueryNormalizer.cache_key(question)
+        vector = self.encoder.encode(key)
+        with self._lock:
+            if key in self._slots:
+                row = self._slots.pop(key)
+                self._forget_row(row)
+            elif self._free_rows:
+                row = self._free_rows.pop()
+            else:
+                _, row = self._slots.popitem(last=False)
+                self._forget_row(row)
+                self.stats["evictions"] += 1
+
+            self._vectors[row] = vector
+            self._df += vector > 0
+            self._entries[row] = {"key": key, "question": question, "sql": sql,
+                                  "literals": self._literals(question)}
+            self._slots[key] = row
+            self.stats["stores"] += 1
+
+    def _forget_row(self, row: int):
+        self._df -= self._vectors[row] > 0
+        self._vectors[row] = 0.0
+        self._entries[row] = None
+
+    def report_false_hit(self, question: str) -> bool:
+        """Record that SQL served to this question by a semantic hit was wrong and evict the match"""
+        key = QueryNormalizer.cache_key(question)
+        with self._lock:
+            matched_key = self._served.pop(key, None)
+            if matched_key is None or matched_key not in self._slots:
+                return False
+            row = self._slots.pop(matched_key)
+            record = self._audit_record("false_hit", question, self._entries[row], None)
+            self._forget_row(row)
+            self._free_rows.append(row)
+            self.stats["false_hits"] += 1
+        self._audit(record)
+        self.logger.warning(f"Semantic cache false hit for '{question}' (matched '{matched_key}')")
+        return True
+
+    def invalidate(self, question: Optional[str] = None):
+        """Drop the entry stored for a question, or every entry"""
+        with self._lock:
+            if question is None:
+                for row in self._slots.values():
+                    self._forget_row(row)
+                    self._free_rows.append(row)
+                self._slots.clear()
+                self._served.clear()
+            else:
+                row = self._slots.pop(QueryNormalizer.cache_key(question), None)
+                if row is not None:
+                    self._forget_row(row)
+                    self._free_rows.append(row)
+            self.stats["invalidations"] += 1
+
+    def set_version(self, version: str):
+        """Drop all entries when the model or schema version changes"""
+        with self._lock:
+            if version == self.version:
+                return
+            self.version = version
+        self.invalidate()
+
+    def _audit_record(self, event: str, question: str, entry: Optional[Dict],
+                      similarity: Optional[float]) -> Optional[Dict]:
+        """Audit line for a hit, near miss, literal mismatch or false hit; built under the lock"""
+        if not self.audit_log:
+            return None
+        return {
+            "time": time.time(),
+            "event": event,
+            "question": question,
+            "matched_question": entry["question"] if entry else None,
+            "similarity": None if similarity is None or math.isnan(similarity) else round(similarity, 4),
+            "sql": entry["sql"] if entry else None
+        }
+
+    def _audit(self, record: Optional[Dict]):
+        """Append an audit record as one JSON line; called after the cache lock is released"""
+        if record is None:
+            return
+        try:
+            with self._audit_lock, open(self.audit_log, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            self.logger.error(f"Semantic cache audit log write failed: {str(e)}")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            lookups = stats["hits"] + stats["misses"]
+            stats.update({
+                "entries": len(self._slots),
+                "max_entries": self.max_entries,
+                "encoder": type(self.encoder).__name__,
+                "threshold": self.threshold,
+                "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+                "false_hit_rate": stats["false_hits"] / stats["hits"] if stats["hits"] else 0.0
+            })
+        return stats
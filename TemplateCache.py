@@ -0,0 +1,129 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from QueryNormalizer import LiteralExtractor
+
+
+# ===========================
+# SQL Template Cache Module
+# ===========================
+class SQLTemplateCache:
+    """Caches generated SQL with question literals replaced by placeholders, so questions
+    that differ only in week numbers, names, departments, dates or thresholds share one entry"""
+
+    _NUMBER_RE = LiteralExtractor.NUMBER_RE
+    _SQL_LITERAL_RE = re.compile(r"('(?:[^'\\]|\\.|'')*')")
+
+    def __init__(self, extractor: LiteralExtractor, max_entries: int = 512):
+        self.extractor = extractor
+        self.max_entries = max_entries
+        self.version = None
+        self._templates = OrderedDict()  # shape -> list of SQL fragments and slot indexes
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "ambiguous": 0, "evictions": 0, "invalidations": 0}
+
+    def extract(self, question: str) -> Tuple[str, List[Tuple[str, str]]]:
+        return self.extractor.extract(question)
+
+    def _split_sql(self, sql: str, literals: List[Tuple[str, str]]) -> Optional[List]:
+        """Split SQL into fragments and slot indexes; None if any literal does not bind exactly once"""
+        parts = self._SQL_LITERAL_RE.split(sql)
+        # Every literal must map to exactly one SQL token, and no two literals may share a value
+        if len({value.lower() for _, value in literals}) != len(literals):
+            return None
+
+        locations = {}
+        for i, (kind, value) in enumerate(literals):
+            found = []
+            for p, part in enumerate(parts):
+                if p % 2 == 1:
+                    if kind != "num" and part[1:-1].replace("''", "'").lower() == value.lower():
+                        found.append((p, None))
+                elif kind == "num":
+                    found.extend((p, m.span()) for m in self._NUMBER_RE.finditer(part) if m.group(0) == value)
+            if len(found) != 1:
+                return None
+            locations[i] = found[0]
+
+        template = []
+        for p, part in enumerate(parts):
+            slots = sorted((span, i) for i, (lp, span) in locations.items() if lp == p)
+            if p % 2 == 1:
+                template.append(slots[0][1] if slots else part)
+                continue
+            cursor = 0
+            for (start, end), i in slots:
+                template.append(part[cursor:start])
+                template.append(i)
+                cursor = end
+            template.append(part[cursor:])
+        return template
+
+    def _bind(self, template: List, literals: List[Tuple[str, str]]) -> str:
+        sql = []
+        for piece in template:
+            if isinstance(piece, int):
+                kind, value = literals[piece]
+                sql.append(value if kind == "num" else "'" + value.replace("'", "''") + "'")
+            else:
+                sql.append(piece)
+        return "".join(sql)
+
+    def get(self, question: str) -> Optional[str]:
+        """Return SQL for the question by re-binding a cached template, or None"""
+        shape, literals = self.extract(question)
+        with self._lock:
+            template = self._templates.get(shape) if literals else None
+            if template is None:
+                self.stats["misses"] += 1
+                return None
+            self._templates.move_to_end(shape)
+            self.stats["hits"] += 1
+        return self._bind(template, literals)
+
+    def put(self, question: str, sql: str) -> bool:
+        """Learn a template from a question and its generated SQL; skipped when binding is ambiguous"""
+        shape, literals = self.extract(question)
+        if not literals:
+            return False  # Nothing to generalize; the exact-question cache covers it
+        template = self._split_sql(sql, literals)
+        with self._lock:
+            if template is None:
+                self.stats["ambiguous"] += 1
+                return False
+            self._templates[shape] = template
+            self._templates.move_to_end(shape)
+            while len(self._templates) > self.max_entries:
+                self._templates.popitem(last=False)
+                self.stats["evictions"] += 1
+            self.stats["stores"] += 1
+        return True
+
+    def invalidate(self, question: Optional[str] = None):
+        """Drop the template for the question's shape, or all templates"""
+        with self._lock:
+            if question is None:
+                self._templates.clear()
+            else:
+                self._templates.pop(self.extract(question)[0], None)
+            self.stats["invalidations"] += 1
+
+    def set_version(self, version: str):
+        """Drop all templates when the model or schema version changes"""
+        with self._lock:
+            if version == self.version:
+                return
+            self.version = version
+        self.invalidate()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            lookups = stats["hits"] + stats["misses"]
+            stats.update({
+                "templates": len(self._templates),
+                "hit_rate": stats["hits"] / lookups if lookups else 0.0
+            })
+        return stats
@@ -1,10 +1,10 @@
 import mysql.connector
 import os
-import re
 import json
 from datetime import datetime, timedelta
 from typing import List, Dict, Union, Tuple
 from DatabaseManager import DatabaseManager
+from QueryNormalizer import QueryNormalizer
 # ===========================
 # User Interface Module
 # ===========================
@@ -80,10 +80,8 @@ class UserInterface:
         print("\nEnter queries (one per line, type 'done' to finish):")
         queries = []
         while True:
-            query = input("> ").strip()
             # Clean input: remove numbering and quotes
-            query = re.sub(r"^\d+\.\s*", "", query)
-            query = query.replace("'", "").replace('"', '')
+            query = QueryNormalizer.clean(input("> "))
 
             if query.lower() == 'done':
                 break
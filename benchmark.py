@@ -2,9 +2,9 @@ from DatabaseManager import DatabaseManager
 from LLMProcessor import LLMProcessor
 from QueryProcessor import QueryProcessor
 from employee_config import Config
+from QueryNormalizer import QueryNormalizer
 import json
 import decimal
-import re
 
 
 class DecimalEncoder(json.JSONEncoder):
@@ -21,13 +21,14 @@ def run_benchmark(queries, output_file):
     llm_processor.set_config(config)
     query_processor = QueryProcessor(db_manager, llm_processor)
 
+    clean_queries = [QueryNormalizer.clean(query) for query in queries]
+
+    # SQL for the whole list is generated in batches of Config.LLM_MAX_BATCH_SIZE
+    batch_results = query_processor.process_queries(clean_queries)
+
     results = []
-    for query in queries:
+    for query, clean_query, result in zip(queries, clean_queries, batch_results):
         try:
-            clean_query = re.sub(r"^\d+\.\s*", "", query)
-            clean_query = clean_query.replace("'", "").replace('"', '')
-
-            result = query_processor.process_query(clean_query)
             record = {
                 "query": clean_query,
                 "status": result.get("status", "unknown")
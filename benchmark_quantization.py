@@ -0,0 +1,165 @@
+import argparse
+import json
+import subprocess
+import sys
+
+# Questions the rule engine would otherwise answer; rules and caches are switched off so
+# every one of them goes through the model
+SAMPLE_QUESTIONS = [
+    "How many employees does the company have in total?",
+    "What is the average number of hours worked per week by department?",
+    "Which employee had the highest total sales?",
+    "Show total sales by department",
+    "Who attended the most meetings?",
+    "List all employees in the Sales department",
+    "What are the total sales for each week?",
+    "Which department has the most employees?",
+    "Show employees who worked more than 45 hours in a week",
+    "What is the average sales per employee?",
+    "List employees hired after 2020",
+    "How many meetings did John Smith attend?"
+]
+
+VARIANTS = {
+    # The existing load path: bfloat16 with device_map="auto"
+    "bf16": {"mode": "never", "quantize": None},
+    "fp32": {"mode": "always", "quantize": None},
+    "int8": {"mode": "always", "quantize": "int8"}
+}
+
+# One model load per fresh interpreter, so load time and memory are not shared between variants
+VARIANT_SCRIPT = """
+import json, sys, time
+args = json.loads(sys.argv[1])
+from employee_config import Config
+from LLMProcessor import LLMProcessor
+
+class BenchmarkConfig(Config):
+    LLM_LOAD_MODE = "eager"
+    CPU_INFERENCE = dict(args["cpu_inference"], threads=args["threads"])
+    RULE_ENGINE = dict(Config.RULE_ENGINE, ahead_of_model=False)
+    SQL_CACHE = {"enabled": False}
+    SQL_TEMPLATE_CACHE = {"enabled": False}
+    SEMANTIC_CACHE = {"enabled": False}
+    ASSISTED_DECODING = dict(Config.ASSISTED_DECODING, draft=None)
+
+def rss_mb():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2 ** 20
+    except ImportError:
+        try:
+            import resource  # Peak rather than current RSS; KB on Linux
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        except ImportError:
+            return None
+
+# Import the ML stack first so load time and memory cover the model alone
+import torch, transformers
+baseline_mb = rss_mb()
+start = time.perf_counter()
+llm = LLMProcessor(args["model"], config=BenchmarkConfig(), backend="transformers")
+load_seconds = time.perf_counter() - start
+loaded_mb = rss_mb()
+
+sqls = []
+for question in args["questions"]:
+    try:
+        result = llm.resolve_sql(question)
+        sqls.append(result["sql"] if result["source"] == "model" else None)
+    except RuntimeError:
+        sqls.append(None)
+stats = llm.get_generation_stats()
+print(json.dumps({
+    "inference_mode": llm.get_status()["inference_mode"],
+    "load_seconds": load_seconds,
+    "model_rss_mb": loaded_mb - baseline_mb if loaded_mb is not None and baseline_mb is not None else None,
+    "tokens_per_second": stats["generated_tokens"] / stats["seconds"] if stats["seconds"] else 0.0,
+    "avg_latency_ms": stats["avg_latency_ms"],
+    "sqls": sqls
+}))
+"""
+
+
+def run_variant(model: str, variant: str, threads, questions):
+    args = {"model": model, "cpu_inference": VARIANTS[variant], "threads": threads, "questions": questions}
+    output = subprocess.run(
+        [sys.executable, "-c", VARIANT_SCRIPT, json.dumps(args)],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def normalize_sql(sql):
+    return " ".join(sql.rstrip(";").split()).lower() if sql else None
+
+
+def execution_matches(db_manager, sql_a: str, sql_b: str) -> bool:
+    """Both statements run and return the same rows, in any order"""
+    results = [db_manager.execute_query(sql) for sql in (sql_a, sql_b)]
+    if any(result.get("status") == "error" for result in results):
+        return False
+    rows = [sorted(json.dumps(row, sort_keys=True, default=str) for row in result.get("data", []))
+            for result in results]
+    return rows[0] == rows[1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quantized CPU inference against the unquantized load paths")
+    parser.add_argument("--model", default="gpt2-medium")
+    parser.add_argument("--variants", default="bf16,fp32,int8",
+                        help=f"Comma-separated, from {', '.join(VARIANTS)}; the first one is the reference")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--questions", help="File with one question per line (default: built-in sample set)")
+    parser.add_argument("--execute", action="store_true",
+                        help="Also run differing SQL against the database and compare the rows")
+    args = parser.parse_args()
+
+    questions = SAMPLE_QUESTIONS
+    if args.questions:
+        with open(args.questions, encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+    variants = [v.strip() for v in args.variants.split(",") if v.strip()]
+
+    results = {}
+    for variant in variants:
+        print(f"Running {variant}...")
+        results[variant] = run_variant(args.model, variant, args.threads, questions)
+
+    print(f"\nModel: {args.model}, {len(questions)} questions")
+    reference = variants[0]
+    reference_tps = results[reference]["tokens_per_second"]
+    print(f"{'variant':<8} {'mode':<10} {'load s':>8} {'RSS MB':>8} {'tok/s':>8} {'speedup':>8} {'ms/query':>9}")
+    for variant in variants:
+        r = results[variant]
+        rss = f"{r['model_rss_mb']:.0f}" if r["model_rss_mb"] is not None else "n/a"
+        speedup = f"{r['tokens_per_second'] / reference_tps:.2f}x" if reference_tps else "n/a"
+        print(f"{variant:<8} {r['inference_mode'] or 'mock':<10} {r['load_seconds']:>8.2f} {rss:>8} "
+              f"{r['tokens_per_second']:>8.1f} {speedup:>8} {r['avg_latency_ms']:>9.0f}")
+
+    db_manager = None
+    if args.execute:
+        from DatabaseManager import DatabaseManager
+        from employee_config import Config
+        db_manager = DatabaseManager(Config())
+
+    failed = False
+    for variant in variants[1:]:
+        same_text = same_rows = 0
+        mismatches = []
+        for question, ref_sql, sql in zip(questions, results[reference]["sqls"], results[variant]["sqls"]):
+            if normalize_sql(ref_sql) == normalize_sql(sql):
+                same_text += 1
+            elif db_manager and ref_sql and sql and execution_matches(db_manager, ref_sql, sql):
+                same_rows += 1
+            else:
+                mismatches.append((question, ref_sql, sql))
+        print(f"\nSQL equivalence {variant} vs {reference}: {same_text}/{len(questions)} identical"
+              + (f", {same_rows} with identical results" if db_manager else ""))
+        for question, ref_sql, sql in mismatches:
+            print(f"  {question}\n    {reference}: {ref_sql}\n    {variant}: {sql}")
+        failed = failed or bool(mismatches)
+
+    if db_manager:
+        db_manager.dispose()
+    print("DIFFERENCES FOUND" if failed else "ALL SQL EQUIVALENT")
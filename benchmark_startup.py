@@ -0,0 +1,108 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Cold start of the rule-based path, measured in a fresh interpreter each run so
+# nothing is already imported or cached
+COLD_START_SCRIPT = """
+import json, sys, time
+t0 = time.perf_counter()
+from LLMProcessor import LLMProcessor
+t1 = time.perf_counter()
+llm = LLMProcessor("mock", backend="mock")
+sql = llm.generate_sql("How many employees does the company have in total?")
+t2 = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "first_query_ms": (t2 - t1) * 1000,
+    "heavy_modules": [m for m in ("torch", "transformers") if m in sys.modules],
+    "sql": sql
+}))
+"""
+
+# Cold load of a real model, from the hub versus from an exported artifact (see ModelArtifact)
+MODEL_LOAD_SCRIPT = """
+import json, sys, time
+args = json.loads(sys.argv[1])
+from employee_config import Config
+from LLMProcessor import LLMProcessor
+
+class BenchmarkConfig(Config):
+    LLM_LOAD_MODE = "eager"
+    MODEL_ARTIFACT = {"path": args["artifact"]}
+    ASSISTED_DECODING = dict(Config.ASSISTED_DECODING, draft=None)
+
+# Imported first (transformers loads its model classes lazily), so the timing covers the model load alone
+import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer
+t0 = time.perf_counter()
+llm = LLMProcessor(args["model"], config=BenchmarkConfig(), backend="transformers")
+print(json.dumps({"load_seconds": time.perf_counter() - t0,
+                  "inference_mode": llm.get_status()["inference_mode"]}))
+"""
+
+
+def measure_model_load(model: str, artifact, runs: int):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", MODEL_LOAD_SCRIPT, json.dumps({"model": model, "artifact": artifact})],
+            capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return samples
+
+
+def report_model_load(model: str, artifact: str, runs: int):
+    print(f"Model: {model}, artifact: {artifact}, runs: {runs}")
+    medians = {}
+    for label, path in (("hub", None), ("artifact", artifact)):
+        samples = measure_model_load(model, path, runs)
+        medians[label] = statistics.median(s["load_seconds"] for s in samples)
+        print(f"Median cold load from {label}: {medians[label]:.2f} s ({samples[-1]['inference_mode']})")
+    if medians["artifact"]:
+        print(f"Speedup: {medians['hub'] / medians['artifact']:.1f}x")
+
+
+def measure_cold_start(runs: int):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", COLD_START_SCRIPT],
+            capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return samples
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold start benchmark for the mock/rule backend")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=300.0,
+                        help="Fail if median import + first query exceeds this")
+    parser.add_argument("--model", help="Instead, compare cold model loads from the hub and from --artifact")
+    parser.add_argument("--artifact", default="model_artifact", help="Directory written by ModelArtifact.py export")
+    args = parser.parse_args()
+
+    if args.model:
+        report_model_load(args.model, args.artifact, args.runs)
+        sys.exit(0)
+
+    samples = measure_cold_start(args.runs)
+    import_ms = statistics.median(s["import_ms"] for s in samples)
+    query_ms = statistics.median(s["first_query_ms"] for s in samples)
+    total_ms = statistics.median(s["import_ms"] + s["first_query_ms"] for s in samples)
+    heavy = sorted({m for s in samples for m in s["heavy_modules"]})
+
+    print(f"Runs: {args.runs}")
+    print(f"Median import LLMProcessor: {import_ms:.1f} ms")
+    print(f"Median construct + first query: {query_ms:.1f} ms")
+    print(f"Median cold start total: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print(f"Heavy ML modules imported: {', '.join(heavy) if heavy else 'none'}")
+
+    if heavy or total_ms > args.budget_ms:
+        print("FAIL")
+        sys.exit(1)
+    print("PASS")
@@ -18,8 +18,224 @@ class Config:
         'password': 'mdsany$95',
         'database': 'employee_activity_tracking'
     }
+    # Connection pooling for DatabaseManager (kept apart from DB_CONFIG, which is
+    # passed straight to mysql.connector.connect)
+    DB_POOL_CONFIG = {
+        'enabled': True,
+        'pool_size': 5,
+        'recycle_seconds': 1800,  # Reconnect connections older than this
+        'health_check_interval': 30,  # Ping connections idle longer than this
+        'checkout_timeout': 30  # Max seconds to wait for a free connection
+    }
+
+    # SELECT result cache in front of DatabaseManager; entries are dropped when the
+    # employee_activities version in data_versions changes
+    RESULT_CACHE = {
+        'enabled': True,
+        'max_bytes': 32 * 1024 * 1024,
+        'ttl_seconds': 300,
+        'version_check_interval': 5  # Seconds between data_versions lookups
+    }
+
+    # EXPLAIN every executed SELECT and log the ones that still scan the whole table
+    EXPLAIN_CAPTURE = {
+        'enabled': True,
+        'history_size': 200  # Most recent plans kept by DatabaseManager.get_explain_log()
+    }
+
+    # Cost guard for generated SQL: EXPLAIN-based row budget, MAX_EXECUTION_TIME hint
+    # and a client-side KILL QUERY backstop
+    QUERY_GUARD = {
+        'enabled': True,
+        'max_rows_examined': 1_000_000,
+        'on_over_budget': 'limit',  # 'limit' appends LIMIT auto_limit where that bounds the scan, else rejects
+        'auto_limit': 100,
+        'max_execution_ms': 10000,
+        'kill_grace_seconds': 2.0  # Extra time before KILL QUERY after the server-side limit
+    }
+
+    DEPARTMENTS = ['Sales', 'Marketing', 'Product Development', 'Finance', 'IT', 'Business Development']
+
+    # Generated employees loaded on top of the curated rows by DatabaseInitializer
+    SYNTHETIC_DATA = {
+        'num_employees': 0,
+        'num_weeks': 10,
+        'department_mix': {
+            'Sales': 0.3,
+            'Marketing': 0.15,
+            'Product Development': 0.2,
+            'Finance': 0.1,
+            'IT': 0.15,
+            'Business Development': 0.1
+        },
+        'seed': 42,
+        'batch_size': 5000,
+        'load_method': 'executemany'  # or 'infile' (LOAD DATA LOCAL INFILE)
+    }
+
+    # "eager" loads the model before accepting queries; "background" serves rule-matched
+    # queries immediately and switches the model in after a warm-up generation
+    LLM_LOAD_MODE = "background"
+    # "transformers", "mock" (rule-based only; torch/transformers are never imported), or
+    # "remote" (a shared model in a ModelServer process, see MODEL_SERVER), or "pool"
+    # (worker processes on this host, see INFERENCE_POOL)
+    LLM_BACKEND = "transformers"
+    # Model server (python ModelServer.py --model ...) owning one warm model for many
+    # front-end processes. Listens on socket_path (Unix socket) if set, else host:port.
+    # Concurrent questions are batched: a batch runs once it has max_batch_size questions
+    # or max_wait_ms after its first one arrived. timeout is the client's socket timeout.
+    MODEL_SERVER = {
+        'host': '127.0.0.1',
+        'port': 8765,
+        'socket_path': None,
+        'max_batch_size': 8,
+        'max_wait_ms': 10,
+        'timeout': 120
+    }
+    # Process pool for LLM_BACKEND = "pool": each worker memory-maps the same safetensors copy
+    # of the weights in weights_dir (exported from the model on first start), so N workers
+    # share one set of pages. workers=None uses cpu_count // threads_per_worker. timeout
+    # (seconds, None waits indefinitely) bounds how long a caller waits for its answer.
+    INFERENCE_POOL = {
+        'weights_dir': 'model_weights',
+        'workers': None,
+        'threads_per_worker': 4,
+        'timeout': 300
+    }
+    # Rule-based fast path loaded from a JSON file (relative to the code directory).
+    # With ahead_of_model, matching questions never reach the model; otherwise the
+    # rules only answer while the model is loading or when it failed to load.
+    RULE_ENGINE = {
+        'path': 'sql_rules.json',
+        'ahead_of_model': True
+    }
+    # Generated SQL cache: in-memory LRU over a SQLite file, keyed on the normalized
+    # question and versioned by model name, backend, get_db_schema() and the prompt
+    # template plus PROMPT settings
+    SQL_CACHE = {
+        'enabled': True,
+        'path': 'sql_cache.sqlite3',
+        'memory_entries': 1024
+    }
+    # Learns SQL templates from model output so questions differing only in week numbers,
+    # names, DEPARTMENTS, dates or thresholds re-bind cached SQL instead of generating
+    SQL_TEMPLATE_CACHE = {
+        'enabled': True,
+        'max_entries': 512
+    }
+    # Paraphrase cache: nearest cached question by cosine similarity, served only if its
+    # literals match. 'encoder' is 'tfidf' (hashed, numpy only) or 'sentence-transformers'.
+    # Hits, literal mismatches, reported false hits and near misses (similarity within
+    # audit_margin below the threshold) are appended to audit_log.
+    SEMANTIC_CACHE = {
+        'enabled': True,
+        'encoder': 'tfidf',
+        'model_name': 'all-MiniLM-L6-v2',
+        'dim': 2048,
+        'threshold': 0.85,
+        'max_entries': 1024,
+        'audit_log': 'semantic_cache_audit.jsonl',
+        'audit_margin': 0.1
+    }
+    # CPU inference for hosts without a GPU. mode: "auto" (only when CUDA is unavailable),
+    # "always", or "never" (bfloat16 with device_map="auto"). The model loads in float32 and,
+    # with quantize "int8", its linear layers are dynamically quantized to int8 (the output
+    # head stays float). threads sets torch's intra-op thread count; None keeps the default.
+    # Compare against the unquantized path with benchmark_quantization.py before enabling.
+    CPU_INFERENCE = {
+        'mode': 'never',
+        'quantize': 'int8',
+        'threads': None
+    }
+    # Pre-converted model written by `python ModelArtifact.py export --model ...`, loaded
+    # with mmap instead of from_pretrained. It is only used when its fingerprint (model name,
+    # dtype/quantization implied by CPU_INFERENCE, torch/transformers versions) matches;
+    # otherwise the model loads from the hub as before. None disables the lookup.
+    MODEL_ARTIFACT = {
+        'path': 'model_artifact'
+    }
+    # Real-model decoding: stop as soon as the statement is complete (";", a closing
+    # code fence, or a newline after the statement) instead of always running to max_new_tokens.
+    # grammar_constrained masks tokens that would leave a single-table SELECT over the
+    # tables/columns of get_db_schema(); grammar_top_k candidates are checked per step. A
+    # constrained completion that is not a whole statement is answered by the rule engine.
+    GENERATION = {
+        'max_new_tokens': 100,
+        'stop_on_statement_end': True,
+        'grammar_constrained': True,
+        'grammar_top_k': 100
+    }
+    # Assisted (speculative) decoding of single questions: a draft proposes up to
+    # num_draft_tokens tokens and the model checks them in one forward pass, keeping its own
+    # greedy choice at the first mismatch, so the generated SQL does not change.
+    # draft: "ngram" (continuations found in the prompt and in earlier generated SQL),
+    # "model" (draft_model, a small model with the same tokenizer, e.g. gpt2 for gpt2-medium;
+    # falls back to "ngram" if it cannot be loaded), or None to decode token by token.
+    ASSISTED_DECODING = {
+        'draft': 'ngram',
+        'draft_model': 'gpt2',
+        'num_draft_tokens': 5,
+        'ngram_size': 3,
+        'max_history': 256
+    }
+    # Real-model prompts list every table's column names once, then detail only the columns a
+    # question matches by name, description or column_keywords (plus always_include; all of
+    # them when nothing matches), with literal kinds found by LiteralExtractor mapped to
+    # entity_columns. Only the detailed columns vary, and they follow the cached prefix. Over
+    # max_prompt_tokens (counted with the model's tokenizer) descriptions are dropped, then the
+    # least relevant columns.
+    PROMPT = {
+        'prune_schema': True,
+        'max_prompt_tokens': 384,
+        'always_include': ['employee_id', 'full_name'],
+        'entity_columns': {
+            'name': ['full_name'],
+            'dept': ['department'],
+            'date': ['hire_date', 'week_start_date'],
+            'num': ['week_number']
+        },
+        'column_keywords': {
+            'job_title': ['manager', 'engineer', 'analyst', 'accountant', 'administrator',
+                          'specialist', 'executive', 'associate', 'role', 'position'],
+            'activities': ['work', 'task', 'project', 'report', 'customer', 'challenge'],
+            'total_sales_rmb': ['revenue'],
+            'email_address': ['contact']
+        }
+    }
+    # Reuse past_key_values of the static prompt prefix (preamble, schema, rules) in
+    # single-question generation; rebuilt automatically when get_db_schema() changes.
+    # Pruned columns go in the per-question suffix, so all questions share one prefix per
+    # schema; max_entries of them are kept.
+    PREFIX_KV_CACHE = {
+        'enabled': True,
+        'max_entries': 8
+    }
+    LLM_MAX_BATCH_SIZE = 8  # Prompts per padded generate() call in generate_sql_batch
+    # QueryProcessor.process_queries runs SQL generation (generation_batch_size questions per
+    # generate_sql_batch call; None uses LLM_MAX_BATCH_SIZE), execution on db_workers threads
+    # (at most DB_POOL_CONFIG pool_size connections are useful) and summarization as stages
+    # joined by queues holding up to queue_size queries each. Results keep the input order.
+    PIPELINE = {
+        'generation_batch_size': None,
+        'db_workers': 4,
+        'summary_workers': 1,
+        'queue_size': 16
+    }
+    # Per-request time limit of QueryProcessor.process_query, and per query of process_queries
+    # from when it enters the pipeline (request_seconds=None: no limit). A deadline_seconds
+    # passed by the caller replaces it, and None there also means no limit.
+    # SQL generation (including waiting for a loading model or a remote/pool backend) must
+    # end execution_reserve_seconds before it, and is not started with less than
+    # min_generation_seconds left; the request is then answered from the rules (or the mock's
+    # generic query) with "deadline_exceeded": True. The query itself is cancelled at the deadline.
+    DEADLINES = {
+        'request_seconds': 20.0,
+        'execution_reserve_seconds': 3.0,
+        'min_generation_seconds': 0.5
+    }
 
     MAX_RESULT_ROWS = 100  # For qualitative summaries
+    STREAM_BATCH_SIZE = 50  # Rows per fetch when streaming results
     RECESSION_PERIODS = [
         {'start': '2018-01-01', 'end': '2019-12-31', 'name': 'Global Economic Slowdown'},
         {'start': '2020-01-01', 'end': '2022-12-31', 'name': 'COVID-19 Recession'},
@@ -51,6 +267,7 @@ class Config:
         - hire_date (DATE): Date hired
         - email_address (VARCHAR): Email address
         - job_title (VARCHAR): Job title
+        - week_start_date (DATE): First day of the week
         """
 
     @staticmethod
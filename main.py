@@ -7,6 +7,7 @@ from LLMProcessor import LLMProcessor
 from QueryProcessor import QueryProcessor
 from UserInterface import UserInterface
 from DatabaseInitializer import DatabaseInitializer
+import argparse
 import time
 import logging
 
@@ -14,29 +15,33 @@ import logging
 logging.basicConfig(level=logging.INFO)
 
 
-def main():
+def main(reseed: bool = False):
     print("Initializing system...")
     config = Config()
 
-    # Initialize database if not already done
+    # Apply pending schema migrations; only --reseed drops and reloads the data
     db_initializer = DatabaseInitializer(config)
-    # Note: In production, we would check if the database exists and is populated, but for simplicity, we initialize every time for now.
-    # Alternatively, we can have a command-line flag or a config setting to avoid re-initializing every time.
-    db_initializer.initialize_database()
+    if reseed:
+        db_initializer.initialize_database()
+    else:
+        db_initializer.ensure_schema()
 
     # Initialize database manager
     db_manager = DatabaseManager(config)
     print("Database manager initialized.")
 
     # Initialize LLM processor - SPECIFY MODEL NAME EXPLICITLY
-    print("Loading language model (this may take a minute)...")
+    # With LLM_LOAD_MODE = "background" the model loads on a separate thread and
+    # rule-matched questions are answered while it does
     start_time = time.time()
     # llm_processor = LLMProcessor("MiniMaxAI/MiniMax-M1-80k")
-    llm_processor = LLMProcessor("gpt2-medium")
-    llm_processor.set_config(config)
+    llm_processor = LLMProcessor("gpt2-medium", config=config)
 
     load_time = time.time() - start_time
-    print(f"Language model loaded in {load_time:.2f} seconds.")
+    if llm_processor.is_ready():
+        print(f"Language model loaded in {load_time:.2f} seconds.")
+    else:
+        print("Language model loading in the background; rule-matched queries are served immediately.")
 
     # Initialize query processor
     query_processor = QueryProcessor(db_manager, llm_processor)
@@ -52,27 +57,35 @@ def main():
         print("No queries provided. Exiting.")
         return
 
-    # Process each query
+    # Process all queries as a pipeline; each result is shown once it and all before it are done
     print(f"\nProcessing {len(queries)} queries...")
-    for i, query in enumerate(queries, start=1):
+    batch_results = query_processor.iter_queries(queries)
+    for index, query in enumerate(queries):
+        # The generator only runs, and so can only fail, while it is being iterated
         try:
-            # Process query and get results
-            result_data = query_processor.process_query(query)
-            result = {
-                'query': query,
-                'status': 'success',
-                'data': result_data
-            }
+            result_data = next(batch_results)
         except Exception as e:
-            result = {
-                'query': query,
-                'status': 'error',
-                'error': str(e)
-            }
+            for failed_query in queries[index:]:
+                ui.display_results({
+                    'query': failed_query,
+                    'status': 'error',
+                    'error': str(e)
+                })
+            break
+
+        result = {
+            'query': query,
+            'status': 'success',
+            'data': result_data
+        }
 
         # Pass structured result to UI
         ui.display_results(result)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Employee activity natural language query system")
+    parser.add_argument("--reseed", action="store_true",
+                        help="Drop employee_activities, replay migrations and reload synthetic data")
+    args = parser.parse_args()
+    main(reseed=args.reseed)
\ No newline at end of file
@@ -0,0 +1,67 @@
+from PromptBuilder import PromptBuilder, prompt_fingerprint
+from QueryNormalizer import LiteralExtractor
+from SQLCache import SQLCache
+from TemplateCache import SQLTemplateCache
+
+SCHEMA = """Table: employee_activities
+- employee_id (INT): Employee ID
+- full_name (VARCHAR): Full name
+- department (VARCHAR): Department name
+- hours_worked (DECIMAL): Hours worked
+- number_of_meetings (INT): Meetings attended
+"""
+
+
+def make_version(**overrides):
+    settings = {"model_name": "m", "backend": "transformers", "schema": SCHEMA, "prompt": prompt_fingerprint({}),
+                "generation": {"grammar_constrained": True, "max_new_tokens": 100, "quantize": None}}
+    settings.update(overrides)
+    return SQLCache.make_version(**settings)
+
+
+def test_version_covers_model_schema_prompt_and_decoding():
+    base = make_version()
+    assert make_version() == base
+    assert make_version(model_name="other") != base
+    assert make_version(schema=SCHEMA + "- week_number (INT): Week\n") != base
+    assert make_version(prompt=prompt_fingerprint({"prune_schema": False})) != base
+    for key, value in [("grammar_constrained", False), ("max_new_tokens", 50), ("quantize", "int8")]:
+        generation = {"grammar_constrained": True, "max_new_tokens": 100, "quantize": None, key: value}
+        assert make_version(generation=generation) != base
+
+
+def test_sql_cache_drops_entries_of_other_versions(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SQLCache(path, "v1")
+    cache.put("How many employees?", "SELECT COUNT(*) FROM employee_activities;")
+    assert cache.get("how many employees") == "SELECT COUNT(*) FROM employee_activities;"
+    cache.close()
+
+    reopened = SQLCache(path, "v1")
+    assert reopened.get("How many employees?") == "SELECT COUNT(*) FROM employee_activities;"
+    reopened.set_version("v2")
+    assert reopened.get("How many employees?") is None
+    reopened.close()
+    assert SQLCache(path, "v1").get("How many employees?") is None
+
+
+def test_template_cache_invalidates_on_version_change():
+    cache = SQLTemplateCache(LiteralExtractor(["Sales", "Finance"]))
+    cache.set_version("v1")
+    assert cache.put("How many employees in Sales department?",
+                     "SELECT COUNT(*) FROM employee_activities WHERE department = 'Sales';")
+    assert cache.get("How many employees in Finance department?") == (
+        "SELECT COUNT(*) FROM employee_activities WHERE department = 'Finance';")
+    cache.set_version("v2")
+    assert cache.get("How many employees in Finance department?") is None
+
+
+def test_pruned_prompts_share_one_prefix():
+    builder = PromptBuilder(SCHEMA, {"prune_schema": True})
+    prompts = [builder.build_parts(q) for q in ["Who attended the most meetings?",
+                                                "Average hours worked by department",
+                                                "What is the weather?"]]
+    assert len({prefix for prefix, _ in prompts}) == 1
+    assert "number_of_meetings (INT)" in prompts[0][1]
+    assert "hours_worked (DECIMAL)" not in prompts[0][1]
+    assert "hours_worked (DECIMAL)" in prompts[1][1]
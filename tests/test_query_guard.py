@@ -0,0 +1,64 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("mysql.connector")
+
+from QueryGuard import QueryGuard
+
+
+class RecordingGuard(QueryGuard):
+    def __init__(self, **kwargs):
+        super().__init__({}, kill_grace_seconds=0.0, **kwargs)
+        self.killed = []
+
+    def kill_query(self, connection_id: int):
+        self.killed.append(connection_id)
+
+
+class Connection:
+    def __init__(self, connection_id):
+        self.connection_id = connection_id
+
+
+def wait_for(condition, seconds=2.0):
+    give_up = time.time() + seconds
+    while not condition() and time.time() < give_up:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_one_watchdog_thread_kills_only_overdue_statements():
+    guard = RecordingGuard()
+    threads = threading.active_count()
+    watchdogs = [guard.watchdog(Connection(n), 0.05 if n % 2 else 5.0) for n in range(6)]
+    assert threading.active_count() == threads + 1
+    assert wait_for(lambda: sorted(guard.killed) == [1, 3, 5])
+    for watchdog in watchdogs:
+        watchdog.cancel()
+    assert [w.fired for w in watchdogs] == [False, True, False, True, False, True]
+
+
+def test_cancelled_watchdog_never_fires():
+    guard = RecordingGuard()
+    watchdog = guard.watchdog(Connection(7), 0.05)
+    watchdog.cancel()
+    time.sleep(0.15)
+    assert guard.killed == [] and not watchdog.fired
+
+
+def test_check_limits_or_rejects_over_budget():
+    guard = RecordingGuard(max_rows_examined=100, auto_limit=10)
+    limited = guard.check("SELECT full_name FROM employee_activities;", {"rows_examined": 1000})
+    assert limited["action"] == "limit"
+    assert limited["sql"].endswith("LIMIT 10")
+    # A GROUP BY inside a string literal does not make the query unbounded
+    quoted = guard.check("SELECT full_name FROM employee_activities WHERE activities = 'GROUP BY'",
+                         {"rows_examined": 1000})
+    assert quoted["action"] == "limit"
+    rejected = guard.check("SELECT department, COUNT(*) FROM employee_activities GROUP BY department",
+                           {"rows_examined": 1000})
+    assert rejected["action"] == "reject"
+    allowed = guard.check("SELECT COUNT(*) FROM employee_activities", {"rows_examined": 50}, timeout=0.5)
+    assert allowed["sql"].startswith("SELECT /*+ MAX_EXECUTION_TIME(500) */")
@@ -0,0 +1,101 @@
+import logging
+import threading
+import time
+
+from QueryPipeline import QueryPipeline
+
+
+class FakeLLM:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batches = []
+
+    def generate_sql_batch(self, questions, deadlines=None):
+        self.batches.append(list(questions))
+        if self.fail:
+            raise RuntimeError("model crashed")
+        return [{"status": "error", "message": "no SQL"} if "broken" in q else
+                {"status": "success", "sql": f"SELECT '{q}';", "source": "model"} for q in questions]
+
+
+class FakeProcessor:
+    """The parts of QueryProcessor the pipeline calls"""
+
+    def __init__(self, llm, delays=None):
+        self.llm_processor = llm
+        self.delays = delays or {}
+        self.deadline_config = {"execution_reserve_seconds": 0.0}
+        self.logger = logging.getLogger("test")
+
+    def is_knowledge_query(self, query):
+        return query.startswith("explain")
+
+    def handle_knowledge_query(self, query, deadline=None):
+        return {"status": "success", "type": "knowledge", "summary": query}
+
+    def run_generated_sql(self, query, sql, deadline=None):
+        time.sleep(self.delays.get(query, 0.0))
+        if "bad table" in query:
+            return {"status": "error", "message": "Unknown table"}
+        if "crash" in query:
+            raise RuntimeError("connection lost")
+        return {"status": "success", "type": "data", "data": [{"q": query}], "rowcount": 1}
+
+    def summarize_results(self, query, sql, db_results, deadline=None):
+        return {"status": "success", "type": "data", "summary": db_results["data"][0]["q"]}
+
+
+def run(processor, queries, **config):
+    pipeline = QueryPipeline(processor, dict({"generation_batch_size": 2, "db_workers": 3}, **config))
+    return list(pipeline.run(queries))
+
+
+def test_results_keep_input_order():
+    queries = [f"q{n}" for n in range(7)]
+    # Earlier questions execute slowest, so they finish last
+    processor = FakeProcessor(FakeLLM(), delays={q: 0.05 * (7 - n) for n, q in enumerate(queries)})
+    results = run(processor, queries)
+    assert [r["summary"] for r in results] == queries
+    assert all(r["sql_source"] == "model" for r in results)
+    assert processor.llm_processor.batches == [["q0", "q1"], ["q2", "q3"], ["q4", "q5"], ["q6"]]
+
+
+def test_generation_failure_spares_knowledge_queries():
+    processor = FakeProcessor(FakeLLM(fail=True))
+    results = run(processor, ["how many", "explain sales", "list staff", "explain meetings"])
+    assert [r["status"] for r in results] == ["error", "success", "error", "success"]
+    assert results[0]["message"] == "SQL generation failed: model crashed"
+    assert results[1] == {"status": "success", "type": "knowledge", "summary": "explain sales"}
+    assert processor.llm_processor.batches == [["how many"], ["list staff"]]
+
+
+def test_failures_stay_with_their_query():
+    queries = ["ok 1", "broken", "bad table", "crash", "ok 2"]
+    results = run(FakeProcessor(FakeLLM()), queries)
+    assert [r["status"] for r in results] == ["success", "error", "error", "error", "success"]
+    assert results[1]["message"] == "SQL generation failed: no SQL"
+    assert results[2]["message"] == "Unknown table" and results[2]["sql_source"] == "model"
+    assert results[3]["message"] == "System error: connection lost"
+
+
+def test_dead_stage_answers_every_query():
+    processor = FakeProcessor(FakeLLM())
+    pipeline = QueryPipeline(processor, {"generation_batch_size": 2})
+
+    def dead(*args):
+        raise SystemExit
+
+    pipeline._summarize = dead
+    results = list(pipeline.run(["a", "b", "c"]))
+    assert [r["message"] for r in results] == ["System error: query was not processed"] * 3
+
+
+def test_early_close_stops_the_stages():
+    pipeline = QueryPipeline(FakeProcessor(FakeLLM()), {"generation_batch_size": 1, "queue_size": 1})
+    results = pipeline.run([f"q{n}" for n in range(50)])
+    assert next(results)["summary"] == "q0"
+    results.close()
+    give_up = time.time() + 2.0
+    while any(t.name.startswith("pipeline-") for t in threading.enumerate()) and time.time() < give_up:
+        time.sleep(0.05)
+    assert not any(t.name.startswith("pipeline-") for t in threading.enumerate())
@@ -0,0 +1,57 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from QueryNormalizer import LiteralExtractor
+from SemanticCache import HashedTfidfEncoder, SemanticCache
+
+
+def make_cache(threshold=0.85):
+    return SemanticCache(HashedTfidfEncoder(), threshold=threshold, max_entries=8,
+                         extractor=LiteralExtractor(["Sales", "Engineering"]))
+
+
+def test_count_paraphrase_hits():
+    cache = make_cache()
+    cache.put("What is the total employee count?", "SELECT COUNT(*) FROM employees")
+    hit = cache.get("How many employees are there?")
+    assert hit is not None
+    assert hit["sql"] == "SELECT COUNT(*) FROM employees"
+    assert hit["similarity"] >= 0.85
+
+
+def test_different_aggregates_miss():
+    cache = make_cache()
+    cache.put("What is the average hours worked", "SELECT AVG(hours) FROM work_hours")
+    cache.put("List employees hired after 2020", "SELECT name FROM employees WHERE hire_date > '2020-12-31'")
+    assert cache.get("What is the total hours worked") is None
+    assert cache.get("How many employees were hired after 2020") is None
+
+
+def test_literal_mismatch_is_a_miss():
+    cache = make_cache(threshold=0.5)
+    cache.put("How many employees worked over 40 hours", "SELECT 1")
+    assert cache.get("How many employees worked over 45 hours") is None
+    assert cache.get_stats()["literal_mismatches"] == 1
+
+
+def test_invalidate_and_version_change():
+    cache = make_cache()
+    cache.put("How many employees?", "SELECT COUNT(*) FROM employees")
+    cache.invalidate("How many employees?")
+    assert cache.get("How many employees?") is None
+
+    cache.put("How many employees?", "SELECT COUNT(*) FROM employees")
+    cache.set_version("v1")
+    assert cache.get("How many employees?") is None
+    cache.put("How many employees?", "SELECT COUNT(*) FROM employees")
+    cache.set_version("v1")
+    assert cache.get("How many employees?") is not None
+
+
+def test_false_hit_evicts_match():
+    cache = make_cache()
+    cache.put("How many employees?", "SELECT COUNT(*) FROM employees")
+    assert cache.get("What is the total employee count?") is not None
+    assert cache.report_false_hit("What is the total employee count?")
+    assert cache.get("How many employees?") is None
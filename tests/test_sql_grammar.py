@@ -0,0 +1,74 @@
+import pytest
+
+from SQLGrammar import SQLGrammar
+
+SCHEMA = """Table: employee_activities
+- employee_id (INT): Employee ID
+- full_name (VARCHAR): Full name
+- department (VARCHAR): Department
+- hire_date (DATE): Hire date
+- hours_worked (DECIMAL): Hours worked that week
+"""
+
+VALID = [
+    "SELECT full_name FROM employee_activities;",
+    "SELECT COUNT(*) FROM employee_activities",
+    "SELECT department, SUM(hours_worked) AS total FROM employee_activities GROUP BY department ORDER BY total DESC LIMIT 3;",
+    "SELECT full_name FROM employee_activities WHERE department NOT IN ('Sales', 'Finance');",
+    "SELECT full_name FROM employee_activities WHERE full_name NOT LIKE 'Wei%';",
+    "SELECT full_name FROM employee_activities WHERE hours_worked NOT BETWEEN 10 AND 20;",
+    "SELECT full_name FROM employee_activities WHERE department IS NOT NULL;",
+    "SELECT full_name FROM employee_activities WHERE full_name = 'O''Brien';",
+    "SELECT full_name FROM employee_activities WHERE hire_date >= DATE_SUB(CURDATE(), INTERVAL 1 YEAR);",
+]
+
+INVALID = [
+    "DELETE FROM employee_activities;",
+    "SELECT full_name FROM 12;",
+    "SELECT full_name AS 5 FROM employee_activities;",
+    "SELECT full_name FROM employee_activities WHERE full_name NOT full_name;",
+    "SELECT full_name FROM employee_activities WHERE department NOT = 'Sales';",
+    "SELECT salary FROM employee_activities;",
+    "SELECT full_name FROM payroll;",
+    "SELECT COUNT (*) FROM employee_activities;",
+    "SELECT full_name FROM employee_activities; DROP TABLE employee_activities;",
+]
+
+
+@pytest.fixture(scope="module")
+def grammar():
+    return SQLGrammar.from_schema(SCHEMA)
+
+
+@pytest.mark.parametrize("sql", VALID)
+def test_accepts_valid_statements_and_every_prefix(grammar, sql):
+    assert grammar.is_complete(sql)
+    for end in range(1, len(sql) + 1):
+        assert grammar.is_viable_prefix(sql[:end]), sql[:end]
+
+
+@pytest.mark.parametrize("sql", INVALID)
+def test_rejects_invalid_statements(grammar, sql):
+    assert not grammar.is_complete(sql)
+    assert not all(grammar.is_viable_prefix(sql[:end]) for end in range(1, len(sql) + 1))
+
+
+def test_unfinished_statements_are_not_complete(grammar):
+    for sql in ["SELECT full_name FROM", "SELECT full_name FROM employee_activities WHERE",
+                "SELECT full_name FROM employee_activities WHERE department NOT",
+                "SELECT full_name FROM employee_activities WHERE full_name = 'O''"]:
+        assert grammar.is_viable_prefix(sql)
+        assert not grammar.is_complete(sql)
+
+
+@pytest.mark.parametrize("sql", VALID + INVALID)
+def test_resumed_parse_matches_full_parse(grammar, sql):
+    state = grammar.parse("")
+    for end in range(1, len(sql) + 1):
+        text = sql[:end]
+        if state is None:
+            assert not grammar.is_viable_prefix(text)
+            continue
+        assert grammar.is_viable_prefix(text, resume=state) == grammar.is_viable_prefix(text)
+        assert grammar.is_complete(text, resume=state) == grammar.is_complete(text)
+        state = grammar.parse(text, resume=state)